@@ -0,0 +1,281 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save
+)
+from django.dispatch import receiver
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    GenreTitle,
+    Review,
+    Title,
+    reviews_bulk_created
+)
+from reviews.signals import comment_cascaded
+
+from .v1.authentication import user_cache
+from .v1.autocomplete import schedule_update as schedule_autocomplete_update
+from .v1.cache import bump_title_versions
+from .v1.leaderboards import category_board, genre_board, title_boards
+from .v1.leaderboards import schedule_reset as schedule_leaderboard_reset
+from .v1.leaderboards import schedule_update as schedule_leaderboard_update
+from .v1.conditional import (
+    CATEGORIES_VERSION,
+    GENRES_VERSION,
+    USERNAMES_VERSION,
+    USERS_VERSION,
+    comments_version_name,
+    reviews_version_name
+)
+from .v1.pagination import bump_count_version, bump_text_count_version
+from .v1.versions import bump_version
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_save, sender=Comment)
+def reset_counts_on_save(sender, instance, created, update_fields=None,
+                         **kwargs):
+    """ Сбрасывает закешированные счётчики пагинации при добавлении
+    записи. При редактировании текста сбрасываются только счётчики
+    поиска: от текста зависит лишь число его результатов."""
+    if created:
+        bump_count_version(sender)
+    elif not update_fields or 'text' in update_fields:
+        bump_text_count_version(sender)
+
+
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=Comment)
+def reset_counts_on_delete(sender, instance, **kwargs):
+    bump_count_version(sender)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def reset_title_cache(sender, instance, **kwargs):
+    bump_title_versions(instance.pk)
+
+
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def reset_related_title_cache(sender, instance, **kwargs):
+    bump_title_versions(instance.title_id)
+
+
+@receiver(m2m_changed, sender=GenreTitle)
+def reset_title_genres_cache(sender, instance, action, reverse, pk_set,
+                             **kwargs):
+    """ Жанры, назначенные через title.genre.set(), сохраняются без
+    сигналов post_save для GenreTitle."""
+    if not action.startswith('post_'):
+        return
+    title_ids = (pk_set or ()) if reverse else (instance.pk,)
+    bump_title_versions(*title_ids)
+    if reverse:
+        boards = [genre_board(instance.pk)]
+    elif pk_set is not None:
+        boards = [genre_board(genre_id) for genre_id in pk_set]
+    else:
+        # После clear() неизвестно, из рейтингов каких жанров выбыли
+        # произведения.
+        schedule_leaderboard_reset()
+        return
+    schedule_leaderboard_update(*title_ids, boards=boards)
+
+
+@receiver(post_save, sender=Genre)
+def reset_genre_titles_cache(sender, instance, created, **kwargs):
+    if not created:
+        bump_title_versions(*GenreTitle.objects.filter(
+            genre=instance
+        ).values_list('title_id', flat=True))
+
+
+@receiver(post_save, sender=Category)
+def reset_category_titles_cache(sender, instance, created, **kwargs):
+    if not created:
+        bump_title_versions(*instance.titles.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Category)
+def reset_category_titles_cache_on_delete(sender, instance, **kwargs):
+    """ При удалении категории у произведений обнуляется category
+    запросом UPDATE без сигналов, поэтому версии сбрасываются заранее."""
+    title_ids = list(instance.titles.values_list('pk', flat=True))
+    bump_title_versions(*title_ids)
+    schedule_leaderboard_update(
+        *title_ids, boards=[category_board(instance.pk)]
+    )
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def reset_categories_version(sender, instance, **kwargs):
+    bump_version(CATEGORIES_VERSION)
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def reset_genres_version(sender, instance, **kwargs):
+    bump_version(GENRES_VERSION)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def reset_users_version(sender, instance, **kwargs):
+    bump_version(USERS_VERSION)
+    user_cache.invalidate(instance.pk)
+
+
+@receiver(pre_save, sender=User)
+def check_username_change(sender, instance, update_fields=None, **kwargs):
+    """ Имя пользователя выводится в отзывах и комментариях, поэтому
+    версия имён входит в их ETag. У нового пользователя ещё нет ни
+    отзывов, ни комментариев; при остальных сохранениях версия
+    меняется, только если изменилось имя. Здесь изменение только
+    запоминается: версия увеличивается в post_save, после записи
+    строки, иначе параллельный запрос закешировал бы старое имя под
+    новой версией."""
+    instance._username_changed = False
+    if instance._state.adding:
+        return
+    if update_fields is not None and 'username' not in update_fields:
+        return
+    previous = User.objects.filter(
+        pk=instance.pk
+    ).values_list('username', flat=True).first()
+    instance._username_changed = (
+        previous is not None and previous != instance.username
+    )
+
+
+@receiver(post_save, sender=User)
+def reset_usernames_version_on_save(sender, instance, **kwargs):
+    if getattr(instance, '_username_changed', False):
+        instance._username_changed = False
+        bump_version(USERNAMES_VERSION)
+
+
+@receiver(post_delete, sender=User)
+def reset_usernames_version_on_delete(sender, instance, **kwargs):
+    bump_version(USERNAMES_VERSION)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def reset_comments_version(sender, instance, **kwargs):
+    bump_version(comments_version_name(instance.review_id))
+
+
+def bump_comment_counts_version(comment):
+    """ Число комментариев выводится в списке отзывов произведения.
+    Отзыв, переданный при создании комментария, уже загружен; иначе
+    произведение читается по pk отзыва."""
+    if Comment.review.is_cached(comment):
+        title_id = comment.review.title_id
+    else:
+        title_id = Review.objects.filter(
+            pk=comment.review_id
+        ).values_list('title_id', flat=True).first()
+    if title_id is not None:
+        bump_version(reviews_version_name(title_id))
+
+
+@receiver(post_save, sender=Comment)
+def reset_comment_counts_version(sender, instance, created, **kwargs):
+    """ При редактировании комментария их число не меняется."""
+    if created:
+        bump_comment_counts_version(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def reset_comment_counts_version_on_delete(sender, instance, **kwargs):
+    """ Версии для комментариев, удаляемых вместе с отзывом или автором,
+    сбрасываются один раз на весь каскад."""
+    if not comment_cascaded(instance):
+        bump_comment_counts_version(instance)
+
+
+@receiver(pre_delete, sender=User)
+def reset_comment_counts_version_on_author_delete(sender, instance,
+                                                  **kwargs):
+    """ Отзывы удаляемого пользователя сбрасывают версии произведений
+    сами; здесь — произведения, под отзывами к которым он оставлял
+    комментарии."""
+    bump_version(*(
+        reviews_version_name(title_id)
+        for title_id in Review.objects.filter(
+            comments__author=instance
+        ).exclude(author=instance).values_list(
+            'title_id', flat=True
+        ).order_by().distinct()
+    ))
+
+
+@receiver(post_delete, sender=Review)
+def reset_review_comments_version(sender, instance, **kwargs):
+    bump_version(comments_version_name(instance.pk))
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Category)
+def update_autocomplete(sender, instance, **kwargs):
+    schedule_autocomplete_update(instance)
+
+
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Category)
+def remove_from_autocomplete(sender, instance, **kwargs):
+    schedule_autocomplete_update(instance, deleted=True)
+
+
+@receiver(reviews_bulk_created, sender=Review)
+def reset_caches_on_bulk_create(sender, reviews, title_ids, **kwargs):
+    """ bulk_create не отправляет post_save, поэтому кеши отзывов и
+    произведений сбрасываются отдельно."""
+    bump_count_version(Review)
+    bump_title_versions(*title_ids)
+    schedule_leaderboard_update(*title_ids)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def update_leaderboards(sender, instance, **kwargs):
+    schedule_leaderboard_update(instance.title_id)
+
+
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+def update_genre_leaderboards(sender, instance, **kwargs):
+    schedule_leaderboard_update(
+        instance.title_id, boards=[genre_board(instance.genre_id)]
+    )
+
+
+@receiver(post_save, sender=Title)
+def update_title_leaderboards(sender, instance, created, **kwargs):
+    """ У нового произведения нет оценок. При изменении неизвестно,
+    из рейтинга какой категории оно могло выбыть, поэтому все рейтинги
+    строятся заново; произведения редактируют редко."""
+    if not created:
+        schedule_leaderboard_reset()
+
+
+@receiver(post_delete, sender=Title)
+def remove_title_from_leaderboards(sender, instance, **kwargs):
+    """ Жанровые рейтинги обновляются при каскадном удалении
+    GenreTitle."""
+    schedule_leaderboard_update(
+        instance.pk, boards=title_boards(instance.category_id, ())
+    )
@@ -0,0 +1,165 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from users.models import UserRoleMixin
+
+from .versions import bump_version, get_version
+
+User = get_user_model()
+
+USER_VERSION_CLAIM = 'user_version'
+# Бэкенды кеша, данные которых видны только своему процессу.
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def user_version_name(pk):
+    return f'user:{pk}'
+
+
+def versions_shared():
+    """ Версии пользователей увеличиваются в кеше процесса, который
+    изменил пользователя. Другим процессам они видны, только если кеш
+    общий (Redis, Memcached, БД, файлы), а не в памяти процесса."""
+    return settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES
+
+
+class RoleAccessToken(AccessToken):
+    """ Access-токен с ролью пользователя и версией его записи на момент
+    выдачи: права проверяются по токену без запроса к БД."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['username'] = user.username
+        token['role'] = user.role
+        token['is_superuser'] = user.is_superuser
+        token[USER_VERSION_CLAIM] = get_version(user_version_name(user.pk))
+        return token
+
+
+class UserCache:
+    """
+    Ограниченный LRU-кеш пользователей в памяти процесса: не более
+    USER_CACHE_SIZE записей. Запись действительна, пока не изменилась
+    версия пользователя в общем кеше (версия увеличивается сигналами при
+    сохранении и удалении, см. api/signals.py), и не дольше
+    USER_CACHE_TIMEOUT секунд: если кеш не общий, изменение в другом
+    процессе станет видно по истечении этого времени. Наружу отдаются
+    копии, чтобы изменения в одном запросе не попадали в кеш.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.users = OrderedDict()
+
+    def get(self, pk, version=None):
+        """ Пользователь по pk или None, если его нет."""
+        if version is None:
+            version = get_version(user_version_name(pk))
+        now = time.monotonic()
+        with self.lock:
+            entry = self.users.get(pk)
+            if (entry is not None and entry[0] == version
+                    and now - entry[2] < settings.USER_CACHE_TIMEOUT):
+                self.users.move_to_end(pk)
+                return copy.copy(entry[1])
+        user = User.objects.filter(pk=pk).first()
+        if user is None:
+            return None
+        with self.lock:
+            self.users[pk] = (version, user, now)
+            self.users.move_to_end(pk)
+            while len(self.users) > settings.USER_CACHE_SIZE:
+                self.users.popitem(last=False)
+        return copy.copy(user)
+
+    def invalidate(self, pk):
+        with self.lock:
+            self.users.pop(pk, None)
+        bump_version(user_version_name(pk))
+
+    def clear(self):
+        with self.lock:
+            self.users.clear()
+
+
+user_cache = UserCache()
+
+
+class RoleTokenUser(UserRoleMixin, TokenUser):
+    """
+    Пользователь запроса, собранный из утверждений токена: id, username,
+    role и is_superuser. Полная запись пользователя (`full_user`) нужна
+    только там, где требуется экземпляр модели, и берётся из UserCache.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token_user = cls({
+            api_settings.USER_ID_CLAIM: user.pk,
+            'username': user.username,
+            'role': user.role,
+            'is_superuser': user.is_superuser,
+        })
+        token_user.full_user = user
+        return token_user
+
+    @cached_property
+    def role(self):
+        return self.token['role']
+
+    @cached_property
+    def full_user(self):
+        user = user_cache.get(self.pk)
+        if user is None:
+            raise AuthenticationFailed(
+                'Пользователь не найден.', code='user_not_found'
+            )
+        return user
+
+
+class RoleJWTAuthentication(JWTAuthentication):
+    """
+    JWT-аутентификация без чтения пользователя из БД на каждый запрос.
+    Если кеш общий и версия пользователя в токене совпадает с текущей,
+    пользователь запроса собирается из утверждений токена. Иначе (токен
+    выдан до изменения пользователя, без утверждений о роли или версии
+    не видны другим процессам) роль берётся из записи пользователя
+    через UserCache.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                'Токен не содержит идентификатора пользователя.'
+            )
+        version = get_version(user_version_name(user_id))
+        if (versions_shared()
+                and validated_token.get(USER_VERSION_CLAIM) == version):
+            return RoleTokenUser(validated_token)
+        user = user_cache.get(user_id, version)
+        if user is None:
+            raise AuthenticationFailed(
+                'Пользователь не найден.', code='user_not_found'
+            )
+        if not user.is_active:
+            raise AuthenticationFailed(
+                'Пользователь неактивен.', code='user_inactive'
+            )
+        return RoleTokenUser.for_user(user)
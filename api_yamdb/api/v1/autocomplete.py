@@ -0,0 +1,149 @@
+import bisect
+import threading
+
+from django.db import transaction
+from reviews.models import Category, Genre, Title
+
+from .versions import bump_version, get_version
+
+AUTOCOMPLETE_VERSION = 'autocomplete'
+
+# Вид объекта в ответе: (модель, поле-идентификатор в API).
+KINDS = {
+    'title': (Title, 'id'),
+    'genre': (Genre, 'slug'),
+    'category': (Category, 'slug'),
+}
+MODEL_KINDS = {model: kind for kind, (model, _) in KINDS.items()}
+
+
+def normalize(text):
+    return ' '.join(text.casefold().split())
+
+
+def make_keys(name):
+    """ Ключи для поиска по префиксу: название целиком и название,
+    начиная с каждого следующего слова ("орешек" найдёт
+    "Крепкий орешек")."""
+    words = normalize(name).split(' ')
+    return {' '.join(words[idx:]) for idx in range(len(words))} - {''}
+
+
+class PrefixIndex:
+    """
+    Отсортированные списки ключей (ключ, pk) в памяти процесса,
+    по одному на вид объектов. Поиск — двоичный поиск первого ключа
+    с префиксом и просмотр не более `limit` подходящих в каждом списке,
+    то есть O(log n + limit). Изменения применяются точечно по сигналам.
+    Версия в общем кеше позволяет другим процессам заметить изменения
+    и перестроить индекс.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.keys = {kind: [] for kind in KINDS}
+        self.items = {}
+        self.version = None
+
+    def rebuild(self):
+        version = get_version(AUTOCOMPLETE_VERSION)
+        items = {}
+        keys = {}
+        for kind, (model, ident_field) in KINDS.items():
+            rows = model.objects.values_list('pk', ident_field, 'name')
+            kind_keys = []
+            for pk, ident, name in rows.iterator():
+                item_keys = make_keys(name)
+                items[(kind, pk)] = (ident, name, item_keys)
+                kind_keys.extend((key, pk) for key in item_keys)
+            keys[kind] = sorted(kind_keys)
+        with self.lock:
+            self.keys, self.items, self.version = keys, items, version
+
+    def ensure_fresh(self):
+        if self.version != get_version(AUTOCOMPLETE_VERSION):
+            self.rebuild()
+
+    def _remove(self, kind, pk):
+        item = self.items.pop((kind, pk), None)
+        if item is None:
+            return
+        kind_keys = self.keys[kind]
+        for key in item[2]:
+            index = bisect.bisect_left(kind_keys, (key, pk))
+            if index < len(kind_keys) and kind_keys[index] == (key, pk):
+                del kind_keys[index]
+
+    def _add(self, kind, pk, ident, name):
+        item_keys = make_keys(name)
+        self.items[(kind, pk)] = (ident, name, item_keys)
+        for key in item_keys:
+            bisect.insort(self.keys[kind], (key, pk))
+
+    def apply(self, kind, pk, ident=None, name=None):
+        """ Точечно обновляет индекс (name=None — удаление) и увеличивает
+        общую версию. Если до этого индекс уже отставал от версии,
+        он будет перестроен при следующем чтении."""
+        before = get_version(AUTOCOMPLETE_VERSION)
+        bump_version(AUTOCOMPLETE_VERSION)
+        after = get_version(AUTOCOMPLETE_VERSION)
+        with self.lock:
+            if self.version != before:
+                self.version = None
+                return
+            self._remove(kind, pk)
+            if name is not None:
+                self._add(kind, pk, ident, name)
+            self.version = after
+
+    def _lookup_kind(self, kind, prefix, limit):
+        matches = []
+        seen = set()
+        kind_keys = self.keys[kind]
+        index = bisect.bisect_left(kind_keys, (prefix,))
+        while index < len(kind_keys) and len(matches) < limit:
+            key, pk = kind_keys[index]
+            index += 1
+            if not key.startswith(prefix):
+                break
+            if pk not in seen:
+                seen.add(pk)
+                matches.append((key, kind, pk))
+        return matches
+
+    def lookup(self, prefix, limit, kinds=KINDS):
+        """ Не более `limit` объектов, название которых или одно из слов
+        названия начинается с `prefix`; упорядочены по ключу."""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        self.ensure_fresh()
+        with self.lock:
+            matches = sorted(
+                match
+                for kind in kinds
+                for match in self._lookup_kind(kind, prefix, limit)
+            )[:limit]
+            results = []
+            for _, kind, pk in matches:
+                ident, name, _ = self.items[(kind, pk)]
+                results.append({'type': kind, 'id': ident, 'name': name})
+        return results
+
+
+autocomplete_index = PrefixIndex()
+
+
+def schedule_update(instance, deleted=False):
+    """ Обновляет индекс после коммита транзакции, в которой изменён
+    объект, чтобы откат не оставил в индексе несуществующих записей."""
+    kind = MODEL_KINDS[type(instance)]
+    pk = instance.pk
+    if deleted:
+        transaction.on_commit(lambda: autocomplete_index.apply(kind, pk))
+        return
+    ident = getattr(instance, KINDS[kind][1])
+    name = instance.name
+    transaction.on_commit(
+        lambda: autocomplete_index.apply(kind, pk, ident, name)
+    )
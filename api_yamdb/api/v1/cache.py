@@ -0,0 +1,64 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+from .versions import bump_version, get_versions
+
+CATALOG_VERSION = 'catalog'
+
+
+def title_version_name(title_id):
+    return f'title:{title_id}'
+
+
+def bump_title_versions(*title_ids):
+    """ Делает недействительными закешированные ответы для произведений
+    и все закешированные списки произведений."""
+    bump_version(
+        CATALOG_VERSION, *(title_version_name(pk) for pk in title_ids)
+    )
+
+
+class TitleCacheMixin:
+    """
+    Кеширование сериализованных ответов list и retrieve.
+    Ключ списка включает версию каталога, ключ произведения — его
+    собственную версию. Версии увеличиваются сигналами при записи
+    (см. api/signals.py), поэтому записи кеша никогда не устаревают и не
+    требуют полной очистки: старые просто вытесняются по таймауту.
+    """
+
+    def get_cache_key(self, action, versions):
+        uri = self.request.build_absolute_uri()
+        digest = hashlib.md5(uri.encode()).hexdigest()
+        versions = ':'.join(str(version) for version in versions)
+        return f'titles:{action}:{versions}:{digest}'
+
+    def cached_response(self, key, handler, request, *args, **kwargs):
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, settings.TITLES_CACHE_TIMEOUT)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        key = self.get_cache_key('list', get_versions(CATALOG_VERSION))
+        return self.cached_response(
+            key, super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        versions = get_versions(
+            title_version_name(
+                kwargs[self.lookup_url_kwarg or self.lookup_field]
+            )
+        )
+        key = self.get_cache_key('detail', versions)
+        return self.cached_response(
+            key, super().retrieve, request, *args, **kwargs
+        )
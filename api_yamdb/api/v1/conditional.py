@@ -0,0 +1,83 @@
+import hashlib
+import math
+import time
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .versions import get_last_modified, get_versions
+
+USERS_VERSION = 'users'
+# Меняется только при смене имени или удалении пользователя.
+USERNAMES_VERSION = 'usernames'
+CATEGORIES_VERSION = 'categories'
+GENRES_VERSION = 'genres'
+
+
+def comments_version_name(review_id):
+    return f'comments:review:{review_id}'
+
+
+def reviews_version_name(title_id):
+    """ Версия отзывов произведения, которая не входит в версию самого
+    произведения: число комментариев к ним."""
+    return f'reviews:title:{title_id}'
+
+
+class ConditionalListMixin:
+    """
+    Условные GET-запросы (If-None-Match / If-Modified-Since) для list.
+    ETag и Last-Modified строятся по версиям данных из
+    `get_version_names()`, которые увеличиваются сигналами при записи,
+    поэтому ответ 304 отдаётся без обращения к БД и сериализации.
+    Last-Modified отдаётся с точностью до секунды, поэтому только для
+    данных, изменённых раньше текущей секунды: иначе запись в ту же
+    секунду его бы не изменила, и проверка идёт только по ETag.
+    """
+
+    def get_version_names(self):
+        raise NotImplementedError(
+            'Определите get_version_names() для условных запросов.'
+        )
+
+    def get_validators(self):
+        names = self.get_version_names()
+        versions = ':'.join(str(version) for version in get_versions(*names))
+        raw = (
+            f'{self.request.get_full_path()}:{self.request.user.pk}:'
+            f'{self.request.accepted_media_type}:{versions}'
+        )
+        etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+        last_modified = get_last_modified(*names)
+        if last_modified is not None:
+            last_modified = math.ceil(last_modified)
+            if last_modified >= time.time():
+                last_modified = None
+        return etag, last_modified
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_validators()
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+
+class ConditionalGetMixin(ConditionalListMixin):
+    """ Условные GET-запросы для list и retrieve."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
@@ -0,0 +1,50 @@
+import threading
+
+from reviews.models import Category, Genre
+
+from .conditional import CATEGORIES_VERSION, GENRES_VERSION
+from .versions import get_version
+
+
+class DimensionCache:
+    """
+    Кеш небольшой и редко меняющейся таблицы (жанры, категории) в памяти
+    процесса: объекты по pk и по slug. Таблица перечитывается целиком,
+    когда меняется её версия в общем кеше; версии увеличиваются сигналами
+    при записи (см. api/signals.py).
+    """
+
+    def __init__(self, model, version_name):
+        self.model = model
+        self.version_name = version_name
+        self.lock = threading.Lock()
+        self.version = None
+        self.by_pk = {}
+        self.by_slug = {}
+
+    def __deepcopy__(self, memo):
+        # Поля сериализаторов копируются вместе с аргументами, а кеш
+        # должен оставаться общим для процесса.
+        return self
+
+    def ensure_fresh(self):
+        version = get_version(self.version_name)
+        if version == self.version:
+            return
+        objects = list(self.model.objects.all())
+        with self.lock:
+            self.by_pk = {obj.pk: obj for obj in objects}
+            self.by_slug = {obj.slug: obj for obj in objects}
+            self.version = version
+
+    def get(self, pk):
+        self.ensure_fresh()
+        return self.by_pk.get(pk)
+
+    def get_by_slug(self, slug):
+        self.ensure_fresh()
+        return self.by_slug.get(slug)
+
+
+genre_cache = DimensionCache(Genre, GENRES_VERSION)
+category_cache = DimensionCache(Category, CATEGORIES_VERSION)
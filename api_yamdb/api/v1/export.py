@@ -0,0 +1,176 @@
+import csv
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+from reviews.models import Comment, GenreTitle, Review, Title
+
+from .dimensions import category_cache, genre_cache
+
+
+class NDJSONRenderer(BaseRenderer):
+    """ Выгрузка построчно в JSON. Сами выгрузки отдаются потоком мимо
+    рендерера, через него проходят только ответы с ошибками."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json_line(data).encode()
+
+
+class CSVRenderer(BaseRenderer):
+    """ Выгрузка в CSV. Ответы с ошибками — пары поле/сообщение."""
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, dict):
+            data = {'detail': data}
+        writer = csv.writer(Echo())
+        return ''.join(
+            writer.writerow([key, value]) for key, value in data.items()
+        ).encode()
+
+
+class Echo:
+    """ Файл, который не хранит записанное, а возвращает его: csv.writer
+    отдаёт строки генератору, не накапливая их в памяти."""
+
+    def write(self, value):
+        return value
+
+
+def json_line(row):
+    return json.dumps(row, ensure_ascii=False, cls=DjangoJSONEncoder) + '\n'
+
+
+def ndjson_lines(fields, rows):
+    for row in rows:
+        yield json_line(dict(zip(fields, row)))
+
+
+def csv_value(value):
+    """ Список (слаги жанров) — через запятую, даты — в ISO 8601, как и
+    в NDJSON."""
+    if isinstance(value, list):
+        return ','.join(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def csv_lines(fields, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(csv_value(value) for value in row)
+
+
+ENCODERS = {
+    NDJSONRenderer.format: ndjson_lines,
+    CSVRenderer.format: csv_lines,
+}
+
+
+def chunks(queryset, fields, after=None):
+    """ Строки таблицы пачками по EXPORT_CHUNK_SIZE по возрастанию id.
+    Каждая пачка — отдельный запрос id > последнего отданного, поэтому
+    память не зависит от размера таблицы и курсор не держится открытым
+    между пачками."""
+    size = settings.EXPORT_CHUNK_SIZE
+    queryset = queryset.order_by('pk').values_list('pk', *fields)
+    last = after or 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last)[:size])
+        if not chunk:
+            return
+        yield chunk
+        if len(chunk) < size:
+            return
+        last = chunk[-1][0]
+
+
+TITLE_FIELDS = (
+    'id', 'name', 'year', 'description', 'category', 'genre', 'rating',
+    'rating_count'
+)
+
+
+def cached_slug(dimension_cache, pk):
+    """ Слаг жанра или категории из кеша. Объект, добавленный после
+    проверки кеша, находится после его перечитывания; удалённый —
+    пропускается (None)."""
+    obj = dimension_cache.by_pk.get(pk) or dimension_cache.get(pk)
+    return obj.slug if obj is not None else None
+
+
+def title_rows(after=None, since=None):
+    """ Произведения со слагами категории и жанров: связи с жанрами
+    читаются одним запросом на пачку, сами жанры и категории — из кеша,
+    свежесть которого проверяется раз на пачку и при промахе."""
+    fields = ('name', 'year', 'description', 'category_id', 'rating',
+              'rating_count')
+    for chunk in chunks(Title.objects.all(), fields, after):
+        genre_cache.ensure_fresh()
+        category_cache.ensure_fresh()
+        genres = {}
+        for title_id, genre_id in GenreTitle.objects.filter(
+            title_id__in=[row[0] for row in chunk]
+        ).order_by('pk').values_list('title_id', 'genre_id'):
+            slug = cached_slug(genre_cache, genre_id)
+            if slug is not None:
+                genres.setdefault(title_id, []).append(slug)
+        for pk, name, year, description, category_id, rating, count in chunk:
+            category = None
+            if category_id is not None:
+                category = cached_slug(category_cache, category_id)
+            yield (
+                pk, name, year, description, category,
+                genres.get(pk, []), rating, count
+            )
+
+
+REVIEW_FIELDS = (
+    'id', 'title_id', 'author', 'text', 'score', 'pub_date', 'comment_count'
+)
+
+
+def review_rows(after=None, since=None):
+    """ Отзывы, добавленные позже `since`: фильтр идёт по pub_date,
+    поэтому отредактированные отзывы повторно не выгружаются."""
+    queryset = Review.objects.all()
+    if since is not None:
+        queryset = queryset.filter(pub_date__gt=since)
+    fields = ('title_id', 'author__username', 'text', 'score', 'pub_date',
+              'comment_count')
+    for chunk in chunks(queryset, fields, after):
+        yield from chunk
+
+
+COMMENT_FIELDS = (
+    'id', 'review_id', 'title_id', 'author', 'text', 'pub_date'
+)
+
+
+def comment_rows(after=None, since=None):
+    """ Комментарии, добавленные позже `since` (по pub_date, как и
+    отзывы)."""
+    queryset = Comment.objects.all()
+    if since is not None:
+        queryset = queryset.filter(pub_date__gt=since)
+    fields = ('review_id', 'review__title_id', 'author__username', 'text',
+              'pub_date')
+    for chunk in chunks(queryset, fields, after):
+        yield from chunk
+
+
+# Выгрузки: имя в URL -> (поля, генератор строк, есть ли pub_date).
+EXPORTS = {
+    'titles': (TITLE_FIELDS, title_rows, False),
+    'reviews': (REVIEW_FIELDS, review_rows, True),
+    'comments': (COMMENT_FIELDS, comment_rows, True),
+}
@@ -0,0 +1,73 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+IN_PROGRESS = 'in-progress'
+
+
+class IdempotentCreateMixin:
+    """
+    Поддержка заголовка `Idempotency-Key` для create. Успешный ответ
+    сохраняется в кеше по пользователю, пути и ключу; повторный запрос
+    с тем же ключом получает сохранённый ответ без обращения к БД.
+    Пока первый запрос выполняется, повтор получает 409, а повтор с
+    другим телом запроса — 422.
+    """
+
+    def get_idempotency_key(self, request):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return None
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return f'idempotency:{request.user.pk}:{request.path}:{digest}'
+
+    @staticmethod
+    def get_fingerprint(request):
+        body = json.dumps(request.data, sort_keys=True, default=str)
+        return hashlib.sha256(body.encode()).hexdigest()
+
+    def create(self, request, *args, **kwargs):
+        cache_key = self.get_idempotency_key(request)
+        if cache_key is None:
+            return super().create(request, *args, **kwargs)
+        fingerprint = self.get_fingerprint(request)
+        stored = cache.get(cache_key)
+        if stored is None and cache.add(
+            cache_key, IN_PROGRESS, settings.IDEMPOTENCY_LOCK_TIMEOUT
+        ):
+            try:
+                response = super().create(request, *args, **kwargs)
+            except Exception:
+                cache.delete(cache_key)
+                raise
+            if status.is_success(response.status_code):
+                cache.set(cache_key, {
+                    'fingerprint': fingerprint,
+                    'status': response.status_code,
+                    'data': response.data,
+                }, settings.IDEMPOTENCY_KEY_TIMEOUT)
+            else:
+                cache.delete(cache_key)
+            return response
+
+        stored = cache.get(cache_key)
+        if stored is None or stored == IN_PROGRESS:
+            return Response(
+                {'detail': 'Запрос с этим Idempotency-Key ещё выполняется.'},
+                status=status.HTTP_409_CONFLICT
+            )
+        if stored['fingerprint'] != fingerprint:
+            return Response(
+                {'detail': 'Idempotency-Key уже использован для другого '
+                           'запроса.'},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+        return Response(
+            stored['data'],
+            status=stored['status'],
+            headers={'Idempotent-Replayed': 'true'}
+        )
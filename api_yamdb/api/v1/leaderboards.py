@@ -0,0 +1,265 @@
+import bisect
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import ExpressionWrapper, F, FloatField, Sum, Value
+from reviews.models import GenreTitle, Title
+
+from .versions import bump_version, get_versions
+
+# Версия всех рейтингов сразу: меняется при пересчёте средней по
+# каталогу и при изменениях, затрагивающих неизвестные рейтинги.
+LEADERBOARD_VERSION = 'leaderboards'
+PRIOR_KEY = 'leaderboards:prior'
+
+GLOBAL_BOARD = ('all', None)
+
+
+def genre_board(genre_id):
+    return ('genre', genre_id)
+
+
+def category_board(category_id):
+    return ('category', category_id)
+
+
+def board_version_name(key):
+    kind, pk = key
+    return f'leaderboard:{kind}:{pk}'
+
+
+def title_boards(category_id, genre_ids):
+    """ Рейтинги, в которые попадает произведение."""
+    boards = {GLOBAL_BOARD}
+    if category_id is not None:
+        boards.add(category_board(category_id))
+    boards.update(genre_board(genre_id) for genre_id in genre_ids)
+    return boards
+
+
+def current_boards(title_ids):
+    """ Рейтинги, в которые сейчас попадают произведения: один запрос."""
+    boards = {GLOBAL_BOARD}
+    for category_id, genre_id in Title.objects.filter(
+        pk__in=title_ids
+    ).values_list('category_id', 'genretitle__genre_id'):
+        boards |= title_boards(category_id, () if genre_id is None else (
+            genre_id,
+        ))
+    return boards
+
+
+def get_prior():
+    """
+    Средняя оценка по каталогу, общая для всех процессов. Она живёт в
+    кеше LEADERBOARD_PRIOR_TIMEOUT секунд; процесс, пересчитавший её,
+    увеличивает LEADERBOARD_VERSION: от средней зависят все рейтинги.
+    """
+    prior = cache.get(PRIOR_KEY)
+    if prior is None:
+        totals = Title.objects.aggregate(
+            total=Sum('rating_sum'), count=Sum('rating_count')
+        )
+        prior = totals['total'] / totals['count'] if totals['count'] else 0
+        if cache.add(PRIOR_KEY, prior, settings.LEADERBOARD_PRIOR_TIMEOUT):
+            bump_version(LEADERBOARD_VERSION)
+        else:
+            prior = cache.get(PRIOR_KEY, prior)
+    return prior
+
+
+def version_names(key):
+    """ Версии, от которых зависит рейтинг `key`. Истёкшая средняя по
+    каталогу пересчитывается заранее, чтобы её смена попала в ETag."""
+    get_prior()
+    return (LEADERBOARD_VERSION, board_version_name(key))
+
+
+def weighted_rating(rating_sum, rating_count, prior, min_votes):
+    """ Байесовский рейтинг: средняя оценка, сглаженная к средней по
+    каталогу `prior` так, будто у произведения есть ещё `min_votes`
+    оценок, равных этой средней. Произведение с парой десяток не обгоняет
+    произведение с сотней девяток."""
+    return (rating_sum + min_votes * prior) / (rating_count + min_votes)
+
+
+class Board:
+    """
+    Не более `size` лучших произведений одного рейтинга: отсортированный
+    список (-рейтинг, -число оценок, pk). truncated — подходящих
+    произведений больше, чем помещается, и те, что не вошли, неизвестны.
+    """
+
+    def __init__(self, entries, size, truncated, version=None):
+        self.entries = entries
+        self.size = size
+        self.truncated = truncated
+        self.version = version
+        self.pks = {entry[2]: entry for entry in entries}
+
+    def _remove(self, pk):
+        entry = self.pks.pop(pk)
+        del self.entries[bisect.bisect_left(self.entries, entry)]
+
+    def update(self, pk, entry):
+        """ Заменяет (entry=None — убирает) произведение в рейтинге.
+        Возвращает False, если без обращения к БД больше нельзя сказать,
+        кто входит в рейтинг, и его нужно построить заново."""
+        if pk in self.pks:
+            self._remove(pk)
+        if entry is not None and (
+            not self.truncated
+            or (self.entries and entry < self.entries[-1])
+        ):
+            bisect.insort(self.entries, entry)
+            self.pks[pk] = entry
+            if len(self.entries) > self.size:
+                self._remove(self.entries[-1][2])
+                self.truncated = True
+        return not self.truncated or len(self.entries) >= self.size
+
+
+class Leaderboards:
+    """
+    Материализованные рейтинги лучших произведений (общий, по жанрам и
+    по категориям) в памяти процесса. Рейтинг строится одним запросом
+    ORDER BY ... LIMIT при первом обращении, дальше изменённые отзывами
+    произведения переставляются в уже построенных рейтингах точечно.
+    У каждого рейтинга своя версия в общем кеше: другие процессы строят
+    заново только рейтинги, в которые попадают изменённые произведения.
+    Все рейтинги строятся заново при смене средней по каталогу (не реже
+    раза в LEADERBOARD_PRIOR_TIMEOUT секунд, см. get_prior()).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear(None, None)
+
+    def clear(self, version, prior):
+        self.boards = {}
+        self.pending = set()
+        self.prior = prior
+        self.version = version
+
+    def ensure_fresh(self, key):
+        """ Сбрасывает устаревшие рейтинги и возвращает текущую версию
+        рейтинга `key`."""
+        prior = get_prior()
+        version, board_version = get_versions(
+            LEADERBOARD_VERSION, board_version_name(key)
+        )
+        if version != self.version or prior != self.prior:
+            self.clear(version, prior)
+        board = self.boards.get(key)
+        if board is not None and board.version != board_version:
+            del self.boards[key]
+        return board_version
+
+    def make_entry(self, pk, rating_sum, rating_count):
+        score = weighted_rating(
+            rating_sum, rating_count, self.prior,
+            settings.LEADERBOARD_MIN_VOTES
+        )
+        return (-score, -rating_count, pk)
+
+    def build(self, key, version):
+        size = settings.LEADERBOARD_SIZE
+        min_votes = settings.LEADERBOARD_MIN_VOTES
+        queryset = Title.objects.filter(rating_count__gt=0)
+        kind, pk = key
+        if kind == 'genre':
+            queryset = queryset.filter(pk__in=GenreTitle.objects.filter(
+                genre_id=pk
+            ).values('title_id'))
+        elif kind == 'category':
+            queryset = queryset.filter(category_id=pk)
+        rows = queryset.annotate(weighted=ExpressionWrapper(
+            (F('rating_sum') + Value(float(min_votes * self.prior)))
+            / (F('rating_count') + Value(min_votes)),
+            output_field=FloatField()
+        )).order_by('-weighted', '-rating_count', 'pk').values_list(
+            'pk', 'rating_sum', 'rating_count'
+        )[:size + 1]
+        entries = sorted(self.make_entry(*row) for row in rows)
+        return Board(entries[:size], size, len(entries) > size, version)
+
+    def flush(self):
+        """ Переставляет в построенных рейтингах произведения, изменённые
+        с прошлого чтения: два запроса на все такие произведения."""
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, set()
+        rows = {
+            row[0]: row for row in Title.objects.filter(
+                pk__in=pending, rating_count__gt=0
+            ).values_list('pk', 'rating_sum', 'rating_count', 'category_id')
+        }
+        genres = {}
+        for title_id, genre_id in GenreTitle.objects.filter(
+            title_id__in=rows
+        ).values_list('title_id', 'genre_id'):
+            genres.setdefault(title_id, []).append(genre_id)
+        for pk in pending:
+            entry = None
+            targets = set()
+            if pk in rows:
+                _, rating_sum, rating_count, category_id = rows[pk]
+                entry = self.make_entry(pk, rating_sum, rating_count)
+                targets = title_boards(category_id, genres.get(pk, ()))
+            for key, board in list(self.boards.items()):
+                if key in targets or pk in board.pks:
+                    fresh = board.update(
+                        pk, entry if key in targets else None
+                    )
+                    if not fresh:
+                        del self.boards[key]
+
+    def top(self, key, limit):
+        """ Не более `limit` лучших произведений рейтинга:
+        список пар (pk, байесовский рейтинг)."""
+        with self.lock:
+            version = self.ensure_fresh(key)
+            self.flush()
+            if key not in self.boards:
+                self.boards[key] = self.build(key, version)
+            entries = self.boards[key].entries[:limit]
+        return [(pk, -score) for score, _, pk in entries]
+
+    def apply(self, title_ids, boards=()):
+        """ Отмечает произведения изменёнными и увеличивает версии
+        рейтингов, в которые они попадают, и рейтингов `boards`, из
+        которых они могли выбыть. Рейтинг, который уже отставал от своей
+        версии, будет построен заново при следующем чтении."""
+        keys = list(current_boards(title_ids) | set(boards))
+        names = [board_version_name(key) for key in keys]
+        before = get_versions(*names)
+        bump_version(*names)
+        after = get_versions(*names)
+        with self.lock:
+            for key, old, new in zip(keys, before, after):
+                board = self.boards.get(key)
+                if board is None:
+                    continue
+                if board.version == old:
+                    board.version = new
+                else:
+                    del self.boards[key]
+            self.pending.update(title_ids)
+
+
+leaderboards = Leaderboards()
+
+
+def schedule_update(*title_ids, boards=()):
+    """ Отмечает произведения изменёнными после коммита транзакции, чтобы
+    рейтинг не прочитал незакоммиченные данные. `boards` — рейтинги,
+    из которых произведения могли выбыть этой транзакцией."""
+    transaction.on_commit(lambda: leaderboards.apply(title_ids, boards))
+
+
+def schedule_reset():
+    """ Строит все рейтинги заново после коммита: для изменений, по
+    которым нельзя сказать, из каких рейтингов выбыли произведения."""
+    transaction.on_commit(lambda: bump_version(LEADERBOARD_VERSION))
@@ -0,0 +1,299 @@
+import hashlib
+import json
+from collections import OrderedDict
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+from .versions import bump_version, get_versions
+
+
+def count_version_name(model):
+    return f'count:{model._meta.label_lower}'
+
+
+def text_count_version_name(model):
+    return f'count:{model._meta.label_lower}:text'
+
+
+def bump_count_version(model):
+    """ Инвалидирует все закешированные точные счётчики модели: при
+    добавлении и удалении записей."""
+    bump_version(count_version_name(model))
+
+
+def bump_text_count_version(model):
+    """ Инвалидирует счётчики, зависящие от текста записей (поиск): при
+    его редактировании."""
+    bump_version(text_count_version_name(model))
+
+
+def estimate_count(queryset):
+    """ Оценка числа строк из плана запроса PostgreSQL. На остальных
+    бэкендах планировщик не отдаёт оценку, возвращается None."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class CountedPaginator(Paginator):
+    """ Paginator с заранее известным (возможно, приблизительным)
+    числом объектов. Для приблизительного числа граница последней
+    страницы не проверяется: страница пуста, только если пуст срез."""
+
+    def __init__(self, object_list, per_page, count, estimated=False,
+                 **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.__dict__['count'] = count
+        self.estimated = estimated
+
+    def page(self, number):
+        if not self.estimated:
+            return super().page(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        bottom = (number - 1) * self.per_page
+        object_list = self.object_list[bottom:bottom + self.per_page]
+        if number > 1 and not object_list:
+            raise EmptyPage('That page contains no results')
+        return self._get_page(object_list, number, self)
+
+
+class SelectablePagination(PageNumberPagination):
+    """
+    Постраничная пагинация с возможностью переключиться на курсорную
+    (keyset) для отдельного запроса: `?pagination=cursor` или переданный
+    `?cursor=`. Курсорная пагинация не выполняет COUNT и OFFSET, поэтому
+    время получения страницы не зависит от её глубины.
+    """
+    cursor_pagination_class = None
+    mode_query_param = 'pagination'
+
+    def __init__(self):
+        self.cursor_paginator = None
+
+    def use_cursor(self, request):
+        if self.cursor_pagination_class is None:
+            return False
+        params = request.query_params
+        return (
+            params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_pagination_class.cursor_query_param in params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class CachedCountPagination(SelectablePagination):
+    """
+    Постраничная пагинация с кешированием `count` по эндпоинту и набору
+    фильтров. Точные счётчики сбрасываются при добавлении и удалении
+    записей (см. `bump_count_version`), счётчики поиска — ещё и при
+    редактировании текста (`bump_text_count_version`). Если строк больше порога
+    PAGINATION_ESTIMATED_COUNT_THRESHOLD и бэкенд умеет оценивать число
+    строк, отдаётся оценка, которая живёт в кеше по таймауту, а в ответе
+    выставляется `count_estimated`. Иначе считается и кешируется точное
+    значение.
+    """
+    ignored_query_params = ('page', 'pagination', 'cursor')
+    # Параметры, при которых число строк зависит от текста записей.
+    text_query_params = ('search',)
+
+    def get_count_key(self, request):
+        params = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            if key not in self.ignored_query_params
+            for value in values
+        )
+        raw = f'{request.path}?{params}'
+        return hashlib.md5(raw.encode()).hexdigest()
+
+    def get_count(self, queryset, request):
+        label = queryset.model._meta.label_lower
+        names = [count_version_name(queryset.model)]
+        if any(param in request.query_params
+               for param in self.text_query_params):
+            names.append(text_count_version_name(queryset.model))
+        version = ':'.join(str(version) for version in get_versions(*names))
+        suffix = self.get_count_key(request)
+        exact_key = f'pagination:count:{label}:{version}:{suffix}'
+        estimated_key = f'pagination:estimated-count:{label}:{suffix}'
+        cached = cache.get_many([exact_key, estimated_key])
+        if exact_key in cached:
+            return cached[exact_key], False
+        if estimated_key in cached:
+            return cached[estimated_key], True
+
+        threshold = settings.PAGINATION_ESTIMATED_COUNT_THRESHOLD
+        bounded = queryset.order_by()[:threshold + 1].count()
+        if bounded <= threshold:
+            cache.set(
+                exact_key, bounded, settings.PAGINATION_COUNT_CACHE_TIMEOUT
+            )
+            return bounded, False
+        estimate = estimate_count(queryset)
+        if estimate is None:
+            count = queryset.count()
+            cache.set(
+                exact_key, count, settings.PAGINATION_COUNT_CACHE_TIMEOUT
+            )
+            return count, False
+        count = max(estimate, bounded)
+        cache.set(
+            estimated_key,
+            count,
+            settings.PAGINATION_ESTIMATED_COUNT_CACHE_TIMEOUT
+        )
+        return count, True
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_estimated = False
+        if not self.use_cursor(request):
+            count, self.count_estimated = self.get_count(queryset, request)
+            self.django_paginator_class = partial(
+                CountedPaginator, count=count, estimated=self.count_estimated
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('count', self.page.paginator.count),
+            ('count_estimated', self.count_estimated),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+
+class TitleCursorPagination(CursorPagination):
+    """ Курсор по первичному ключу произведения."""
+    ordering = 'id'
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Курсор по всем полям `ordering` (последнее поле — уникальное).
+    Штатный CursorPagination хранит в курсоре только первое поле, и при
+    совпадающих значениях (одинаковый pub_date) переходит к OFFSET от
+    позиции. Здесь позиция — значения всех полей последней записи, а
+    следующая страница выбирается условием `(pub_date, id) < (p, i)`
+    по индексу, без OFFSET.
+    """
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = [
+            instance[field.lstrip('-')] if isinstance(instance, dict)
+            else getattr(instance, field.lstrip('-'))
+            for field in ordering
+        ]
+        return json.dumps([str(value) for value in values])
+
+    def get_position_filter(self, ordering, position):
+        """ Условие «строго после позиции» в порядке `ordering`."""
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+        condition = Q()
+        equal = {}
+        for field, value in zip(ordering, values):
+            attr = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{attr}__{lookup}': value})
+            equal[attr] = value
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            offset, reverse, current_position = 0, False, None
+        else:
+            offset, reverse, current_position = self.cursor
+
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(
+                field[1:] if field.startswith('-') else f'-{field}'
+                for field in ordering
+            )
+        queryset = queryset.order_by(*ordering)
+        if current_position is not None:
+            queryset = queryset.filter(
+                self.get_position_filter(ordering, current_position)
+            )
+
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_following_position = len(results) > len(self.page)
+        following_position = (
+            self._get_position_from_instance(results[-1], self.ordering)
+            if has_following_position else None
+        )
+        has_current_position = current_position is not None or offset > 0
+        if reverse:
+            self.page.reverse()
+            self.has_next = has_current_position
+            self.has_previous = has_following_position
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = has_current_position
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+
+class PubDateCursorPagination(KeysetCursorPagination):
+    """ Курсор по (pub_date, id) для отзывов и комментариев,
+    от новых к старым."""
+    ordering = ('-pub_date', '-id')
+
+
+class TitlePagination(SelectablePagination):
+    cursor_pagination_class = TitleCursorPagination
+
+
+class PubDatePagination(CachedCountPagination):
+    cursor_pagination_class = PubDateCursorPagination
@@ -32,9 +32,12 @@ class IsAuthorAdminModerOrReadOnly(permissions.IsAuthenticatedOrReadOnly):
     записи пользователь должен быть авторизован.
     Редактировать или удалять записи может только их автор или
     админ с модератором.
+    Автор сравнивается по author_id, роль берётся из пользователя
+    запроса (утверждений JWT), поэтому проверка не читает из БД ни
+    автора записи, ни текущего пользователя.
     """
     def has_object_permission(self, request, view, obj):
-        if view.action == 'retrieve' or obj.author == request.user:
+        if view.action == 'retrieve' or obj.author_id == request.user.pk:
             return True
         if request.user.is_admin() or request.user.is_moderator():
             return True
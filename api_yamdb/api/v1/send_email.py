@@ -1,10 +1,10 @@
-from django.core.mail import send_mail
-from django.conf import settings
+from users.outbox import enqueue_email
 
 
 def send_confirmation_code(user, confirmation_code):
     """
-    Функция отправляет код подтверждения на электронную почту пользователя.
+    Функция ставит письмо с кодом подтверждения в очередь на отправку
+    на электронную почту пользователя (см. users/outbox.py).
     """
     subject = "You're signed up on YaMDB!"
     message = """
@@ -12,7 +12,5 @@ def send_confirmation_code(user, confirmation_code):
         Your confirmation code to receive a token is: {1}
         Note: it will expire in 1 day.
     """.format(user.username, confirmation_code)
-    from_email = settings.DEFAULT_FROM_EMAIL
-    recepient_list = [user.email]
 
-    send_mail(subject, message, from_email, recepient_list)
+    enqueue_email(subject, message, user.email)
@@ -1,14 +1,26 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
+from django.db import IntegrityError
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 from rest_framework_simplejwt.serializers import TokenObtainSerializer
-from rest_framework_simplejwt.tokens import AccessToken
 from reviews.models import Category, Comment, Genre, Review, Title
 
+from .authentication import RoleAccessToken
+from .autocomplete import KINDS
+from .dimensions import category_cache, genre_cache
+from .sparse import SparseFieldsSerializerMixin
+
 User = get_user_model()
 
+DUPLICATE_REVIEW_MESSAGE = (
+    'Пользователь может добавить лишь один отзыв на произведение.'
+)
+
 
 class UserSerializer(serializers.ModelSerializer):
     """
@@ -43,9 +55,12 @@ class SignUpSerializer(UserSerializer):
     Сериализатор для регистрации и получения кода потдверждения.
     Поля email и username обязательны.
     Валидация:
-    - Если пользователь уже существует, данные считаются валидными;
+    - Если пользователь уже существует, данные считаются валидными,
+    а сам пользователь сохраняется в `user`;
     - Если в БД есть пользователи с переданными email или username,
     вызывается ошибка.
+    Все случаи разбираются по одному запросу: username и email
+    уникальны, поэтому совпасть может не больше двух пользователей.
     """
     email = serializers.EmailField(max_length=254, required=True)
     username = serializers.RegexField(regex=r'^[\w.@+-]+$', max_length=150)
@@ -57,13 +72,19 @@ class SignUpSerializer(UserSerializer):
     def validate(self, data):
         username = data['username']
         email = data['email']
-        if User.objects.filter(username=username, email=email).exists():
-            return data
-        if User.objects.filter(username=username).exists():
+        self.user = None
+        matches = list(User.objects.filter(
+            Q(username=username) | Q(email=email)
+        ).order_by()[:2])
+        for user in matches:
+            if user.username == username and user.email == email:
+                self.user = user
+                return data
+        if any(user.username == username for user in matches):
             raise serializers.ValidationError(
                 "Пользователь с таким username уже существует."
             )
-        if User.objects.filter(email=email).exists():
+        if matches:
             raise serializers.ValidationError(
                 "Пользователь с таким email уже существует."
             )
@@ -90,7 +111,7 @@ class MyTokenObtainSerializer(TokenObtainSerializer):
     2) проверка существования пользователя с полученным username;
     3) проверка переданного кода подтверждения для этого пользователя.
     """
-    token_class = AccessToken
+    token_class = RoleAccessToken
     username = serializers.RegexField(regex=r'^[\w.@+-]+$', max_length=150)
     confirmation_code = serializers.CharField()
 
@@ -127,11 +148,71 @@ class CategorySerializer(serializers.ModelSerializer):
         model = Category
 
 
-class TitleSerializer(serializers.ModelSerializer):
-    """ Сериалайзер произведения для чтения, вкл создание поля рейтинга."""
-    genre = GenreSerializer(many=True, read_only=True)
-    category = CategorySerializer(read_only=True)
+class CachedDimensionField(serializers.Field):
+    """ Поле только для чтения: по id (или списку id) жанра/категории
+    берёт объект из кеша в памяти процесса и сериализует его."""
+
+    def __init__(self, dimension_cache, serializer_class, **kwargs):
+        kwargs['read_only'] = True
+        self.dimension_cache = dimension_cache
+        self.serializer_class = serializer_class
+        super().__init__(**kwargs)
+
+    def serialize(self, pk):
+        obj = self.dimension_cache.get(pk)
+        return None if obj is None else self.serializer_class(obj).data
+
+    def to_representation(self, value):
+        if isinstance(value, list):
+            return [self.serialize(pk) for pk in value]
+        return self.serialize(value)
+
+
+class CachedSlugRelatedField(serializers.SlugRelatedField):
+    """ SlugRelatedField, который ищет объект сначала в кеше в памяти
+    процесса и обращается к БД только при промахе."""
+
+    def __init__(self, dimension_cache, **kwargs):
+        self.dimension_cache = dimension_cache
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        obj = self.dimension_cache.get_by_slug(data)
+        if obj is not None:
+            return obj
+        return super().to_internal_value(data)
+
+
+class TitleScoresSerializer(serializers.ModelSerializer):
+    """ Распределение оценок произведения и производные от него
+    количество, среднее и медиана."""
+    count = serializers.IntegerField(source='rating_count')
+    mean = serializers.FloatField(source='rating')
+    median = serializers.FloatField(source='score_median')
+    histogram = serializers.DictField(
+        source='score_histogram', child=serializers.IntegerField()
+    )
+
+    class Meta:
+        fields = ('count', 'mean', 'median', 'histogram')
+        model = Title
+
+
+class TitleSerializer(SparseFieldsSerializerMixin,
+                      serializers.ModelSerializer):
+    """ Сериалайзер произведения для чтения, вкл создание поля рейтинга.
+    Жанры и категория берутся из кеша по id, без JOIN с их таблицами.
+    Распределение оценок выводится по ?expand=scores."""
+    genre = CachedDimensionField(
+        genre_cache, GenreSerializer, source='genre_ids'
+    )
+    category = CachedDimensionField(
+        category_cache, CategorySerializer, source='category_id'
+    )
     rating = serializers.IntegerField(read_only=True)
+    scores = TitleScoresSerializer(source='*', read_only=True)
+
+    expandable_fields = ('scores',)
 
     class Meta:
         fields = (
@@ -141,23 +222,44 @@ class TitleSerializer(serializers.ModelSerializer):
             'rating',
             'description',
             'genre',
-            'category'
+            'category',
+            'scores'
         )
         model = Title
 
 
+class LeaderboardTitleSerializer(TitleSerializer):
+    """ Произведение в рейтинге лучших вместе с байесовским рейтингом,
+    по которому оно ранжировано."""
+    weighted_rating = serializers.FloatField(read_only=True)
+
+    class Meta(TitleSerializer.Meta):
+        fields = TitleSerializer.Meta.fields + ('weighted_rating',)
+
+
+class LeaderboardSerializer(serializers.Serializer):
+    """ Параметры запроса рейтинга лучших произведений."""
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.LEADERBOARD_SIZE,
+        default=settings.LEADERBOARD_DEFAULT_LIMIT
+    )
+
+
 class WriteTitleSerializer(TitleSerializer):
     """ Сериалайзер для записи произведения. Наследуется от TitleSerializer
     для десериализации на чтение(вкл поле рейтинга).
     Genre, category пишутся по slug.
     Валидация даты произведения."""
-    genre = serializers.SlugRelatedField(
+    genre = CachedSlugRelatedField(
+        genre_cache,
         queryset=Genre.objects.all(),
         slug_field='slug',
         many=True
     )
 
-    category = serializers.SlugRelatedField(
+    category = CachedSlugRelatedField(
+        category_cache,
         queryset=Category.objects.all(),
         slug_field='slug'
     )
@@ -179,43 +281,120 @@ class WriteTitleSerializer(TitleSerializer):
         return serializer.data
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewTitleSerializer(serializers.ModelSerializer):
+    """ Произведение в отзыве по ?expand=title."""
+
+    class Meta:
+        fields = ('id', 'name', 'year')
+        model = Title
+
+
+class ReviewSerializer(SparseFieldsSerializerMixin,
+                       serializers.ModelSerializer):
     """ Сериализатор для чтения и редакции отзывов.
-    Валидация: 1 отзыв 1 автора на 1 произведение.
-    Валидация: оценки произведению 0-10."""
+    Валидация: 1 отзыв 1 автора на 1 произведение — обеспечивается
+    ограничением unique_author_title в БД, нарушение превращается в 400.
+    Валидация: оценки произведению 1-10."""
     author = serializers.SlugRelatedField(
         default=serializers.CurrentUserDefault(),
         slug_field='username',
         read_only=True
     )
-    score = serializers.IntegerField(max_value=10, min_value=0)
+    score = serializers.IntegerField(max_value=10, min_value=1)
+    title = ReviewTitleSerializer(read_only=True)
+
+    expandable_fields = ('title',)
 
     class Meta:
-        fields = ('id', 'text', 'author', 'pub_date', 'score')
+        fields = (
+            'id', 'text', 'author', 'pub_date', 'score', 'comment_count',
+            'title'
+        )
         model = Review
 
-    def validate(self, data):
-        request = self.context['request']
-        if request.method == 'PATCH':
-            return data
-        kwargs = request.parser_context['kwargs']
-        title_id = kwargs['title_id']
-
-        if Review.objects.filter(author=request.user, title=title_id).exists():
+    def create(self, validated_data):
+        try:
+            return super().create(validated_data)
+        except IntegrityError:
+            duplicate = Review.objects.filter(
+                author=validated_data['author'],
+                title_id=validated_data['title_id']
+            ).exists()
+            if not duplicate:
+                raise
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [DUPLICATE_REVIEW_MESSAGE]
+            })
+
+
+class ExportSerializer(serializers.Serializer):
+    """ Параметры выгрузки: только записи с id больше `after` и (для
+    отзывов и комментариев) добавленные позже `since`."""
+    after = serializers.IntegerField(min_value=0, required=False)
+    since = serializers.DateTimeField(required=False)
+
+    def validate_since(self, value):
+        if not self.context['has_pub_date']:
             raise serializers.ValidationError(
-                'Пользователь может добавить лишь один отзыв на произведение.'
+                'У произведений нет даты добавления, используйте after.'
             )
-        return data
+        return value
+
+
+class ReviewBatchItemSerializer(serializers.ModelSerializer):
+    """ Элемент пакетной отправки отзывов: произведение, текст и оценка.
+    Существование произведений и повторные отзывы проверяются для всего
+    пакета сразу во вьюхе."""
+    title_id = serializers.IntegerField(min_value=1)
+    score = serializers.IntegerField(max_value=10, min_value=1)
+
+    class Meta:
+        fields = ('title_id', 'text', 'score')
+        model = Review
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class ReviewBatchSerializer(serializers.Serializer):
+    """ Пакет отзывов. Элементы валидируются по отдельности
+    ReviewBatchItemSerializer, чтобы вернуть результат для каждого."""
+    reviews = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=settings.REVIEW_BATCH_MAX_SIZE
+    )
+
+
+class CommentReviewSerializer(serializers.ModelSerializer):
+    """ Отзыв в комментарии по ?expand=review."""
+
+    class Meta:
+        fields = ('id', 'score', 'pub_date')
+        model = Review
+
+
+class CommentSerializer(SparseFieldsSerializerMixin,
+                        serializers.ModelSerializer):
     """ Сериализаторя для комментариев к отзывам."""
     author = serializers.SlugRelatedField(
         default=serializers.CurrentUserDefault(),
         slug_field='username',
         read_only=True
     )
+    review = CommentReviewSerializer(read_only=True)
+
+    expandable_fields = ('review',)
 
     class Meta:
-        fields = ('id', 'text', 'author', 'pub_date')
+        fields = ('id', 'text', 'author', 'pub_date', 'review')
         model = Comment
+
+
+class AutocompleteSerializer(serializers.Serializer):
+    """ Параметры запроса автодополнения: префикс, число подсказок
+    и виды объектов (`?type=title&type=genre`)."""
+    q = serializers.CharField(max_length=256)
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.AUTOCOMPLETE_MAX_LIMIT,
+        default=settings.AUTOCOMPLETE_DEFAULT_LIMIT
+    )
+    type = serializers.MultipleChoiceField(choices=list(KINDS), required=False)
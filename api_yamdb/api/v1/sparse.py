@@ -0,0 +1,100 @@
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+class SparseFieldsSerializerMixin:
+    """
+    Сериализатор выводит только поля из context['fields'], если они
+    переданы. Без них выводятся все поля, кроме перечисленных в
+    `expandable_fields` — те добавляются только по ?expand=.
+    """
+    expandable_fields = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.context.get('fields')
+        for name in list(self.fields):
+            if selected is None:
+                drop = name in self.expandable_fields
+            else:
+                drop = name not in selected
+            if drop:
+                self.fields.pop(name)
+
+
+def parse_list(value):
+    return [item for item in value.split(',') if item] if value else []
+
+
+class SparseFieldsMixin:
+    """
+    ?fields=id,name — только перечисленные поля ответа, ?expand=scores —
+    дополнительные поля, которых нет в ответе по умолчанию.
+    Запрос к БД следует за полями: `sparse_fields` и `expandable_fields`
+    описывают для каждого поля ответа нужные колонки, select_related и
+    prefetch_related, поэтому ненужные колонки (в том числе длинные
+    тексты) не читаются, а JOIN и prefetch для незапрошенных связей
+    не выполняются. Для записи набор полей не меняется.
+    """
+    # Поле ответа -> (колонки для only(), select_related, prefetch_related).
+    sparse_fields = {}
+    expandable_fields = {}
+    # Колонки, которые читаются всегда, например поля сортировки
+    # курсорной пагинации.
+    sparse_base_columns = ()
+
+    def get_selected_fields(self):
+        """ Выбранные поля ответа в порядке `sparse_fields` или None для
+        запросов на запись."""
+        if self.request.method not in SAFE_METHODS:
+            return None
+        if hasattr(self, '_selected_fields'):
+            return self._selected_fields
+        params = self.request.query_params
+        requested = parse_list(params.get('fields'))
+        expand = parse_list(params.get('expand'))
+        errors = {}
+        unknown = set(requested) - set(self.sparse_fields)
+        if unknown:
+            errors['fields'] = [
+                f'Неизвестные поля: {", ".join(sorted(unknown))}.'
+            ]
+        unknown = set(expand) - set(self.expandable_fields)
+        if unknown:
+            errors['expand'] = [
+                f'Неизвестные связи: {", ".join(sorted(unknown))}.'
+            ]
+        if errors:
+            raise serializers.ValidationError(errors)
+        self._selected_fields = [
+            name for name in self.sparse_fields
+            if not requested or name in requested
+        ] + [name for name in self.expandable_fields if name in expand]
+        return self._selected_fields
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        selected = self.get_selected_fields()
+        if selected is not None:
+            context['fields'] = selected
+        return context
+
+    def sparse_queryset(self, queryset):
+        """ Добавляет к queryset колонки и связи выбранных полей. Для
+        записи читаются все колонки и связи полей по умолчанию."""
+        selected = self.get_selected_fields()
+        specs = {**self.sparse_fields, **self.expandable_fields}
+        columns = {'pk', *self.sparse_base_columns}
+        related, prefetch = set(), set()
+        for name in selected or self.sparse_fields:
+            spec_columns, spec_related, spec_prefetch = specs[name]
+            columns.update(spec_columns)
+            related.update(spec_related)
+            prefetch.update(spec_prefetch)
+        if related:
+            queryset = queryset.select_related(*sorted(related))
+        if prefetch:
+            queryset = queryset.prefetch_related(*sorted(prefetch))
+        if selected is None:
+            return queryset
+        return queryset.only(*sorted(columns))
@@ -2,9 +2,13 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (
+    AutocompleteView,
     CategoryViewSet,
     CommentViewSet,
+    ExportView,
     GenreViewSet,
+    LeaderboardView,
+    ReviewBatchView,
     ReviewViewSet,
     SignUpView,
     TitleViewSet,
@@ -46,5 +50,21 @@ v1_router.register(
 urlpatterns = [
     path('', include(v1_router.urls)),
     path('auth/signup/', SignUpView.as_view(), name='signup'),
-    path('auth/token/', TokenObtainView.as_view(), name='token_create')
+    path('auth/token/', TokenObtainView.as_view(), name='token_create'),
+    path('autocomplete/', AutocompleteView.as_view(), name='autocomplete'),
+    path('reviews/batch/', ReviewBatchView.as_view(), name='review_batch'),
+    path('export/<slug:kind>/', ExportView.as_view(), name='export'),
+    path('leaderboards/', LeaderboardView.as_view(), name='leaderboard'),
+    path(
+        'leaderboards/genres/<slug:slug>/',
+        LeaderboardView.as_view(),
+        {'kind': 'genre'},
+        name='genre_leaderboard'
+    ),
+    path(
+        'leaderboards/categories/<slug:slug>/',
+        LeaderboardView.as_view(),
+        {'kind': 'category'},
+        name='category_leaderboard'
+    )
 ]
@@ -0,0 +1,65 @@
+import time
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+VERSION_KEY = 'version:{name}'
+MODIFIED_KEY = 'modified:{name}'
+
+
+def get_version(name):
+    """
+    Текущая версия именованного набора данных. Версия хранится в кеше
+    без таймаута; если ключ пропал, он заводится заново от текущего
+    времени, чтобы не совпасть с версиями уже закешированных записей.
+    """
+    key = VERSION_KEY.format(name=name)
+    version = cache.get(key)
+    if version is None:
+        if cache.add(key, time.time_ns(), None):
+            cache.set(MODIFIED_KEY.format(name=name), time.time(), None)
+        version = cache.get(key)
+    return version
+
+
+def get_versions(*names):
+    """ Версии нескольких наборов данных одним обращением к кешу."""
+    keys = {name: VERSION_KEY.format(name=name) for name in names}
+    found = cache.get_many(keys.values())
+    return tuple(
+        found[keys[name]] if keys[name] in found else get_version(name)
+        for name in names
+    )
+
+
+def get_last_modified(*names):
+    """ Время последнего изменения любого из наборов данных
+    (unix timestamp) или None, если оно неизвестно."""
+    keys = [MODIFIED_KEY.format(name=name) for name in names]
+    found = cache.get_many(keys)
+    if len(found) < len(keys):
+        return None
+    return max(found.values())
+
+
+def bump_version(*names):
+    """ Увеличивает версии, делая недействительными все записи кеша,
+    в ключ которых они входят. Внутри транзакции версии увеличиваются
+    ещё раз после коммита: иначе параллельный запрос успел бы закешировать
+    старые данные под новой версией."""
+    _bump(names)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _bump(names))
+
+
+def _bump(names):
+    now = time.time()
+    for name in names:
+        key = VERSION_KEY.format(name=name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+    cache.set_many(
+        {MODIFIED_KEY.format(name=name): now for name in names}, None
+    )
@@ -1,6 +1,7 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
-from django.db.models import Avg
+from django.db import IntegrityError, transaction
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, status, views, viewsets
@@ -8,24 +9,58 @@ from rest_framework.decorators import action
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework_simplejwt.views import TokenObtainPairView
-from reviews.models import Category, Genre, Review, Title
+from reviews.models import (
+    SCORE_COUNT_FIELDS,
+    Category,
+    Comment,
+    Genre,
+    Review,
+    Title
+)
 
-from ..viewsets import CreateDestroyListModelViewSet
-from .filters import TitleFilter
+from ..viewsets import CreateDestroyListModelViewSet, ParentLookupMixin
+from .autocomplete import KINDS, autocomplete_index
+from .cache import CATALOG_VERSION, TitleCacheMixin, title_version_name
+from .conditional import (
+    CATEGORIES_VERSION,
+    GENRES_VERSION,
+    USERNAMES_VERSION,
+    USERS_VERSION,
+    ConditionalGetMixin,
+    ConditionalListMixin,
+    comments_version_name,
+    reviews_version_name
+)
+from .dimensions import category_cache, genre_cache
+from .export import ENCODERS, EXPORTS, CSVRenderer, NDJSONRenderer
+from .filters import CommentFilter, ReviewFilter, TitleFilter
+from .idempotency import IdempotentCreateMixin
+from .leaderboards import GLOBAL_BOARD, leaderboards, version_names
+from .pagination import PubDatePagination, TitlePagination
 from .permissions import (
     IsAdmin,
     IsAdminOrReadOnly,
     IsAuthorAdminModerOrReadOnly
 )
 from .send_email import send_confirmation_code
+from .sparse import SparseFieldsMixin
 from .serializers import (
+    DUPLICATE_REVIEW_MESSAGE,
+    AutocompleteSerializer,
     CategorySerializer,
     CommentSerializer,
+    ExportSerializer,
     GenreSerializer,
+    LeaderboardSerializer,
+    LeaderboardTitleSerializer,
     MyTokenObtainSerializer,
+    ReviewBatchItemSerializer,
+    ReviewBatchSerializer,
     ReviewSerializer,
     SignUpSerializer,
+    TitleScoresSerializer,
     TitleSerializer,
     UserProfileSerializer,
     UserSerializer,
@@ -39,22 +74,137 @@ class SignUpView(views.APIView):
     """
     Вью-класс для самостоятельной регистрации нового пользователя
     и для получения кода подтверждения для пользователя,
-    зарегистрированного админом.
+    зарегистрированного админом. Существующий пользователь находится
+    при валидации, новый создаётся без повторной проверки.
     """
     permission_classes = [AllowAny]
 
     def post(self, request):
         serializer = SignUpSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user, created = User.objects.get_or_create(
-            username=serializer.validated_data['username'],
-            email=serializer.validated_data['email']
-        )
+        user = serializer.user or self.create_user(request, serializer)
         confirmation_code = default_token_generator.make_token(user=user)
         send_confirmation_code(user, confirmation_code)
 
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    def create_user(self, request, serializer):
+        try:
+            with transaction.atomic():
+                return User.objects.create(
+                    username=serializer.validated_data['username'],
+                    email=serializer.validated_data['email']
+                )
+        except IntegrityError:
+            # Пользователя успела создать параллельная регистрация:
+            # проверяем данные заново.
+            serializer = SignUpSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            if serializer.user is None:
+                raise
+            return serializer.user
+
+
+class AutocompleteView(views.APIView):
+    """
+    Подсказки по началу названия произведений, жанров и категорий.
+    Отдаются из индекса в памяти процесса без запросов к БД.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        serializer = AutocompleteSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        results = autocomplete_index.lookup(
+            params['q'], params['limit'], params.get('type') or KINDS
+        )
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+
+class LeaderboardView(ConditionalListMixin, views.APIView):
+    """
+    Лучшие произведения по байесовскому рейтингу: общий рейтинг, рейтинг
+    жанра или категории (kind и slug из URL). Порядок берётся из
+    материализованных рейтингов (см. leaderboards.py), сами произведения
+    читаются по pk двумя запросами.
+    """
+    permission_classes = [AllowAny]
+    dimension_caches = {'genre': genre_cache, 'category': category_cache}
+
+    def get_version_names(self):
+        board = self.get_board(
+            self.kwargs.get('kind'), self.kwargs.get('slug')
+        )
+        # Вместо версии всего каталога: названия жанров и категорий
+        # выводятся в ответе, остальные изменения произведений рейтинга
+        # меняют его версию.
+        return (*version_names(board), GENRES_VERSION, CATEGORIES_VERSION)
+
+    def get(self, request, kind=None, slug=None):
+        return self.conditional_response(
+            self.get_leaderboard, request, kind, slug
+        )
+
+    def get_board(self, kind, slug):
+        if kind is None:
+            return GLOBAL_BOARD
+        obj = self.dimension_caches[kind].get_by_slug(slug)
+        if obj is None:
+            raise Http404
+        return (kind, obj.pk)
+
+    def get_leaderboard(self, request, kind, slug):
+        board = self.get_board(kind, slug)
+        serializer = LeaderboardSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        ranking = leaderboards.top(board, serializer.validated_data['limit'])
+        titles = Title.objects.prefetch_related('genretitle_set').in_bulk(
+            [pk for pk, _ in ranking]
+        )
+        results = []
+        for pk, weighted_rating in ranking:
+            if pk in titles:
+                titles[pk].weighted_rating = weighted_rating
+                results.append(titles[pk])
+        return Response(
+            {'results': LeaderboardTitleSerializer(results, many=True).data},
+            status=status.HTTP_200_OK
+        )
+
+
+class ExportView(views.APIView):
+    """
+    Полная выгрузка произведений, отзывов или комментариев для
+    администраторов: NDJSON (по умолчанию) или CSV (`?format=csv` или
+    заголовок Accept). Ответ отдаётся потоком, строки читаются из БД
+    пачками по id, поэтому память не зависит от размера таблицы.
+    Для инкрементальной выгрузки — `?after=<последний id>` и, для отзывов
+    и комментариев, `?since=<дата>`. Оба параметра выбирают только новые
+    записи: изменения уже выгруженных записей в них не попадают.
+    """
+    permission_classes = [IsAdmin]
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+
+    def get(self, request, kind):
+        if kind not in EXPORTS:
+            raise Http404
+        fields, rows, has_pub_date = EXPORTS[kind]
+        params = ExportSerializer(
+            data=request.query_params,
+            context={'has_pub_date': has_pub_date}
+        )
+        params.is_valid(raise_exception=True)
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            ENCODERS[renderer.format](fields, rows(**params.validated_data)),
+            content_type=f'{renderer.media_type}; charset=utf-8'
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{kind}.{renderer.format}"'
+        )
+        return response
+
 
 class TokenObtainView(TokenObtainPairView):
     """
@@ -64,7 +214,7 @@ class TokenObtainView(TokenObtainPairView):
     permission_classes = [AllowAny]
 
 
-class UsersViewSet(viewsets.ModelViewSet):
+class UsersViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     Вьюсет модели User. Метод PUT недоступен.
     """
@@ -76,8 +226,11 @@ class UsersViewSet(viewsets.ModelViewSet):
     filter_backends = (filters.SearchFilter,)
     search_fields = ('username',)
 
+    def get_version_names(self):
+        return (USERS_VERSION,)
+
     def get_instance(self):
-        return self.request.user
+        return self.request.user.full_user
 
     @action(
         detail=False,
@@ -98,21 +251,61 @@ class UsersViewSet(viewsets.ModelViewSet):
         return super().update(request, *args, **kwargs)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    """ Вьюсет модели Title, сериализатор подбирается по типу запроса."""
-    queryset = Title.objects.annotate(rating=Avg('reviews__score'))
+class TitleViewSet(
+    ConditionalGetMixin,
+    TitleCacheMixin,
+    SparseFieldsMixin,
+    viewsets.ModelViewSet
+):
+    """ Вьюсет модели Title, сериализатор подбирается по типу запроса.
+    Связи с жанрами загружаются одним запросом на страницу, сами жанры и
+    категории берутся из кеша в памяти, так что число запросов не зависит
+    от размера страницы. Поддерживает ?fields= и ?expand=scores."""
+    queryset = Title.objects.all()
     permission_classes = [IsAdminOrReadOnly]
-    pagination_class = PageNumberPagination
+    pagination_class = TitlePagination
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
+    sparse_fields = {
+        'id': ((), (), ()),
+        'name': (('name',), (), ()),
+        'year': (('year',), (), ()),
+        'rating': (('rating',), (), ()),
+        'description': (('description',), (), ()),
+        'genre': ((), (), ('genretitle_set',)),
+        'category': (('category',), (), ()),
+    }
+    expandable_fields = {
+        'scores': (('rating', 'rating_count', *SCORE_COUNT_FIELDS), (), ()),
+    }
+
+    def get_queryset(self):
+        return self.sparse_queryset(super().get_queryset())
+
+    def get_version_names(self):
+        if self.action in ['retrieve', 'scores']:
+            return (title_version_name(self.kwargs['pk']),)
+        return (CATALOG_VERSION,)
 
     def get_serializer_class(self):
         if self.action in ['list', 'retrieve']:
             return TitleSerializer
+        if self.action == 'scores':
+            return TitleScoresSerializer
         return WriteTitleSerializer
 
+    @action(detail=True, methods=['get'])
+    def scores(self, request, pk=None):
+        """ Распределение оценок по хранимой гистограмме, без агрегации
+        по отзывам."""
+        return self.conditional_response(self.get_scores, request, pk)
 
-class CategoryViewSet(CreateDestroyListModelViewSet):
+    def get_scores(self, request, pk):
+        title = get_object_or_404(Title, pk=pk)
+        return Response(self.get_serializer(title).data)
+
+
+class CategoryViewSet(ConditionalListMixin, CreateDestroyListModelViewSet):
     """ Вьюсет модели Category."""
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
@@ -122,8 +315,11 @@ class CategoryViewSet(CreateDestroyListModelViewSet):
     filter_backends = (DjangoFilterBackend, filters.SearchFilter)
     search_fields = ('name',)
 
+    def get_version_names(self):
+        return (CATEGORIES_VERSION,)
 
-class GenreViewSet(CreateDestroyListModelViewSet):
+
+class GenreViewSet(ConditionalListMixin, CreateDestroyListModelViewSet):
     """ Вьюсет модели Genre."""
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
@@ -133,35 +329,209 @@ class GenreViewSet(CreateDestroyListModelViewSet):
     filter_backends = (DjangoFilterBackend, filters.SearchFilter)
     search_fields = ('name',)
 
+    def get_version_names(self):
+        return (GENRES_VERSION,)
+
 
-class ReviewViewSet(viewsets.ModelViewSet):
-    """ Вьюсет модели Review."""
+class ReviewViewSet(
+    ConditionalGetMixin,
+    IdempotentCreateMixin,
+    ParentLookupMixin,
+    SparseFieldsMixin,
+    viewsets.ModelViewSet
+):
+    """ Вьюсет модели Review. Страница отзывов загружается одним
+    запросом вместе с авторами, произведение отдельно не запрашивается,
+    число комментариев хранится в самом отзыве.
+    POST поддерживает заголовок Idempotency-Key, ?search= — поиск по
+    тексту отзывов произведения."""
     permission_classes = [IsAuthorAdminModerOrReadOnly]
     serializer_class = ReviewSerializer
+    pagination_class = PubDatePagination
+    filter_backends = (DjangoFilterBackend,)
+    filterset_class = ReviewFilter
+    sparse_fields = {
+        'id': ((), (), ()),
+        'text': (('text',), (), ()),
+        'author': (('author', 'author__username'), ('author',), ()),
+        'pub_date': (('pub_date',), (), ()),
+        'score': (('score',), (), ()),
+        'comment_count': (('comment_count',), (), ()),
+    }
+    expandable_fields = {
+        'title': (('title', 'title__name', 'title__year'), ('title',), ()),
+    }
+    sparse_base_columns = ('pub_date',)
+
+    def get_version_names(self):
+        title_id = self.kwargs['title_id']
+        return (
+            title_version_name(title_id),
+            reviews_version_name(title_id),
+            USERNAMES_VERSION
+        )
+
+    def get_parent_queryset(self):
+        return Title.objects.filter(pk=self.kwargs.get("title_id"))
 
     def get_queryset(self):
-        title = get_object_or_404(Title, pk=self.kwargs.get("title_id"))
-        return title.reviews.all()
+        return self.sparse_queryset(Review.objects.filter(
+            title_id=self.kwargs.get("title_id")
+        ))
 
     def perform_create(self, serializer):
-        title = get_object_or_404(Title, pk=self.kwargs.get("title_id"))
-        serializer.save(title=title, author=self.request.user)
+        if not self.get_parent_queryset().exists():
+            raise Http404
+        serializer.save(
+            title_id=self.kwargs.get("title_id"),
+            author=self.request.user.full_user
+        )
+
+
+class ReviewBatchView(views.APIView):
+    """
+    Пакетная отправка отзывов от имени текущего пользователя:
+    {"reviews": [{"title_id": 1, "text": "...", "score": 8}, ...]}.
+    Существование произведений и повторные отзывы проверяются для всего
+    пакета двумя запросами, отзывы создаются одним INSERT в одной
+    транзакции, рейтинг каждого произведения обновляется один раз.
+    В ответе — результат для каждого элемента в порядке запроса.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        batch = ReviewBatchSerializer(data=request.data)
+        batch.is_valid(raise_exception=True)
+        results = []
+        valid = {}
+        for index, item in enumerate(batch.validated_data['reviews']):
+            serializer = ReviewBatchItemSerializer(data=item)
+            if serializer.is_valid():
+                valid[index] = serializer.validated_data
+                results.append(None)
+            else:
+                results.append({
+                    'status': status.HTTP_400_BAD_REQUEST,
+                    'errors': serializer.errors
+                })
+        try:
+            self.create(self.check_batch(valid, results), results)
+        except IntegrityError:
+            # Параллельный запрос успел добавить отзыв на одно из
+            # произведений: проверяем пакет заново.
+            valid = {index: valid[index] for index in valid
+                     if results[index] is None}
+            self.create(self.check_batch(valid, results), results)
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+    def check_batch(self, valid, results):
+        """ Отбирает элементы, которые можно создать; для остальных
+        записывает ошибку в results."""
+        user = self.request.user.full_user
+        title_ids = {data['title_id'] for data in valid.values()}
+        existing = set(Title.objects.filter(
+            pk__in=title_ids
+        ).values_list('pk', flat=True))
+        reviewed = set(Review.objects.filter(
+            author=user, title_id__in=title_ids
+        ).values_list('title_id', flat=True))
 
+        accepted = {}
+        for index, data in valid.items():
+            title_id = data['title_id']
+            if title_id not in existing:
+                results[index] = {
+                    'status': status.HTTP_404_NOT_FOUND,
+                    'errors': {'title_id': ['Произведение не найдено.']}
+                }
+            elif title_id in reviewed:
+                results[index] = {
+                    'status': status.HTTP_400_BAD_REQUEST,
+                    'errors': {api_settings.NON_FIELD_ERRORS_KEY: [
+                        DUPLICATE_REVIEW_MESSAGE
+                    ]}
+                }
+            else:
+                reviewed.add(title_id)
+                accepted[index] = Review(author=user, **data)
+        return accepted
 
-class CommentViewSet(viewsets.ModelViewSet):
-    """ Вьюсет модели Comment."""
+    def create(self, accepted, results):
+        if not accepted:
+            return
+        user = self.request.user.full_user
+        Review.objects.bulk_create_with_ratings(list(accepted.values()))
+        # bulk_create на SQLite не возвращает id, поэтому созданные отзывы
+        # читаются одним запросом по (автор, произведение).
+        created = {
+            review.title_id: review
+            for review in Review.objects.filter(
+                author=user,
+                title_id__in=[item.title_id for item in accepted.values()]
+            )
+        }
+        for index, item in accepted.items():
+            review = created[item.title_id]
+            review.author = user
+            results[index] = {
+                'status': status.HTTP_201_CREATED,
+                'title_id': review.title_id,
+                'review': ReviewSerializer(review).data
+            }
+
+
+class CommentViewSet(
+    ConditionalGetMixin,
+    ParentLookupMixin,
+    SparseFieldsMixin,
+    viewsets.ModelViewSet
+):
+    """ Вьюсет модели Comment. Комментарии загружаются одним запросом
+    вместе с авторами; пара произведение/отзыв проверяется в том же
+    запросе, а отдельно — только для пустой страницы и при создании.
+    ?search= — поиск по тексту комментариев отзыва."""
     serializer_class = CommentSerializer
     permission_classes = [IsAuthorAdminModerOrReadOnly]
+    pagination_class = PubDatePagination
+    filter_backends = (DjangoFilterBackend,)
+    filterset_class = CommentFilter
+    sparse_fields = {
+        'id': ((), (), ()),
+        'text': (('text',), (), ()),
+        'author': (('author', 'author__username'), ('author',), ()),
+        'pub_date': (('pub_date',), (), ()),
+    }
+    expandable_fields = {
+        'review': (
+            ('review', 'review__score', 'review__pub_date'), ('review',), ()
+        ),
+    }
+    sparse_base_columns = ('pub_date',)
 
-    def get_queryset(self):
-        title_id = self.kwargs.get("title_id")
-        review = get_object_or_404(
-            Review,
+    def get_version_names(self):
+        names = (
+            comments_version_name(self.kwargs['review_id']),
+            USERNAMES_VERSION
+        )
+        if 'review' in (self.get_selected_fields() or ()):
+            # Оценка отзыва меняется вместе с версией произведения.
+            names += (title_version_name(self.kwargs['title_id']),)
+        return names
+
+    def get_parent_queryset(self):
+        return Review.objects.filter(
             pk=self.kwargs.get("review_id"),
-            title_id=title_id
+            title_id=self.kwargs.get("title_id")
         )
-        return review.comments.all()
+
+    def get_queryset(self):
+        return self.sparse_queryset(Comment.objects.filter(
+            review_id=self.kwargs.get("review_id"),
+            review__title_id=self.kwargs.get("title_id")
+        ))
 
     def perform_create(self, serializer):
-        review = get_object_or_404(Review, pk=self.kwargs.get("review_id"))
-        serializer.save(review=review, author=self.request.user)
+        review = self.get_parent_queryset().only('pk', 'title_id').first()
+        if review is None:
+            raise Http404
+        serializer.save(review=review, author=self.request.user.full_user)
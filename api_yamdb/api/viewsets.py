@@ -1,3 +1,4 @@
+from django.http import Http404
 from rest_framework import mixins, viewsets
 
 
@@ -13,3 +14,24 @@ class CreateDestroyListModelViewSet(
     Доступные методы: `create()`, `destroy()`, `list()`.
     """
     pass
+
+
+class ParentLookupMixin:
+    """
+    Для вложенных ресурсов (отзывы произведения, комментарии отзыва).
+    Список фильтруется по id родителя из URL без отдельного запроса
+    родителя: непустая страница сама подтверждает, что он существует.
+    Существование проверяется запросом только для пустой страницы,
+    чтобы вернуть 404 для несуществующего родителя.
+    """
+
+    def get_parent_queryset(self):
+        raise NotImplementedError(
+            'Определите get_parent_queryset() для вложенного ресурса.'
+        )
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if not page and not self.get_parent_queryset().exists():
+            raise Http404
+        return page
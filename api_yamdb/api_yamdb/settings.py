@@ -114,7 +114,7 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 5,
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.v1.authentication.RoleJWTAuthentication',
     ],
 
     'DEFAULT_PERMISSION_CLASSES': [
@@ -122,6 +122,57 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Cache versions invalidate per-process caches (genres, categories,
+# autocomplete) and cached responses. With several worker processes use a
+# shared backend such as Redis or Memcached.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Counts of paginated lists of reviews and comments are cached. Exact counts
+# are reset on writes, above the threshold an estimate from the PostgreSQL
+# planner is cached by timeout (other backends keep counting exactly).
+PAGINATION_COUNT_CACHE_TIMEOUT = 60 * 5
+PAGINATION_ESTIMATED_COUNT_THRESHOLD = 10000
+PAGINATION_ESTIMATED_COUNT_CACHE_TIMEOUT = 60 * 10
+
+# Serialized title list and detail responses. Entries are keyed by data
+# versions, so the timeout only bounds how long unused entries are kept.
+TITLES_CACHE_TIMEOUT = 60 * 60
+
+# Number of suggestions returned by /api/v1/autocomplete/.
+AUTOCOMPLETE_DEFAULT_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 20
+
+# Responses to POST requests with an Idempotency-Key header are replayed for
+# retries within this period. The lock covers a request still in progress.
+IDEMPOTENCY_KEY_TIMEOUT = 60 * 60 * 24
+IDEMPOTENCY_LOCK_TIMEOUT = 60
+
+# Maximum number of reviews in one POST to /api/v1/reviews/batch/.
+REVIEW_BATCH_MAX_SIZE = 100
+
+# Leaderboards (/api/v1/leaderboards/) keep the top LEADERBOARD_SIZE titles
+# ranked by Bayesian rating: the mean score is shrunk towards the catalog
+# mean as if every title had LEADERBOARD_MIN_VOTES extra average votes.
+# The catalog mean is refreshed at least every LEADERBOARD_PRIOR_TIMEOUT
+# seconds.
+LEADERBOARD_SIZE = 100
+LEADERBOARD_DEFAULT_LIMIT = 10
+LEADERBOARD_MIN_VOTES = 5
+LEADERBOARD_PRIOR_TIMEOUT = 5 * 60
+
+# Rows read per query by the streaming exports (/api/v1/export/<kind>/).
+EXPORT_CHUNK_SIZE = 2000
+
+# Users are cached in process memory for authentication, at most this many
+# and for at most USER_CACHE_TIMEOUT seconds. Role claims of access tokens
+# are trusted only with a cache shared between processes (not locmem).
+USER_CACHE_SIZE = 1000
+USER_CACHE_TIMEOUT = 60
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
@@ -136,3 +187,23 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 DOMAIN_NAME = 'yamdb.fake'
 DEFAULT_FROM_EMAIL = 'admin@' + DOMAIN_NAME
+
+# Confirmation emails go through the outbox table (users/outbox.py).
+# 'thread' sends them from a background thread of the web process,
+# 'command' leaves them to `manage.py send_outbox`, 'eager' sends them
+# right after the transaction commits.
+EMAIL_OUTBOX_WORKER = 'thread'
+EMAIL_OUTBOX_POLL_INTERVAL = 5
+# Emails sent over one mail server connection, and how long (seconds) the
+# background thread waits after a wakeup to collect a batch.
+EMAIL_OUTBOX_BATCH_SIZE = 50
+EMAIL_OUTBOX_FLUSH_INTERVAL = 0.5
+# Seconds a worker holds claimed emails before others may retry them.
+EMAIL_OUTBOX_LEASE = 60
+# Retry delay doubles after each failure, up to the maximum (seconds).
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 30
+EMAIL_OUTBOX_MAX_RETRY_DELAY = 60 * 60
+# Bodies are blanked once an email is sent or given up on; such rows are
+# deleted this many seconds after they were queued.
+EMAIL_OUTBOX_RETENTION = 60 * 60 * 24 * 7
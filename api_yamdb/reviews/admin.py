@@ -1,13 +1,20 @@
 from django.contrib import admin
 
 
-from .models import Title, Category, Genre, GenreTitle, Review, Comment
+from .models import (
+    SCORE_COUNT_FIELDS, Title, Category, Genre, GenreTitle, Review, Comment
+)
 
 
 @admin.register(Title)
 class TitleAdmin(admin.ModelAdmin):
     """Настройки отображения данных таблицы TITLES."""
-    list_display = ('pk', 'name', 'year', 'description', 'category')
+    list_display = (
+        'pk', 'name', 'year', 'description', 'category', 'rating'
+    )
+    readonly_fields = (
+        'rating_sum', 'rating_count', 'rating', *SCORE_COUNT_FIELDS
+    )
 
 
 admin.site.register(Category)
@@ -0,0 +1,28 @@
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+from reviews.search import (
+    create_text_indexes,
+    create_title_index,
+    fts_available,
+    rebuild_text_indexes,
+    rebuild_title_index
+)
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the full-text search index from the database."
+
+    def handle(self, *args, **options):
+        if not fts_available(connection.alias):
+            self.stdout.write(
+                'Full-text index is not used on this database backend.'
+            )
+            return
+        with transaction.atomic():
+            create_title_index(connection)
+            rebuild_title_index(connection)
+            create_text_indexes(connection)
+            rebuild_text_indexes(connection)
+        self.stdout.write(self.style.SUCCESS(
+            'Title, review and comment search indexes rebuilt.'
+        ))
@@ -0,0 +1,57 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from reviews.models import Comment, Review
+
+
+class Command(BaseCommand):
+    help = "Recomputes review comment counts from comments."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report drift, do not fix it.'
+        )
+
+    def handle(self, *args, **options):
+        actual = dict(
+            Comment.objects.order_by().values('review_id').annotate(
+                count=Count('id')
+            ).values_list('review_id', 'count')
+        )
+        drifted = []
+        reviews = Review.objects.only('id', 'comment_count')
+        for review in reviews.iterator():
+            count = actual.get(review.id, 0)
+            if review.comment_count != count:
+                drifted.append((review, count))
+
+        for review, count in drifted:
+            self.stdout.write(
+                f'Review {review.id}: stored {review.comment_count}, '
+                f'actual {count}'
+            )
+
+        if not options['dry_run']:
+            for review, _ in drifted:
+                self.fix_review(review.pk)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Checked {reviews.count()} reviews, '
+                f'{len(drifted)} with drift'
+                + (' (dry run).' if options['dry_run'] else ' fixed.')
+            )
+        )
+
+    def fix_review(self, review_id):
+        """ Пересчитывает счётчик одного отзыва под блокировкой его
+        строки, чтобы не затереть параллельно записанные комментарии."""
+        with transaction.atomic():
+            Review.objects.select_for_update().filter(pk=review_id).exists()
+            Review.objects.filter(pk=review_id).update(
+                comment_count=Comment.objects.filter(
+                    review_id=review_id
+                ).count()
+            )
@@ -0,0 +1,99 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from reviews.models import (
+    SCORE_COUNT_FIELDS,
+    SCORES,
+    Review,
+    Title,
+    score_count_name
+)
+
+
+def count_scores(reviews):
+    """ Гистограммы оценок по произведениям одним GROUP BY."""
+    histograms = {}
+    rows = reviews.order_by().values('title_id', 'score').annotate(
+        count=Count('id')
+    )
+    for row in rows:
+        histograms.setdefault(
+            row['title_id'], dict.fromkeys(SCORES, 0)
+        )[row['score']] = row['count']
+    return histograms
+
+
+def rating_fields(histogram):
+    """ Значения полей рейтинга Title для гистограммы оценок."""
+    total = sum(score * count for score, count in histogram.items())
+    count = sum(histogram.values())
+    fields = {
+        score_count_name(score): histogram[score] for score in SCORES
+    }
+    fields.update(
+        rating_sum=total,
+        rating_count=count,
+        rating=total / count if count else None
+    )
+    return fields
+
+
+class Command(BaseCommand):
+    help = "Recomputes title ratings and score histograms from reviews."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report drift, do not fix it.'
+        )
+
+    def handle(self, *args, **options):
+        actual = count_scores(Review.objects.all())
+        empty = dict.fromkeys(SCORES, 0)
+        drifted = []
+        titles = Title.objects.only(
+            'id', 'rating_sum', 'rating_count', *SCORE_COUNT_FIELDS
+        )
+        for title in titles.iterator():
+            histogram = actual.get(title.id, empty)
+            fields = rating_fields(histogram)
+            stored = (
+                title.rating_sum, title.rating_count, title.score_histogram
+            )
+            if stored != (
+                fields['rating_sum'], fields['rating_count'], histogram
+            ):
+                drifted.append((title, fields))
+
+        for title, fields in drifted:
+            self.stdout.write(
+                f'Title {title.id}: stored {title.rating_sum}/'
+                f'{title.rating_count}, actual {fields["rating_sum"]}/'
+                f'{fields["rating_count"]}'
+            )
+
+        if not options['dry_run']:
+            for title, _ in drifted:
+                self.fix_title(title.pk)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Checked {titles.count()} titles, '
+                f'{len(drifted)} with drift'
+                + (' (dry run).' if options['dry_run'] else ' fixed.')
+            )
+        )
+
+    def fix_title(self, title_id):
+        """ Пересчитывает рейтинг и гистограмму одного произведения под
+        блокировкой его строки, чтобы не затереть параллельно записанные
+        отзывы."""
+        with transaction.atomic():
+            Title.objects.select_for_update().filter(pk=title_id).exists()
+            histogram = count_scores(
+                Review.objects.filter(title_id=title_id)
+            ).get(title_id, dict.fromkeys(SCORES, 0))
+            Title.objects.filter(pk=title_id).update(
+                **rating_fields(histogram)
+            )
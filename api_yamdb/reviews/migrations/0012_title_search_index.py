@@ -0,0 +1,31 @@
+from django.db import migrations
+
+from reviews.search import (
+    TITLE_INDEX_TABLE,
+    create_title_index,
+    rebuild_title_index
+)
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    create_title_index(schema_editor.connection)
+    rebuild_title_index(schema_editor.connection)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f'DROP TABLE IF EXISTS {TITLE_INDEX_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_pub_date_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
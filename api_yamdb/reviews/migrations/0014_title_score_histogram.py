@@ -0,0 +1,108 @@
+# Generated by Django 3.2 on 2026-10-18 17:02
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+MIN_SCORE = 1
+MAX_SCORE = 10
+
+
+def clamp_scores(apps, schema_editor):
+    """ API до этой миграции принимал оценку 0, а столбцов гистограммы
+    для неё нет: оценки вне 1..10 приводятся к границам шкалы, рейтинг
+    затронутых произведений пересчитывается."""
+    Review = apps.get_model('reviews', 'Review')
+    Title = apps.get_model('reviews', 'Title')
+    title_ids = set(Review.objects.filter(
+        Q(score__lt=MIN_SCORE) | Q(score__gt=MAX_SCORE)
+    ).values_list('title_id', flat=True))
+    if not title_ids:
+        return
+    Review.objects.filter(score__lt=MIN_SCORE).update(score=MIN_SCORE)
+    Review.objects.filter(score__gt=MAX_SCORE).update(score=MAX_SCORE)
+    rows = Review.objects.filter(title_id__in=title_ids).order_by().values(
+        'title_id'
+    ).annotate(total=Sum('score'), count=Count('id'))
+    for row in rows:
+        Title.objects.filter(pk=row['title_id']).update(
+            rating_sum=row['total'],
+            rating_count=row['count'],
+            rating=row['total'] / row['count']
+        )
+
+
+def fill_histograms(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    Title = apps.get_model('reviews', 'Title')
+    histograms = {}
+    rows = Review.objects.order_by().values('title_id', 'score').annotate(
+        count=Count('id')
+    )
+    for row in rows:
+        histograms.setdefault(row['title_id'], {})[
+            f'score_{row["score"]}_count'
+        ] = row['count']
+    for title_id, histogram in histograms.items():
+        Title.objects.filter(pk=title_id).update(**histogram)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0013_genretitle_genre_title_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='score_10_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок «10»'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_1_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок «1»'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_2_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок «2»'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_3_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок «3»'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_4_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок «4»'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_5_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок «5»'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_6_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок «6»'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_7_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок «7»'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_8_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок «8»'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_9_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок «9»'),
+        ),
+        migrations.RunPython(clamp_scores, migrations.RunPython.noop),
+        migrations.RunPython(fill_histograms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 3.2 on 2026-10-18 17:08
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_comment_counts(apps, schema_editor):
+    Comment = apps.get_model('reviews', 'Comment')
+    Review = apps.get_model('reviews', 'Review')
+    rows = Comment.objects.order_by().values('review_id').annotate(
+        count=Count('id')
+    )
+    for row in rows:
+        Review.objects.filter(pk=row['review_id']).update(
+            comment_count=row['count']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0014_title_score_histogram'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество комментариев'),
+        ),
+        migrations.RunPython(fill_comment_counts, migrations.RunPython.noop),
+    ]
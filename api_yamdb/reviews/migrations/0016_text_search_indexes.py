@@ -0,0 +1,50 @@
+from django.db import migrations
+
+from reviews.search import (
+    COMMENT_INDEX_TABLE,
+    POSTGRES_SEARCH_CONFIG,
+    REVIEW_INDEX_TABLE,
+    create_text_indexes,
+    rebuild_text_indexes
+)
+
+# GIN-индексы PostgreSQL по тому же выражению, что строит SearchVector.
+POSTGRES_INDEXES = {
+    'review_text_search_idx': 'reviews_review',
+    'comment_text_search_idx': 'reviews_comment',
+}
+
+
+def create_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        create_text_indexes(schema_editor.connection)
+        rebuild_text_indexes(schema_editor.connection)
+    elif vendor == 'postgresql':
+        for name, table in POSTGRES_INDEXES.items():
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin '
+                f"(to_tsvector('{POSTGRES_SEARCH_CONFIG}'::regconfig, "
+                "COALESCE(text, '')))"
+            )
+
+
+def drop_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for table in (REVIEW_INDEX_TABLE, COMMENT_INDEX_TABLE):
+            schema_editor.execute(f'DROP TABLE IF EXISTS {table}')
+    elif vendor == 'postgresql':
+        for name in POSTGRES_INDEXES:
+            schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0015_review_comment_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
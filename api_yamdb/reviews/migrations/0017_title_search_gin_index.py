@@ -0,0 +1,39 @@
+from django.db import migrations
+
+from reviews.search import POSTGRES_SEARCH_CONFIG
+
+# GIN-индекс PostgreSQL по тому же выражению, что строит
+# reviews.search.title_search_vector(). На SQLite поиск идёт по FTS5
+# из миграции 0012.
+INDEX_NAME = 'title_search_idx'
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON reviews_title '
+        'USING gin (('
+        f"setweight(to_tsvector('{POSTGRES_SEARCH_CONFIG}'::regconfig, "
+        "COALESCE(name, '')), 'A') || "
+        f"setweight(to_tsvector('{POSTGRES_SEARCH_CONFIG}'::regconfig, "
+        "COALESCE(description, '')), 'B')"
+        '))'
+    )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0016_text_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -1,9 +1,37 @@
+from collections import Counter
+
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, F, FloatField, When
+from django.db.models.functions import Cast
+from django.dispatch import Signal
 from reviews.validators import validate_score, validate_year
 
 User = get_user_model()
 
+# Отправляется после Review.objects.bulk_create_with_ratings():
+# bulk_create не отправляет post_save. Аргументы: reviews — созданные
+# отзывы, title_ids — затронутые произведения, using — база данных.
+reviews_bulk_created = Signal()
+
+SCORES = range(1, 11)
+
+
+def score_count_name(score):
+    """ Имя поля Title с числом отзывов с данной оценкой."""
+    return f'score_{score}_count'
+
+
+SCORE_COUNT_FIELDS = [score_count_name(score) for score in SCORES]
+
+
+def score_count_field(score):
+    return models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name=f'Оценок «{score}»'
+    )
+
 
 class Category(models.Model):
     """ Категории (типы) произведений («Фильмы», «Книги», «Музыка»).
@@ -33,6 +61,48 @@ class Genre(models.Model):
         return self.slug
 
 
+class TitleQuerySet(models.QuerySet):
+    """ QuerySet произведений с инкрементальным пересчётом рейтинга."""
+
+    def apply_scores(self, added=(), removed=()):
+        """ Добавляет и вычитает оценки отзывов: сумму, количество,
+        рейтинг и гистограмму оценок обновляет один UPDATE."""
+        buckets = Counter(int(score) for score in added)
+        buckets.subtract(int(score) for score in removed)
+        histogram = {
+            score_count_name(score): F(score_count_name(score)) + delta
+            for score, delta in buckets.items() if delta
+        }
+        if not histogram:
+            return 0
+        return self.apply_rating_delta(
+            sum(score * delta for score, delta in buckets.items()),
+            sum(buckets.values()),
+            **histogram
+        )
+
+    def apply_rating_delta(self, score_delta, count_delta, **fields):
+        """ Сдвигает сумму и количество оценок на переданные значения
+        одним UPDATE и тут же пересчитывает производный рейтинг.
+        В правой части UPDATE используются значения до изменения,
+        поэтому дельты прибавляются и в формуле рейтинга."""
+        new_sum = F('rating_sum') + score_delta
+        new_count = F('rating_count') + count_delta
+        return self.update(
+            rating_sum=new_sum,
+            rating_count=new_count,
+            rating=Case(
+                When(
+                    rating_count__gt=-count_delta,
+                    then=Cast(new_sum, FloatField()) / new_count
+                ),
+                default=None,
+                output_field=FloatField()
+            ),
+            **fields
+        )
+
+
 class Title(models.Model):
     """ Произведения, к которым пишут отзывы (определённый фильм, книга или
     песенка)."""
@@ -63,6 +133,34 @@ class Title(models.Model):
         through='GenreTitle',
         verbose_name='Жанр'
     )
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Сумма оценок'
+    )
+    rating_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество оценок'
+    )
+    rating = models.FloatField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Рейтинг'
+    )
+    score_1_count = score_count_field(1)
+    score_2_count = score_count_field(2)
+    score_3_count = score_count_field(3)
+    score_4_count = score_count_field(4)
+    score_5_count = score_count_field(5)
+    score_6_count = score_count_field(6)
+    score_7_count = score_count_field(7)
+    score_8_count = score_count_field(8)
+    score_9_count = score_count_field(9)
+    score_10_count = score_count_field(10)
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'произведение'
@@ -71,6 +169,39 @@ class Title(models.Model):
     def __str__(self):
         return self.name
 
+    @property
+    def genre_ids(self):
+        """ id жанров произведения через связующую таблицу, без JOIN
+        с таблицей жанров. Использует prefetch_related('genretitle_set')."""
+        return [link.genre_id for link in self.genretitle_set.all()]
+
+    @property
+    def score_histogram(self):
+        """ Число отзывов с каждой оценкой от 1 до 10."""
+        return {
+            score: getattr(self, score_count_name(score)) for score in SCORES
+        }
+
+    @property
+    def score_median(self):
+        """ Медиана оценок, вычисленная по гистограмме."""
+        histogram = self.score_histogram
+        count = sum(histogram.values())
+        if not count:
+            return None
+        # Средние позиции в упорядоченном списке оценок; при нечётном
+        # количестве они совпадают.
+        positions = ((count - 1) // 2, count // 2)
+        middle = []
+        seen = 0
+        for score, bucket in histogram.items():
+            middle.extend(
+                score for position in positions
+                if seen <= position < seen + bucket
+            )
+            seen += bucket
+        return sum(middle) / 2
+
 
 class GenreTitle(models.Model):
     """ Модель для сопоставления жанра и произведения."""
@@ -86,6 +217,12 @@ class GenreTitle(models.Model):
     )
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=['genre', 'title'],
+                name='genretitle_genre_title_idx'
+            )
+        ]
         verbose_name = 'связь жанр-произведение'
         verbose_name_plural = 'связи жанр-произведение'
 
@@ -93,6 +230,31 @@ class GenreTitle(models.Model):
         return f'{self.genre} {self.title}'
 
 
+class ReviewQuerySet(models.QuerySet):
+
+    def apply_comment_delta(self, delta):
+        """ Сдвигает счётчик комментариев одним UPDATE."""
+        return self.update(comment_count=F('comment_count') + delta)
+
+    def bulk_create_with_ratings(self, reviews):
+        """ Создаёт отзывы одним INSERT и в той же транзакции обновляет
+        рейтинг каждого затронутого произведения одним UPDATE."""
+        scores = {}
+        for review in reviews:
+            scores.setdefault(review.title_id, []).append(int(review.score))
+        with transaction.atomic():
+            created = self.bulk_create(reviews)
+            for title_id, title_scores in scores.items():
+                Title.objects.filter(pk=title_id).apply_scores(
+                    added=title_scores
+                )
+        reviews_bulk_created.send(
+            sender=self.model, reviews=created, title_ids=list(scores),
+            using=self.db
+        )
+        return created
+
+
 class Review(models.Model):
     """ Отзывы на произведения."""
     author = models.ForeignKey(
@@ -117,6 +279,13 @@ class Review(models.Model):
         validators=[validate_score],
         verbose_name='Оценка'
     )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев'
+    )
+
+    objects = ReviewQuerySet.as_manager()
 
     class Meta:
         constraints = [
@@ -125,10 +294,43 @@ class Review(models.Model):
                 name='unique_author_title'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['title', '-pub_date', '-id'],
+                name='review_title_pub_date_idx'
+            )
+        ]
         ordering = ['-pub_date']
         verbose_name = 'отзыв'
         verbose_name_plural = 'отзывы'
 
+    def save(self, *args, **kwargs):
+        """ Сохраняет отзыв и в той же транзакции сдвигает сумму,
+        количество и гистограмму оценок произведения. При редактировании
+        прежние оценка и произведение читаются с блокировкой строки."""
+        with transaction.atomic():
+            previous = None
+            if not self._state.adding:
+                previous = (
+                    Review.objects.select_for_update()
+                    .filter(pk=self.pk)
+                    .values('score', 'title_id')
+                    .first()
+                )
+            super().save(*args, **kwargs)
+            title = Title.objects.filter(pk=self.title_id)
+            if previous is None:
+                title.apply_scores(added=[self.score])
+            elif previous['title_id'] != self.title_id:
+                Title.objects.filter(
+                    pk=previous['title_id']
+                ).apply_scores(removed=[previous['score']])
+                title.apply_scores(added=[self.score])
+            else:
+                title.apply_scores(
+                    added=[self.score], removed=[previous['score']]
+                )
+
 
 class Comment(models.Model):
     """ Комментарии к отзывам."""
@@ -152,6 +354,32 @@ class Comment(models.Model):
     )
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=['review', '-pub_date', '-id'],
+                name='comment_review_pub_date_idx'
+            )
+        ]
         ordering = ['-pub_date']
         verbose_name = 'комментарий'
         verbose_name_plural = 'комментарии'
+
+    def save(self, *args, **kwargs):
+        """ Сохраняет комментарий и в той же транзакции обновляет счётчик
+        комментариев отзыва. При редактировании прежний отзыв читается
+        с блокировкой строки."""
+        with transaction.atomic():
+            previous = None
+            if not self._state.adding:
+                previous = (
+                    Comment.objects.select_for_update()
+                    .filter(pk=self.pk)
+                    .values_list('review_id', flat=True)
+                    .first()
+                )
+            super().save(*args, **kwargs)
+            if previous == self.review_id:
+                return
+            if previous is not None:
+                Review.objects.filter(pk=previous).apply_comment_delta(-1)
+            Review.objects.filter(pk=self.review_id).apply_comment_delta(1)
@@ -0,0 +1,263 @@
+import re
+
+from django.db import NotSupportedError, connections
+
+TITLE_INDEX_TABLE = 'reviews_title_fts'
+REVIEW_INDEX_TABLE = 'reviews_review_fts'
+COMMENT_INDEX_TABLE = 'reviews_comment_fts'
+TOKEN_RE = re.compile(r'\w+')
+# Вес совпадения в названии относительно совпадения в описании.
+NAME_WEIGHT = 10.0
+# Конфигурация полнотекстового поиска PostgreSQL; должна совпадать
+# с выражением GIN-индексов из миграций 0016 и 0017.
+POSTGRES_SEARCH_CONFIG = 'simple'
+
+
+def fts_available(using):
+    return connections[using].vendor == 'sqlite'
+
+
+def build_match_query(text):
+    """ Превращает пользовательскую строку в запрос FTS5: все слова
+    обязательны, последнее ищется по префиксу (ввод ещё не закончен).
+    Кавычки исключают синтаксис FTS5 из пользовательского ввода."""
+    tokens = TOKEN_RE.findall(text)
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def create_title_index(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {TITLE_INDEX_TABLE} '
+            'USING fts5(name, description, '
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+
+
+def rebuild_title_index(connection):
+    """ Заполняет индекс заново по всем произведениям."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TITLE_INDEX_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {TITLE_INDEX_TABLE} (rowid, name, description) '
+            'SELECT id, name, description FROM reviews_title'
+        )
+
+
+def index_title(title, using):
+    """ Добавляет или обновляет произведение в полнотекстовом индексе."""
+    if not fts_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {TITLE_INDEX_TABLE} WHERE rowid = %s', [title.pk]
+        )
+        cursor.execute(
+            f'INSERT INTO {TITLE_INDEX_TABLE} (rowid, name, description) '
+            'VALUES (%s, %s, %s)',
+            [title.pk, title.name, title.description]
+        )
+
+
+def unindex_title(title_id, using):
+    if not fts_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {TITLE_INDEX_TABLE} WHERE rowid = %s', [title_id]
+        )
+
+
+def search_titles(queryset, text):
+    """
+    Полнотекстовый поиск произведений по названию и описанию,
+    результаты упорядочены по релевантности (bm25).
+    На SQLite используется индекс FTS5, на PostgreSQL — GIN-индекс по
+    взвешенному to_tsvector. Поиск перебором не используется: на других
+    бэкендах возбуждается NotSupportedError.
+    """
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        return search_titles_postgres(queryset, text)
+    if vendor != 'sqlite':
+        raise NotSupportedError(
+            'Поиск произведений поддерживается только на SQLite и '
+            'PostgreSQL.'
+        )
+    match = build_match_query(text)
+    if match is None:
+        return queryset.none()
+    return queryset.extra(
+        tables=[TITLE_INDEX_TABLE],
+        where=[
+            f'{TITLE_INDEX_TABLE}.rowid = reviews_title.id',
+            f'{TITLE_INDEX_TABLE} MATCH %s'
+        ],
+        params=[match],
+        select={
+            'search_rank': f'bm25({TITLE_INDEX_TABLE}, {NAME_WEIGHT}, 1.0)'
+        },
+        order_by=['search_rank', 'id']
+    )
+
+
+def title_search_vector():
+    """ Вектор названия (вес A) и описания (вес B); совпадает
+    с выражением GIN-индекса из миграции 0017."""
+    from django.contrib.postgres.search import SearchVector
+
+    return (
+        SearchVector('name', config=POSTGRES_SEARCH_CONFIG, weight='A')
+        + SearchVector(
+            'description', config=POSTGRES_SEARCH_CONFIG, weight='B'
+        )
+    )
+
+
+def search_titles_postgres(queryset, text):
+    from django.contrib.postgres.search import SearchRank
+
+    query = build_postgres_query(text)
+    if query is None:
+        return queryset.none()
+    vector = title_search_vector()
+    # Веса D, C, B, A: совпадение в названии весит NAME_WEIGHT описаний.
+    weights = [0.0, 0.0, 1.0 / NAME_WEIGHT, 1.0]
+    return queryset.annotate(
+        search_vector=vector,
+        search_rank=SearchRank(vector, query, weights=weights)
+    ).filter(search_vector=query).order_by('-search_rank', 'id')
+
+
+# Индексы текста отзывов и комментариев. Вторая колонка — токен области
+# поиска ("t<id произведения>" или "r<id отзыва>"), поэтому поиск внутри
+# произведения или отзыва — пересечение списков в самом индексе FTS5,
+# а не фильтрация всех совпадений по внешнему ключу.
+TEXT_INDEXES = {
+    REVIEW_INDEX_TABLE: ('reviews_review', 'title', 't', 'title_id'),
+    COMMENT_INDEX_TABLE: ('reviews_comment', 'review', 'r', 'review_id'),
+}
+
+
+def create_text_indexes(connection):
+    with connection.cursor() as cursor:
+        for table, (_, scope, _, _) in TEXT_INDEXES.items():
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {table} '
+                f'USING fts5(text, {scope}, '
+                "tokenize='unicode61 remove_diacritics 2')"
+            )
+
+
+def rebuild_text_indexes(connection):
+    """ Заполняет индексы отзывов и комментариев заново."""
+    with connection.cursor() as cursor:
+        for table, (source, scope, prefix, column) in TEXT_INDEXES.items():
+            cursor.execute(f'DELETE FROM {table}')
+            cursor.execute(
+                f'INSERT INTO {table} (rowid, text, {scope}) '
+                f"SELECT id, text, '{prefix}' || {column} FROM {source}"
+            )
+
+
+def index_text(table, pk, text, scope_id, using):
+    """ Добавляет или обновляет отзыв (комментарий) в индексе."""
+    if not fts_available(using):
+        return
+    _, scope, prefix, _ = TEXT_INDEXES[table]
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'INSERT OR REPLACE INTO {table} (rowid, text, {scope}) '
+            'VALUES (%s, %s, %s)',
+            [pk, text, f'{prefix}{scope_id}']
+        )
+
+
+def index_new_reviews(reviews, using):
+    """ Индексирует отзывы, созданные bulk_create: на SQLite у них нет
+    pk, поэтому строки выбираются по уникальной паре (автор,
+    произведение)."""
+    if not fts_available(using) or not reviews:
+        return
+    condition = ' OR '.join(
+        '(author_id = %s AND title_id = %s)' for _ in reviews
+    )
+    params = [
+        value for review in reviews
+        for value in (review.author_id, review.title_id)
+    ]
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'INSERT OR REPLACE INTO {REVIEW_INDEX_TABLE} '
+            '(rowid, text, title) '
+            f"SELECT id, text, 't' || title_id FROM reviews_review "
+            f'WHERE {condition}',
+            params
+        )
+
+
+def unindex_text(table, pk, using):
+    if not fts_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE rowid = %s', [pk])
+
+
+def search_text(queryset, text, table, scope_id):
+    """
+    Полнотекстовый поиск отзывов (комментариев) внутри одного
+    произведения (отзыва), результаты упорядочены по релевантности.
+    На SQLite используется FTS5, на PostgreSQL — GIN-индекс по
+    to_tsvector. Поиск перебором текстов не используется: на других
+    бэкендах возбуждается NotSupportedError.
+    """
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        return search_text_postgres(queryset, text)
+    if vendor != 'sqlite':
+        raise NotSupportedError(
+            'Поиск по тексту поддерживается только на SQLite и PostgreSQL.'
+        )
+    match = build_match_query(text)
+    if match is None:
+        return queryset.none()
+    source, scope, prefix, _ = TEXT_INDEXES[table]
+    return queryset.extra(
+        tables=[table],
+        where=[f'{table}.rowid = {source}.id', f'{table} MATCH %s'],
+        params=[f'{scope} : "{prefix}{scope_id}" AND text : ({match})'],
+        select={'search_rank': f'bm25({table}, 1.0, 0.0)'},
+        order_by=['search_rank', '-id']
+    )
+
+
+def build_postgres_query(text):
+    """ Запрос to_tsquery с теми же правилами, что и для FTS5: все
+    слова обязательны, последнее ищется по префиксу."""
+    from django.contrib.postgres.search import SearchQuery
+
+    tokens = TOKEN_RE.findall(text)
+    if not tokens:
+        return None
+    terms = [f"'{token}'" for token in tokens]
+    terms[-1] += ':*'
+    return SearchQuery(
+        ' & '.join(terms), config=POSTGRES_SEARCH_CONFIG, search_type='raw'
+    )
+
+
+def search_text_postgres(queryset, text):
+    from django.contrib.postgres.search import SearchRank, SearchVector
+
+    query = build_postgres_query(text)
+    if query is None:
+        return queryset.none()
+    vector = SearchVector('text', config=POSTGRES_SEARCH_CONFIG)
+    return queryset.annotate(
+        search_vector=vector,
+        search_rank=SearchRank(vector, query)
+    ).filter(search_vector=query).order_by('-search_rank', '-id')
@@ -0,0 +1,136 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import Comment, Review, Title, reviews_bulk_created
+from .search import (
+    COMMENT_INDEX_TABLE,
+    REVIEW_INDEX_TABLE,
+    index_new_reviews,
+    index_text,
+    index_title,
+    unindex_text,
+    unindex_title
+)
+
+User = get_user_model()
+
+# pk отзывов и авторов, которые сейчас удаляются в этом потоке вместе со
+# своими комментариями: pre_delete всех объектов каскада отправляется до
+# удаления комментариев, post_delete отзыва или автора — после.
+_cascade = threading.local()
+
+
+def cascade_deleting(name):
+    """ Множество pk удаляемых сейчас отзывов ('review') или авторов
+    ('author')."""
+    if not hasattr(_cascade, name):
+        setattr(_cascade, name, set())
+    return getattr(_cascade, name)
+
+
+def comment_cascaded(comment):
+    """ Комментарий удаляется вместе со своим отзывом или автором:
+    счётчик комментариев уже учтён в pre_delete, по одному комментарию
+    его не обновляют."""
+    return (
+        comment.review_id in cascade_deleting('review')
+        or comment.author_id in cascade_deleting('author')
+    )
+
+
+@receiver(pre_delete, sender=Review)
+def review_deleting(sender, instance, **kwargs):
+    """ Счётчик удаляемого отзыва не нужен: комментарии удаляются
+    раньше него."""
+    cascade_deleting('review').add(instance.pk)
+
+
+@receiver(pre_delete, sender=User)
+def author_deleting(sender, instance, **kwargs):
+    """ Уменьшает счётчики отзывов, под которыми оставлял комментарии
+    удаляемый пользователь: один UPDATE на отзыв, а не на комментарий.
+    Его собственные отзывы удаляются вместе с ним."""
+    cascade_deleting('author').add(instance.pk)
+    counts = Comment.objects.filter(author=instance).exclude(
+        review__author=instance
+    ).values_list('review_id').annotate(count=Count('pk')).order_by()
+    for review_id, count in counts:
+        Review.objects.filter(pk=review_id).apply_comment_delta(-count)
+
+
+@receiver(post_delete, sender=User)
+def author_deleted(sender, instance, **kwargs):
+    cascade_deleting('author').discard(instance.pk)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    """ Вычитает оценку удалённого отзыва из рейтинга произведения.
+    Сигнал отправляется внутри транзакции удаления, в том числе при
+    каскадном удалении отзывов вместе с автором."""
+    cascade_deleting('review').discard(instance.pk)
+    Title.objects.filter(pk=instance.title_id).apply_scores(
+        removed=[instance.score]
+    )
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    """ Уменьшает счётчик комментариев отзыва в транзакции удаления."""
+    if not comment_cascaded(instance):
+        Review.objects.filter(pk=instance.review_id).apply_comment_delta(-1)
+
+
+@receiver(post_save, sender=Title)
+def title_saved(sender, instance, using, update_fields=None, **kwargs):
+    """ Обновляет полнотекстовый индекс, если могли измениться
+    название или описание."""
+    if update_fields and not {'name', 'description'} & set(update_fields):
+        return
+    index_title(instance, using)
+
+
+@receiver(post_delete, sender=Title)
+def title_deleted(sender, instance, using, **kwargs):
+    unindex_title(instance.pk, using)
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, using, update_fields=None, **kwargs):
+    """ Обновляет полнотекстовый индекс отзывов, если могли измениться
+    текст или произведение."""
+    if update_fields and not {'text', 'title'} & set(update_fields):
+        return
+    index_text(
+        REVIEW_INDEX_TABLE, instance.pk, instance.text, instance.title_id,
+        using
+    )
+
+
+@receiver(reviews_bulk_created, sender=Review)
+def reviews_bulk_indexed(sender, reviews, using, **kwargs):
+    index_new_reviews(reviews, using)
+
+
+@receiver(post_delete, sender=Review)
+def review_unindexed(sender, instance, using, **kwargs):
+    unindex_text(REVIEW_INDEX_TABLE, instance.pk, using)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, using, update_fields=None, **kwargs):
+    if update_fields and not {'text', 'review'} & set(update_fields):
+        return
+    index_text(
+        COMMENT_INDEX_TABLE, instance.pk, instance.text, instance.review_id,
+        using
+    )
+
+
+@receiver(post_delete, sender=Comment)
+def comment_unindexed(sender, instance, using, **kwargs):
+    unindex_text(COMMENT_INDEX_TABLE, instance.pk, using)
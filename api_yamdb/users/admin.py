@@ -1,5 +1,16 @@
 from django.contrib import admin
 
-from .models import User
+from .models import OutboxEmail, User
 
 admin.site.register(User)
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    """Очередь писем: что отправлено, что ждёт повторной попытки."""
+    list_display = (
+        'recipient', 'subject', 'created', 'attempts', 'next_attempt_at',
+        'sent_at'
+    )
+    list_filter = ('sent_at',)
+    search_fields = ('recipient',)
@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
 
 
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from .outbox import outbox_worker
+
+        request_started.connect(
+            outbox_worker.resume, dispatch_uid='users.outbox.resume'
+        )
@@ -0,0 +1,25 @@
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from users.outbox import deliver_pending
+
+
+class Command(BaseCommand):
+    help = "Sends queued emails from the outbox, once or continuously."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Send the emails that are due and exit.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent = deliver_pending()
+            if sent or options['once']:
+                self.stdout.write(f'Sent {sent} emails.')
+            if options['once']:
+                return
+            time.sleep(settings.EMAIL_OUTBOX_POLL_INTERVAL)
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
 
 class UserRoles(models.TextChoices):
@@ -8,7 +9,18 @@ class UserRoles(models.TextChoices):
     USER = ('user', 'Пользователь')
 
 
-class User(AbstractUser):
+class UserRoleMixin:
+    """ Проверки роли по полям role и is_superuser: общие для модели
+    и для пользователя, собранного из JWT (api/v1/authentication.py)."""
+
+    def is_admin(self):
+        return self.role == UserRoles.ADMIN or self.is_superuser
+
+    def is_moderator(self):
+        return self.role == UserRoles.MODERATOR
+
+
+class User(UserRoleMixin, AbstractUser):
     email = models.EmailField(
         'Email',
         max_length=254,
@@ -30,8 +42,38 @@ class User(AbstractUser):
         verbose_name = 'пользователь'
         verbose_name_plural = 'пользователи'
 
-    def is_admin(self):
-        return self.role == UserRoles.ADMIN or self.is_superuser
 
-    def is_moderator(self):
-        return self.role == UserRoles.MODERATOR
+class OutboxEmail(models.Model):
+    """
+    Письмо в очереди на отправку (см. users/outbox.py). Письмо ждёт
+    отправки, пока задано время следующей попытки; после отправки или
+    последней неудачной попытки время попытки и текст письма стираются,
+    а через EMAIL_OUTBOX_RETENTION после постановки в очередь удаляется
+    и само письмо.
+    """
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    from_email = models.CharField('Отправитель', max_length=254)
+    recipient = models.EmailField('Получатель', max_length=254)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    next_attempt_at = models.DateTimeField(
+        'Следующая попытка',
+        default=timezone.now,
+        null=True,
+        blank=True,
+        db_index=True
+    )
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    sent_at = models.DateTimeField('Отправлено', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    claim = models.CharField(
+        'Метка обработчика', max_length=32, blank=True, editable=False
+    )
+
+    class Meta:
+        ordering = ['-created']
+        verbose_name = 'письмо в очереди'
+        verbose_name_plural = 'очередь писем'
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
@@ -0,0 +1,234 @@
+import logging
+import threading
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+# Режимы доставки EMAIL_OUTBOX_WORKER.
+THREAD = 'thread'
+COMMAND = 'command'
+EAGER = 'eager'
+
+
+def enqueue_email(subject, body, recipient, from_email=None):
+    """
+    Ставит письмо в очередь: одна вставка в таблицу вместо обращения к
+    почтовому серверу, поэтому время ответа не зависит от него. После
+    коммита транзакции будит обработчик очереди.
+    """
+    email = OutboxEmail.objects.create(
+        subject=subject,
+        body=body,
+        recipient=recipient,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL
+    )
+    transaction.on_commit(outbox_worker.notify)
+    return email
+
+
+def retry_delay(attempts):
+    """ Пауза перед следующей попыткой: удваивается с каждой неудачей,
+    но не больше EMAIL_OUTBOX_MAX_RETRY_DELAY секунд."""
+    return timedelta(seconds=min(
+        settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1),
+        settings.EMAIL_OUTBOX_MAX_RETRY_DELAY
+    ))
+
+
+def claim_batch(size):
+    """
+    Забирает до `size` писем, время попытки которых наступило. Письма
+    помечаются меткой обработчика, а попытка переносится на
+    EMAIL_OUTBOX_LEASE секунд вперёд: другие обработчики их не возьмут,
+    а если этот обработчик упадёт, письма будут отправлены позже.
+    """
+    now = timezone.now()
+    due = list(OutboxEmail.objects.filter(
+        next_attempt_at__lte=now
+    ).order_by('next_attempt_at').values_list('pk', flat=True)[:size])
+    if not due:
+        return []
+    claim = uuid.uuid4().hex
+    OutboxEmail.objects.filter(pk__in=due, next_attempt_at__lte=now).update(
+        claim=claim,
+        next_attempt_at=now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE)
+    )
+    return list(OutboxEmail.objects.filter(claim=claim).order_by('pk'))
+
+
+def build_message(email, connection):
+    return EmailMessage(
+        email.subject, email.body, email.from_email, [email.recipient],
+        connection=connection
+    )
+
+
+def error_text(error):
+    return str(error) or error.__class__.__name__
+
+
+def deliver_batch(batch):
+    """
+    Отправляет пачку писем через одно соединение с почтовым сервером,
+    каждое письмо — отдельным send_messages(): ошибка в одном письме не
+    задерживает остальные, и ни одно письмо не уходит дважды.
+    Возвращает словарь pk -> текст ошибки для неотправленных писем.
+    """
+    connection = get_connection()
+    errors = {}
+    try:
+        with connection:
+            for email in batch:
+                try:
+                    connection.send_messages(
+                        [build_message(email, connection)]
+                    )
+                except Exception as error:
+                    errors[email.pk] = error_text(error)
+    except Exception as error:
+        # Не удалось открыть или закрыть соединение.
+        logger.warning('Ошибка соединения с почтовым сервером: %s', error)
+        return {email.pk: error_text(error) for email in batch}
+    return errors
+
+
+def mark_failed(email, error, now):
+    """ Откладывает следующую попытку; после последней текст письма
+    стирается, как и у отправленных."""
+    attempts = email.attempts + 1
+    fields = {'next_attempt_at': None, 'body': ''}
+    if attempts < settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        fields = {'next_attempt_at': now + retry_delay(attempts)}
+    OutboxEmail.objects.filter(pk=email.pk, claim=email.claim).update(
+        attempts=attempts,
+        last_error=error,
+        claim='',
+        **fields
+    )
+
+
+def purge_finished():
+    """ Удаляет отправленные и окончательно неотправленные письма,
+    поставленные в очередь больше EMAIL_OUTBOX_RETENTION секунд назад."""
+    return OutboxEmail.objects.filter(
+        next_attempt_at__isnull=True,
+        created__lt=timezone.now() - timedelta(
+            seconds=settings.EMAIL_OUTBOX_RETENTION
+        )
+    ).delete()[0]
+
+
+def deliver_pending(batch_size=None):
+    """
+    Отправляет все письма, время попытки которых наступило, пачками по
+    EMAIL_OUTBOX_BATCH_SIZE: одно соединение с почтовым сервером на
+    пачку. Неудачные попытки повторяются с растущей паузой, после
+    EMAIL_OUTBOX_MAX_ATTEMPTS письмо больше не отправляется.
+    Текст отправленного письма стирается сразу: в нём код
+    подтверждения, который ещё действует. Завершённые письма удаляются
+    по истечении EMAIL_OUTBOX_RETENTION.
+    Возвращает число отправленных писем.
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    total = 0
+    while True:
+        batch = claim_batch(batch_size)
+        if not batch:
+            purge_finished()
+            return total
+        errors = deliver_batch(batch)
+        sent = [email.pk for email in batch if email.pk not in errors]
+        for email in batch:
+            if email.pk in errors:
+                mark_failed(email, errors[email.pk], timezone.now())
+        OutboxEmail.objects.filter(
+            pk__in=sent, claim=batch[0].claim
+        ).update(
+            sent_at=timezone.now(), next_attempt_at=None, body='', claim=''
+        )
+        total += len(sent)
+
+
+class OutboxWorker:
+    """
+    Фоновый поток, разбирающий очередь писем в процессе веб-сервера.
+    Поток запускается с первым запросом к процессу (см. resume()) или
+    при постановке письма в очередь,
+    просыпается по notify() и не реже раза в EMAIL_OUTBOX_POLL_INTERVAL
+    секунд, чтобы повторить отложенные попытки. После пробуждения поток
+    ждёт EMAIL_OUTBOX_FLUSH_INTERVAL секунд, чтобы письма, поставленные
+    в очередь почти одновременно, ушли одной пачкой.
+    Режим задаётся EMAIL_OUTBOX_WORKER: 'thread' — этот поток,
+    'command' — отдельный процесс `manage.py send_outbox`,
+    'eager' — отправка сразу после коммита (для тестов и разработки).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def notify(self):
+        mode = settings.EMAIL_OUTBOX_WORKER
+        if mode == EAGER:
+            deliver_pending()
+        elif mode == THREAD:
+            self.start()
+            self.wakeup.set()
+
+    def resume(self, **kwargs):
+        """ Приёмник request_started (см. users/apps.py): после
+        перезапуска процесса отложенные попытки и письма с истёкшей
+        арендой уходят с первым запросом, не дожидаясь новой
+        регистрации. Команды manage.py, не обслуживающие запросы, поток
+        не запускают."""
+        if self.thread is None and settings.EMAIL_OUTBOX_WORKER == THREAD:
+            self.start()
+            self.wakeup.set()
+
+    def start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.stopping.clear()
+                self.thread = threading.Thread(
+                    target=self.run, name='email-outbox', daemon=True
+                )
+                self.thread.start()
+
+    def stop(self):
+        """ Останавливает поток после текущего прохода по очереди."""
+        with self.lock:
+            thread = self.thread
+            self.thread = None
+        if thread is not None:
+            self.stopping.set()
+            self.wakeup.set()
+            thread.join()
+
+    def run(self):
+        while not self.stopping.is_set():
+            self.wakeup.wait(settings.EMAIL_OUTBOX_POLL_INTERVAL)
+            self.wakeup.clear()
+            self.stopping.wait(settings.EMAIL_OUTBOX_FLUSH_INTERVAL)
+            if not self.stopping.is_set():
+                self.drain()
+
+    def drain(self):
+        try:
+            deliver_pending()
+        except Exception:
+            logger.exception('Ошибка при разборе очереди писем')
+        finally:
+            close_old_connections()
+
+
+outbox_worker = OutboxWorker()
@@ -0,0 +1,45 @@
+"""
+Время поиска подсказок в индексе автодополнения (PrefixIndex) при
+большом числе произведений: перестроение индекса и поиск по префиксу
+слова, совпадающему со многими названиями.
+
+    python benchmarks/bench_autocomplete.py --titles 100000
+"""
+import argparse
+import itertools
+
+from utils import measure, report, setup_django
+
+LIMIT = 10
+
+
+def fill(titles):
+    from reviews.models import Title
+
+    Title.objects.bulk_create(
+        (Title(name=f'Название {idx} часть {idx % 97}', year=2000)
+         for idx in range(titles)),
+        batch_size=10000
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--titles', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_django()
+    from api.v1.autocomplete import PrefixIndex
+
+    fill(args.titles)
+    index = PrefixIndex()
+    print(f'{args.titles} titles, limit {LIMIT}')
+    report('rebuild', measure(index.rebuild, repeat=3, warmup=0))
+    lookups = itertools.cycle(f'часть {idx}' for idx in range(97))
+    report('lookup',
+           measure(lambda: index.lookup(next(lookups), LIMIT), args.repeat))
+
+
+if __name__ == '__main__':
+    main()
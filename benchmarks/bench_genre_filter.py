@@ -0,0 +1,99 @@
+"""
+Сравнение фильтра произведений по жанрам: JOIN по genre__slug__in
+(прежняя реализация, с дублями) и полусоединение по id жанров
+(TitleFilter).
+
+    python benchmarks/bench_genre_filter.py --titles 1000000
+"""
+import argparse
+import random
+
+from utils import measure, report, setup_django
+
+GENRES = 20
+GENRES_PER_TITLE = 3
+PAGE_SIZE = 5
+
+
+def fill(titles):
+    from django.db import connection, transaction
+    from reviews.models import SCORE_COUNT_FIELDS
+
+    columns = ', '.join(SCORE_COUNT_FIELDS)
+    zeros = ', '.join('0' for _ in SCORE_COUNT_FIELDS)
+    rnd = random.Random(0)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(
+            'INSERT INTO reviews_genre (id, name, slug) VALUES (%s, %s, %s)',
+            [(idx, f'Genre {idx}', f'genre-{idx}')
+             for idx in range(1, GENRES + 1)]
+        )
+        batch = 50000
+        for start in range(1, titles + 1, batch):
+            ids = range(start, min(start + batch, titles + 1))
+            cursor.executemany(
+                'INSERT INTO reviews_title (id, name, year, rating_sum, '
+                f'rating_count, {columns}) VALUES (%s, %s, %s, 0, 0, '
+                f'{zeros})',
+                [(idx, f'Title {idx}', 1900 + idx % 120) for idx in ids]
+            )
+            cursor.executemany(
+                'INSERT INTO reviews_genretitle (genre_id, title_id) '
+                'VALUES (%s, %s)',
+                [(genre, idx) for idx in ids
+                 for genre in rnd.sample(range(1, GENRES + 1),
+                                         GENRES_PER_TITLE)]
+            )
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def run_page(queryset):
+    queryset.count()
+    list(queryset.order_by('id')[:PAGE_SIZE])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--titles', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django()
+    from api.v1.filters import TitleFilter
+    from django.http import QueryDict
+    from reviews.models import Title
+
+    fill(args.titles)
+    slugs = ['genre-1', 'genre-2']
+    print(f'{args.titles} titles, {GENRES} genres, '
+          f'{GENRES_PER_TITLE} genres per title')
+
+    def join_any():
+        run_page(Title.objects.filter(genre__slug__in=slugs))
+
+    def join_distinct_any():
+        run_page(Title.objects.filter(genre__slug__in=slugs).distinct())
+
+    def semi_join_any():
+        params = QueryDict(f'genre={",".join(slugs)}')
+        run_page(TitleFilter(params, Title.objects.all()).qs)
+
+    def semi_join_all():
+        params = QueryDict(f'genre_all={",".join(slugs)}')
+        run_page(TitleFilter(params, Title.objects.all()).qs)
+
+    print('join rows (with duplicates):',
+          Title.objects.filter(genre__slug__in=slugs).count())
+    print('semi-join rows:', TitleFilter(
+        QueryDict(f'genre={",".join(slugs)}'), Title.objects.all()
+    ).qs.count())
+    report('any genre, JOIN genre__slug__in', measure(join_any, args.repeat))
+    report('any genre, JOIN + DISTINCT',
+           measure(join_distinct_any, args.repeat))
+    report('any genre, semi-join by ids', measure(semi_join_any, args.repeat))
+    report('all genres, semi-join by ids', measure(semi_join_all, args.repeat))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Страница отзывов `/api/v1/titles/{id}/reviews/` при большом числе отзывов
+на произведение: прежний путь (запрос произведения, затем автор каждого
+отзыва отдельным запросом) против текущего эндпоинта.
+
+    python benchmarks/bench_review_list.py --reviews 10000
+"""
+import argparse
+
+from utils import measure, report, setup_django
+
+PAGE_SIZE = 5
+
+
+def fill(reviews):
+    from django.db import connection, transaction
+    from reviews.models import SCORE_COUNT_FIELDS, SCORES
+
+    columns = ', '.join(SCORE_COUNT_FIELDS)
+    placeholders = ', '.join('%s' for _ in SCORE_COUNT_FIELDS)
+    # Все отзывы бенчмарка с оценкой 5.
+    histogram = [reviews if score == 5 else 0 for score in SCORES]
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO reviews_title (id, name, year, rating_sum, '
+            f'rating_count, {columns}) VALUES (1, %s, 2000, %s, %s, '
+            f'{placeholders})',
+            ['Title', reviews * 5, reviews, *histogram]
+        )
+        cursor.executemany(
+            'INSERT INTO users_user (id, username, email, password, '
+            'is_superuser, is_staff, is_active, first_name, last_name, '
+            "date_joined, bio, role) VALUES (%s, %s, %s, '', 0, 0, 1, '', "
+            "'', '2023-01-01 00:00:00', '', 'user')",
+            [(idx, f'user{idx}', f'user{idx}@yamdb.fake')
+             for idx in range(1, reviews + 1)]
+        )
+        cursor.executemany(
+            'INSERT INTO reviews_review (id, author_id, title_id, text, '
+            'pub_date, score, comment_count) VALUES (%s, %s, 1, %s, %s, 5, 0)',
+            [(idx, idx, 'text ' * 50,
+              f'2023-01-01 00:00:{idx % 60:02d}.{idx:06d}')
+             for idx in range(1, reviews + 1)]
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--reviews', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+    from api.v1.serializers import ReviewSerializer
+    from django.core.cache import cache
+    from django.db import connection
+    from django.shortcuts import get_object_or_404
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.test import APIClient
+    from reviews.models import Title
+
+    fill(args.reviews)
+    client = APIClient()
+    url = '/api/v1/titles/1/reviews/'
+
+    def previous_path():
+        title = get_object_or_404(Title, pk=1)
+        queryset = title.reviews.all()
+        queryset.count()
+        ReviewSerializer(queryset[:PAGE_SIZE], many=True).data
+
+    def endpoint_cold():
+        cache.clear()
+        client.get(url)
+
+    def endpoint_warm():
+        client.get(url)
+
+    def deep_page():
+        client.get(f'{url}?page={args.reviews // PAGE_SIZE}')
+
+    with CaptureQueriesContext(connection) as previous:
+        previous_path()
+    cache.clear()
+    with CaptureQueriesContext(connection) as current:
+        client.get(url)
+    print(f'{args.reviews} reviews on one title, page size {PAGE_SIZE}')
+    print(f'queries: previous path {len(previous)}, '
+          f'endpoint {len(current)}')
+    report('previous path (ORM + serializer)',
+           measure(previous_path, args.repeat))
+    report('endpoint, count not cached', measure(endpoint_cold, args.repeat))
+    report('endpoint, count cached', measure(endpoint_warm, args.repeat))
+    report('endpoint, last page', measure(deep_page, args.repeat))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""
+Пропускная способность `/api/v1/auth/signup/`: прежняя проверка
+(до трёх exists() и get_or_create) против текущей (один запрос по
+username или email) для новых пользователей, повторной регистрации и
+занятого email, а также весь эндпоинт. Оба варианта проходят одну и ту
+же валидацию полей SignUpSerializer и различаются только запросами к
+пользователям. Письма только ставятся в очередь.
+
+    python benchmarks/bench_signup.py --users 100000
+"""
+import argparse
+import itertools
+import logging
+
+from utils import measure, report, setup_django
+
+
+def fill(users):
+    from django.db import connection, transaction
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(
+            'INSERT INTO users_user (id, username, email, password, '
+            'is_superuser, is_staff, is_active, first_name, last_name, '
+            "date_joined, bio, role) VALUES (%s, %s, %s, '', 0, 0, 1, '', "
+            "'', '2023-01-01 00:00:00', '', 'user')",
+            [(idx, f'user{idx}', f'user{idx}@yamdb.fake')
+             for idx in range(1, users + 1)]
+        )
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def previous_serializer_class():
+    """ SignUpSerializer с прежней проверкой: до трёх exists()."""
+    from django.contrib.auth import get_user_model
+    from rest_framework import serializers
+
+    from api.v1.serializers import SignUpSerializer
+
+    User = get_user_model()
+
+    class PreviousSignUpSerializer(SignUpSerializer):
+
+        def validate(self, data):
+            username = data['username']
+            email = data['email']
+            if User.objects.filter(username=username, email=email).exists():
+                return data
+            if User.objects.filter(username=username).exists():
+                raise serializers.ValidationError(
+                    'Пользователь с таким username уже существует.'
+                )
+            if User.objects.filter(email=email).exists():
+                raise serializers.ValidationError(
+                    'Пользователь с таким email уже существует.'
+                )
+            return data
+
+    return PreviousSignUpSerializer
+
+
+def previous_signup(serializer_class, data):
+    """ Прежние SignUpSerializer.validate и get_or_create из SignUpView
+    без HTTP и постановки письма в очередь."""
+    from django.contrib.auth import get_user_model
+
+    serializer = serializer_class(data=data)
+    if serializer.is_valid():
+        get_user_model().objects.get_or_create(
+            username=serializer.validated_data['username'],
+            email=serializer.validated_data['email']
+        )
+
+
+def current_signup(data):
+    """ Текущие SignUpSerializer.validate и создание пользователя из
+    SignUpView без HTTP и постановки письма в очередь."""
+    from api.v1.serializers import SignUpSerializer
+    from api.v1.views import SignUpView
+
+    serializer = SignUpSerializer(data=data)
+    if serializer.is_valid() and serializer.user is None:
+        SignUpView().create_user(None, serializer)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.test import APIClient
+
+    settings.EMAIL_OUTBOX_WORKER = 'command'
+    # Ответы 400 на занятый email не должны попадать в вывод.
+    logging.getLogger('django.request').setLevel(logging.ERROR)
+    fill(args.users)
+    client = APIClient()
+    url = '/api/v1/auth/signup/'
+    counter = itertools.count()
+    previous_class = previous_serializer_class()
+
+    def new_user():
+        idx = next(counter)
+        return {'username': f'new{idx}', 'email': f'new{idx}@yamdb.fake'}
+
+    existing = {'username': 'user1', 'email': 'user1@yamdb.fake'}
+    taken_email = {'username': 'someone', 'email': 'user2@yamdb.fake'}
+
+    print(f'{args.users} users')
+    for name, make_data in (
+        ('new user', new_user),
+        ('existing pair', lambda: existing),
+        ('email taken', lambda: taken_email),
+    ):
+        with CaptureQueriesContext(connection) as previous:
+            previous_signup(previous_class, make_data())
+        with CaptureQueriesContext(connection) as current:
+            current_signup(make_data())
+        print(f'{name}: queries previous {len(previous)}, '
+              f'current {len(current)}')
+        report(f'{name}, previous validation',
+               measure(lambda: previous_signup(previous_class, make_data()),
+                       args.repeat))
+        report(f'{name}, current validation',
+               measure(lambda: current_signup(make_data()), args.repeat))
+        result = measure(lambda: client.post(url, data=make_data()),
+                         args.repeat)
+        report(f'{name}, endpoint', result)
+        print(f'{"":<40} ~{1000 / result["median"]:.0f} signups/s')
+
+
+if __name__ == '__main__':
+    main()
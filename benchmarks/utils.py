@@ -0,0 +1,49 @@
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_DIR = os.path.join(BASE_DIR, 'api_yamdb')
+
+
+def setup_django(db_name=None):
+    """ Настраивает Django на отдельную SQLite-базу и применяет миграции.
+    По умолчанию база создаётся во временном файле."""
+    sys.path.insert(0, PROJECT_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    from django.conf import settings
+
+    if db_name is None:
+        db_name = os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+    settings.DATABASES['default']['NAME'] = db_name
+    settings.ALLOWED_HOSTS = ['*']
+
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command('migrate', verbosity=0)
+    return db_name
+
+
+def measure(func, repeat=20, warmup=2):
+    """ Время выполнения func в миллисекундах: медиана и p95."""
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        'median': statistics.median(timings),
+        'p95': timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+    }
+
+
+def report(name, result):
+    print(f'{name:<40} median {result["median"]:9.2f} ms   '
+          f'p95 {result["p95"]:9.2f} ms')
@@ -1,6 +1,7 @@
 import os
 import sys
 
+import pytest
 from django.utils.version import get_version
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -33,3 +34,30 @@ assert get_version() < '4.0.0', 'Пожалуйста, используйте в
 pytest_plugins = [
     'tests.fixtures.fixture_user',
 ]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+
+    cache.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def eager_outbox(settings):
+    """ Письма из очереди отправляются сразу после коммита, чтобы тесты
+    видели их в mail.outbox без ожидания фонового потока."""
+    settings.EMAIL_OUTBOX_WORKER = 'eager'
+
+
+@pytest.fixture
+def shared_cache(settings, tmp_path):
+    """ Общий для процессов кеш: только с ним API доверяет утверждениям
+    токена."""
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path),
+        }
+    }
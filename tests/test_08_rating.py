@@ -0,0 +1,91 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    def get_title(self, title_id):
+        from reviews.models import Title
+        return Title.objects.get(pk=title_id)
+
+    def test_01_rating_follows_review_writes(self, admin_client, user_client,
+                                             moderator_client, user):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/reviews/'
+
+        create_single_review(admin_client, title_id, 'first', 3)
+        response = create_single_review(user_client, title_id, 'second', 8)
+        user_review_id = response.json()['id']
+        title = self.get_title(title_id)
+        assert (title.rating_sum, title.rating_count) == (11, 2), (
+            'Проверьте, что при создании отзыва сумма и количество оценок '
+            'произведения обновляются.'
+        )
+        assert title.rating == 5.5
+
+        user_client.patch(f'{url}{user_review_id}/', data={'score': 10})
+        title = self.get_title(title_id)
+        assert (title.rating_sum, title.rating_count) == (13, 2), (
+            'Проверьте, что при изменении оценки в отзыве рейтинг '
+            'произведения пересчитывается.'
+        )
+
+        moderator_client.delete(f'{url}{user_review_id}/')
+        title = self.get_title(title_id)
+        assert (title.rating_sum, title.rating_count) == (3, 1), (
+            'Проверьте, что при удалении отзыва его оценка вычитается из '
+            'рейтинга произведения.'
+        )
+
+        create_single_review(user_client, title_id, 'again', 1)
+        user.delete()
+        title = self.get_title(title_id)
+        assert (title.rating_sum, title.rating_count) == (3, 1), (
+            'Проверьте, что при каскадном удалении отзывов рейтинг '
+            'произведения пересчитывается.'
+        )
+
+        response = admin_client.get(f'/api/v1/titles/{title_id}/')
+        assert response.json()['rating'] == 3
+
+    def test_02_rating_without_reviews(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(admin_client, titles[0]['id'], 'text', 6)
+        admin_client.delete(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+            f'{self.get_title(titles[0]["id"]).reviews.get().id}/'
+        )
+        title = self.get_title(titles[0]['id'])
+        assert title.rating is None, (
+            'Проверьте, что у произведения без отзывов рейтинг равен `None`.'
+        )
+        assert title.rating_count == 0
+
+    def test_03_recompute_ratings_command(self, admin_client):
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(admin_client, titles[0]['id'], 'text', 7)
+        Title.objects.filter(pk=titles[0]['id']).update(
+            rating_sum=100, rating_count=4, rating=25
+        )
+
+        out = StringIO()
+        call_command('recompute_ratings', '--dry-run', stdout=out)
+        assert f'Title {titles[0]["id"]}' in out.getvalue()
+        assert self.get_title(titles[0]['id']).rating_sum == 100
+
+        call_command('recompute_ratings', stdout=StringIO())
+        title = self.get_title(titles[0]['id'])
+        assert (title.rating_sum, title.rating_count, title.rating) == (
+            7, 1, 7
+        ), (
+            'Проверьте, что команда `recompute_ratings` исправляет '
+            'расхождения рейтинга.'
+        )
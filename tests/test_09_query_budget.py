@@ -0,0 +1,140 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import (check_query_budget, create_comments, create_reviews,
+                         create_titles)
+
+# Допустимое число запросов к БД на один запрос к эндпоинту.
+QUERY_BUDGETS = {
+    # COUNT для пагинации, страница, связи страницы с жанрами.
+    '/api/v1/titles/': 3,
+    # Произведение, его связи с жанрами.
+    '/api/v1/titles/{title_id}/': 2,
+    # COUNT для пагинации, страница отзывов вместе с авторами.
+    '/api/v1/titles/{title_id}/reviews/': 2,
+    # Пустая страница и проверка существования произведения.
+    '/api/v1/titles/{title_id}/reviews/?empty': 3,
+    # COUNT для пагинации, страница комментариев вместе с авторами.
+    '/api/v1/titles/{title_id}/reviews/{review_id}/comments/': 2,
+    # Пользователь из токена, проверка пары произведение/отзыв, BEGIN,
+    # INSERT, запись в полнотекстовый индекс и обновление счётчика
+    # комментариев отзыва.
+    'POST /api/v1/titles/{title_id}/reviews/{review_id}/comments/': 6,
+}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09QueryBudget:
+
+    def create_many_titles(self, admin_client, amount):
+        from reviews.models import Category, Genre, GenreTitle, Title
+
+        create_titles(admin_client)
+        genres = list(Genre.objects.all())
+        categories = list(Category.objects.all())
+        titles = [
+            Title.objects.create(
+                name=f'title {idx}',
+                year=2000,
+                category=categories[idx % len(categories)]
+            )
+            for idx in range(amount)
+        ]
+        GenreTitle.objects.bulk_create(
+            GenreTitle(title=title, genre=genre)
+            for title in titles
+            for genre in genres
+        )
+
+    @pytest.mark.parametrize('page_size', (5, 50))
+    def test_01_titles_list_budget(self, client, admin_client, monkeypatch,
+                                   page_size):
+        from rest_framework.pagination import PageNumberPagination
+
+        monkeypatch.setattr(PageNumberPagination, 'page_size', page_size)
+        self.create_many_titles(admin_client, 60)
+        url = '/api/v1/titles/'
+        response = check_query_budget(client, url, QUERY_BUDGETS[url])
+        assert response.status_code == HTTPStatus.OK
+        assert len(response.json()['results']) == page_size
+
+    def test_02_title_detail_budget(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = '/api/v1/titles/{title_id}/'
+        response = check_query_budget(
+            client,
+            url.format(title_id=titles[0]['id']),
+            QUERY_BUDGETS[url]
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert len(response.json()['genre']) == 2
+
+    def test_03_reviews_list_budget(self, client, admin_client, admin,
+                                    user_client, user, moderator_client,
+                                    moderator):
+        reviews, titles = create_reviews(admin_client, {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        })
+        url = '/api/v1/titles/{title_id}/reviews/'
+        response = check_query_budget(
+            client, url.format(title_id=titles[0]['id']), QUERY_BUDGETS[url]
+        )
+        assert response.json()['count'] == 3
+        authors = {review['author'] for review in response.json()['results']}
+        assert authors == {admin.username, user.username, moderator.username}
+
+        response = check_query_budget(
+            client,
+            url.format(title_id=titles[1]['id']),
+            QUERY_BUDGETS[url + '?empty']
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['results'] == []
+        response = client.get(url.format(title_id=0))
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что список отзывов несуществующего произведения '
+            'возвращает ответ со статусом 404.'
+        )
+
+    def test_04_comments_budget(self, client, admin_client, admin,
+                                user_client, user, moderator_client,
+                                moderator):
+        comments, reviews, titles = create_comments(admin_client, {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        })
+        url = '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+        response = check_query_budget(
+            client,
+            url.format(title_id=titles[0]['id'], review_id=reviews[0]['id']),
+            QUERY_BUDGETS[url]
+        )
+        assert response.json()['count'] == 3
+
+        response = check_query_budget(
+            user_client,
+            url.format(title_id=titles[0]['id'], review_id=reviews[0]['id']),
+            QUERY_BUDGETS['POST ' + url],
+            method='post',
+            data={'text': 'new comment'}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json()['author'] == user.username
+
+        response = user_client.post(
+            url.format(title_id=titles[1]['id'], review_id=reviews[0]['id']),
+            data={'text': 'wrong title'}
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что POST-запрос к комментариям отзыва, который не '
+            'относится к произведению из URL, возвращает ответ со статусом '
+            '404.'
+        )
+        response = client.get(
+            url.format(title_id=titles[1]['id'], review_id=reviews[0]['id'])
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,219 @@
+from http import HTTPStatus
+
+import pytest
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10CursorPagination:
+
+    def create_reviews(self, django_user_model, title_id, amount):
+        from reviews.models import Review
+
+        for idx in range(amount):
+            author = django_user_model.objects.create_user(
+                username=f'author{idx}', email=f'author{idx}@yamdb.fake'
+            )
+            Review.objects.create(
+                author=author, title_id=title_id, text=f'text {idx}', score=5
+            )
+        return list(
+            Review.objects.filter(title_id=title_id)
+            .order_by('-pub_date', '-id')
+            .values_list('id', flat=True)
+        )
+
+    def collect_pages(self, client, url):
+        ids = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            data = response.json()
+            assert 'count' not in data, (
+                'Проверьте, что в режиме курсорной пагинации не выполняется '
+                'подсчёт `count`.'
+            )
+            ids.extend(item['id'] for item in data['results'])
+            url = data['next']
+        return ids
+
+    def test_01_reviews_cursor(self, client, admin_client, django_user_model):
+        titles, _, _ = create_titles(admin_client)
+        expected = self.create_reviews(
+            django_user_model, titles[0]['id'], 12
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/?pagination=cursor'
+        assert self.collect_pages(client, url) == expected, (
+            'Проверьте, что курсорная пагинация отзывов отдаёт все записи '
+            'по порядку (pub_date, id) без пропусков и повторов.'
+        )
+
+    def test_02_titles_cursor(self, client, admin_client):
+        create_titles(admin_client)
+        for idx in range(7):
+            admin_client.post('/api/v1/titles/', data={
+                'name': f'title {idx}',
+                'year': 2000,
+                'genre': [],
+                'category': 'films'
+            })
+        from reviews.models import Title
+
+        expected = list(
+            Title.objects.order_by('id').values_list('id', flat=True)
+        )
+        ids = self.collect_pages(client, '/api/v1/titles/?pagination=cursor')
+        assert ids == expected
+
+    def test_03_page_number_by_default(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/reviews/')
+        assert response.json()['count'] == 0, (
+            'Проверьте, что без параметра `pagination` используется '
+            'постраничная пагинация.'
+        )
+
+    def test_04_reviews_cursor_same_pub_date(self, client, admin_client,
+                                             django_user_model):
+        from django.utils import timezone
+        from reviews.models import Review
+
+        titles, _, _ = create_titles(admin_client)
+        self.create_reviews(django_user_model, titles[0]['id'], 12)
+        Review.objects.update(pub_date=timezone.now())
+        expected = list(
+            Review.objects.order_by('-id').values_list('id', flat=True)
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/?pagination=cursor'
+        response = client.get(url)
+        first_page = [item['id'] for item in response.json()['results']]
+        next_url = response.json()['next']
+        assert first_page == expected[:5]
+        assert self.collect_pages(client, next_url) == expected[5:], (
+            'Проверьте, что курсор отзывов учитывает id при одинаковом '
+            '`pub_date`: записи не пропадают и не повторяются.'
+        )
+        response = client.get(next_url)
+        previous = client.get(response.json()['previous'])
+        assert [item['id'] for item in previous.json()['results']] == (
+            first_page
+        ), (
+            'Проверьте, что ссылка `previous` при одинаковом `pub_date` '
+            'возвращает на предыдущую страницу.'
+        )
+        with CaptureQueriesContext(connection) as queries:
+            client.get(next_url)
+        assert not any(
+            'OFFSET' in query['sql'] and 'OFFSET 0' not in query['sql']
+            for query in queries.captured_queries
+        ), (
+            'Проверьте, что курсор не переходит к OFFSET при одинаковом '
+            '`pub_date`.'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10CachedCount:
+
+    def count_queries(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        count_queries = [
+            query for query in context.captured_queries
+            if 'COUNT(' in query['sql']
+        ]
+        return response.json(), len(count_queries)
+
+    def test_01_count_cached_and_invalidated(self, client, admin_client,
+                                             user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        admin_client.post(url, data={'text': 'text', 'score': 5})
+
+        data, queries = self.count_queries(client, url)
+        assert (data['count'], data['count_estimated'], queries) == (
+            1, False, 1
+        )
+        data, queries = self.count_queries(client, url)
+        assert (data['count'], queries) == (1, 0), (
+            'Проверьте, что повторный запрос списка отзывов берёт `count` '
+            'из кеша.'
+        )
+
+        user_client.post(url, data={'text': 'text', 'score': 5})
+        data, queries = self.count_queries(client, url)
+        assert (data['count'], queries) == (2, 1), (
+            'Проверьте, что добавление отзыва сбрасывает закешированный '
+            '`count`.'
+        )
+
+    def test_02_estimated_count(self, client, admin_client, user_client,
+                                moderator_client, settings, monkeypatch):
+        from api.v1 import pagination
+
+        # Оценка планировщика PostgreSQL.
+        monkeypatch.setattr(pagination, 'estimate_count', lambda qs: 1)
+        settings.PAGINATION_ESTIMATED_COUNT_THRESHOLD = 2
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        for author_client in (admin_client, user_client, moderator_client):
+            author_client.post(url, data={'text': 'text', 'score': 5})
+
+        data, _ = self.count_queries(client, url)
+        assert data['count'] == 3, (
+            'Проверьте, что оценка не меньше числа строк, посчитанного до '
+            'порога.'
+        )
+        assert data['count_estimated'] is True, (
+            'Проверьте, что при превышении порога в ответе указывается, что '
+            '`count` приблизительный.'
+        )
+        assert len(data['results']) == 3
+
+    def test_03_exact_count_without_estimator(self, client, admin_client,
+                                              user_client, moderator_client,
+                                              settings):
+        settings.PAGINATION_ESTIMATED_COUNT_THRESHOLD = 2
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        for author_client in (admin_client, user_client, moderator_client):
+            author_client.post(url, data={'text': 'text', 'score': 5})
+
+        data, _ = self.count_queries(client, url)
+        assert (data['count'], data['count_estimated']) == (3, False), (
+            'Проверьте, что на бэкенде без оценки планировщика `count` '
+            'считается точно.'
+        )
+        moderator_client.delete(f'{url}{data["results"][0]["id"]}/')
+        data, _ = self.count_queries(client, url)
+        assert (data['count'], data['count_estimated']) == (2, False), (
+            'Проверьте, что точный `count` сбрасывается при удалении отзыва.'
+        )
+
+    def test_04_edits_keep_plain_count(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        review = admin_client.post(
+            url, data={'text': 'первый текст', 'score': 5}
+        ).json()
+        search_url = f'{url}?search=второй'
+        assert self.count_queries(client, url)[0]['count'] == 1
+        assert self.count_queries(client, search_url)[0]['count'] == 0
+
+        admin_client.patch(
+            f'{url}{review["id"]}/', data={'text': 'второй текст'}
+        )
+        data, queries = self.count_queries(client, url)
+        assert (data['count'], queries) == (1, 0), (
+            'Проверьте, что редактирование отзыва не сбрасывает '
+            'закешированный `count` списка без поиска.'
+        )
+        data, queries = self.count_queries(client, search_url)
+        assert (data['count'], queries) == (1, 1), (
+            'Проверьте, что редактирование текста сбрасывает `count` '
+            'результатов поиска.'
+        )
@@ -0,0 +1,67 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import (check_query_budget, create_single_review,
+                         create_titles)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11TitleCache:
+
+    def test_01_cached_reads(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        for url in ('/api/v1/titles/', f'/api/v1/titles/{titles[0]["id"]}/'):
+            first = client.get(url)
+            second = check_query_budget(client, url, 0)
+            assert second.status_code == HTTPStatus.OK
+            assert second.json() == first.json(), (
+                f'Проверьте, что повторный GET-запрос к `{url}` отдаёт '
+                'закешированный ответ без запросов к БД.'
+            )
+
+    def test_02_review_invalidates_rating(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        detail_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        client.get('/api/v1/titles/')
+        client.get(detail_url)
+
+        create_single_review(admin_client, titles[0]['id'], 'text', 8)
+        assert client.get(detail_url).json()['rating'] == 8, (
+            'Проверьте, что после добавления отзыва закешированный рейтинг '
+            'произведения обновляется.'
+        )
+        ratings = {
+            title['id']: title['rating']
+            for title in client.get('/api/v1/titles/').json()['results']
+        }
+        assert ratings[titles[0]['id']] == 8
+
+    def test_03_other_titles_stay_cached(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        detail_url = f'/api/v1/titles/{titles[1]["id"]}/'
+        client.get(detail_url)
+        create_single_review(admin_client, titles[0]['id'], 'text', 8)
+        check_query_budget(client, detail_url, 0)
+
+    def test_04_dimension_writes_invalidate(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        detail_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        client.get(detail_url)
+
+        admin_client.patch(detail_url, data={'genre': [genres[2]['slug']]})
+        assert client.get(detail_url).json()['genre'] == [genres[2]], (
+            'Проверьте, что изменение жанров произведения сбрасывает кеш.'
+        )
+
+        admin_client.delete(f'/api/v1/categories/{categories[0]["slug"]}/')
+        assert client.get(detail_url).json()['category'] is None, (
+            'Проверьте, что удаление категории сбрасывает кеш произведений '
+            'этой категории.'
+        )
+
+        admin_client.delete(f'/api/v1/genres/{genres[2]["slug"]}/')
+        assert client.get(detail_url).json()['genre'] == [], (
+            'Проверьте, что удаление жанра сбрасывает кеш произведений '
+            'этого жанра.'
+        )
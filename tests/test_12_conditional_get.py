@@ -0,0 +1,195 @@
+import math
+import time
+from http import HTTPStatus
+from types import SimpleNamespace
+
+import pytest
+from django.utils.http import http_date
+
+from tests.utils import (check_query_budget, create_comments, create_reviews,
+                         create_single_comment)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """ Управляемое время версий данных и Last-Modified."""
+    from api.v1 import conditional, versions
+
+    fake = SimpleNamespace(now=time.time(), time_ns=time.time_ns)
+    fake.time = lambda: fake.now
+    monkeypatch.setattr(versions, 'time', fake)
+    monkeypatch.setattr(conditional, 'time', fake)
+    return fake
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12ConditionalGet:
+
+    def test_01_reviews_not_modified(self, client, admin_client, admin,
+                                     user_client, user, clock):
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+
+        client.get(url)
+        clock.now += 1
+        response = client.get(url)
+        etag = response['ETag']
+        assert etag and response.has_header('Last-Modified'), (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовки `ETag` и `Last-Modified`.'
+        )
+        response = check_query_budget(
+            client, url, 0, HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным '
+            '`If-None-Match` возвращает ответ со статусом 304.'
+        )
+        response = client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+        detail_url = f'{url}{reviews[0]["id"]}/'
+        detail_etag = client.get(detail_url)['ETag']
+        admin_client.patch(detail_url, data={'text': 'new text'})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после редактирования отзыва GET-запрос со '
+            'старым `If-None-Match` возвращает ответ со статусом 200.'
+        )
+        response = client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['text'] == 'new text'
+
+    def test_02_comments_not_modified(self, client, admin_client, admin):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client}
+        )
+        url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+            f'{reviews[0]["id"]}/comments/'
+        )
+        etag = client.get(url)['ETag']
+        assert client.get(
+            url, HTTP_IF_NONE_MATCH=etag
+        ).status_code == HTTPStatus.NOT_MODIFIED
+
+        create_single_comment(
+            admin_client, titles[0]['id'], reviews[0]['id'], 'new'
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после добавления комментария GET-запрос со '
+            'старым `If-None-Match` возвращает ответ со статусом 200.'
+        )
+        assert response.json()['count'] == 2
+
+    def test_03_username_change_invalidates(self, client, admin_client, admin,
+                                            django_user_model):
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        etag = client.get(url)['ETag']
+        admin_client.patch('/api/v1/users/me/', data={'bio': 'new bio'})
+        django_user_model.objects.create_user(
+            username='newcomer', email='newcomer@yamdb.fake'
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что ETag списка отзывов не меняется, если имена '
+            'пользователей остались прежними.'
+        )
+        admin_client.patch('/api/v1/users/me/', data={'username': 'renamed'})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['results'][0]['author'] == 'renamed'
+
+    def test_04_categories_not_modified(self, client, admin_client):
+        url = '/api/v1/categories/'
+        etag = client.get(url)['ETag']
+        assert client.get(
+            url, HTTP_IF_NONE_MATCH=etag
+        ).status_code == HTTPStatus.NOT_MODIFIED
+        admin_client.post(url, data={'name': 'Музыка', 'slug': 'music'})
+        assert client.get(
+            url, HTTP_IF_NONE_MATCH=etag
+        ).status_code == HTTPStatus.OK
+
+    def test_05_expanded_review_in_comments(self, client, admin_client,
+                                            admin):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client}
+        )
+        review_url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+        )
+        url = f'{review_url}comments/'
+        plain_etag = client.get(url)['ETag']
+        response = client.get(url, {'expand': 'review'})
+        etag = response['ETag']
+        score = response.json()['results'][0]['review']['score']
+
+        new_score = 1 if score != 1 else 2
+        response = admin_client.patch(review_url, data={'score': new_score})
+        assert response.status_code == HTTPStatus.OK
+        response = client.get(
+            url, {'expand': 'review'}, HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после изменения отзыва список комментариев с '
+            '`?expand=review` не отдаётся из кеша клиента (304).'
+        )
+        assert response.json()['results'][0]['review']['score'] == new_score
+        assert client.get(
+            url, HTTP_IF_NONE_MATCH=plain_etag
+        ).status_code == HTTPStatus.NOT_MODIFIED
+
+    def test_06_last_modified_within_second(self, client, admin_client,
+                                            admin, clock):
+        clock.now = math.floor(clock.now) + 0.2
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        clock.now += 0.3
+        assert not client.get(url).has_header('Last-Modified'), (
+            'Проверьте, что `Last-Modified` не отдаётся для данных, '
+            'изменённых в текущую секунду.'
+        )
+
+        clock.now += 1
+        last_modified = client.get(url)['Last-Modified']
+        assert last_modified == http_date(math.ceil(clock.now - 1))
+        admin_client.patch(
+            f'{url}{reviews[0]["id"]}/', data={'text': 'new text'}
+        )
+        clock.now += 0.1
+        response = client.get(
+            url, HTTP_IF_MODIFIED_SINCE=http_date(math.ceil(clock.now))
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение в ту же секунду, что и предыдущий '
+            'ответ, не даёт 304 по `If-Modified-Since`.'
+        )
+        assert response.json()['results'][0]['text'] == 'new text'
+
+    def test_07_usernames_version_after_write(self, admin):
+        from django.db import connection
+
+        from api.v1.conditional import USERNAMES_VERSION
+        from api.v1.versions import get_version
+
+        before = get_version(USERNAMES_VERSION)
+        seen = []
+
+        def record_version(execute, sql, params, many, context):
+            if sql.startswith('UPDATE'):
+                seen.append(get_version(USERNAMES_VERSION))
+            return execute(sql, params, many, context)
+
+        admin.username = 'renamed'
+        with connection.execute_wrapper(record_version):
+            admin.save()
+        assert seen == [before], (
+            'Проверьте, что версия имён пользователей увеличивается после '
+            'записи нового имени, а не до неё.'
+        )
+        assert get_version(USERNAMES_VERSION) != before
@@ -0,0 +1,61 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13TitleSearch:
+
+    def search(self, client, query):
+        response = client.get('/api/v1/titles/', {'search': query})
+        assert response.status_code == HTTPStatus.OK
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_search_name_and_description(self, client, admin_client):
+        create_titles(admin_client)
+        assert self.search(client, 'терминатор') == ['Терминатор'], (
+            'Проверьте, что `?search=` ищет по названию произведения без '
+            'учёта регистра.'
+        )
+        assert self.search(client, 'yippie') == ['Крепкий орешек'], (
+            'Проверьте, что `?search=` ищет по описанию произведения.'
+        )
+        assert self.search(client, 'крепк') == ['Крепкий орешек'], (
+            'Проверьте, что последнее слово запроса ищется по префиксу.'
+        )
+        assert self.search(client, 'be "back') == ['Терминатор']
+        assert self.search(client, '***') == []
+
+    def test_02_search_ranked(self, client, admin_client):
+        create_titles(admin_client)
+        for name, description in (
+            ('Орешек', 'Про белок'),
+            ('Белка', 'Белка нашла орешек'),
+        ):
+            admin_client.post('/api/v1/titles/', data={
+                'name': name,
+                'year': 2000,
+                'genre': ['comedy'],
+                'category': 'films',
+                'description': description
+            })
+        assert self.search(client, 'орешек') == [
+            'Орешек', 'Крепкий орешек', 'Белка'
+        ], (
+            'Проверьте, что результаты поиска отсортированы по '
+            'релевантности: совпадения в названии выше совпадений в '
+            'описании.'
+        )
+
+    def test_03_index_follows_writes(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        admin_client.patch(url, data={'name': 'Чужой'})
+        assert self.search(client, 'терминатор') == []
+        assert self.search(client, 'чужой') == ['Чужой']
+        admin_client.delete(url)
+        assert self.search(client, 'чужой') == [], (
+            'Проверьте, что удалённые произведения исчезают из поиска.'
+        )
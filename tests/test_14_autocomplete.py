@@ -0,0 +1,95 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import check_query_budget, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14Autocomplete:
+    url = '/api/v1/autocomplete/'
+
+    def names(self, client, **params):
+        response = client.get(self.url, params)
+        assert response.status_code == HTTPStatus.OK
+        return [(item['type'], item['name']) for item in response.json()[
+            'results'
+        ]]
+
+    def test_01_autocomplete(self, client, admin_client):
+        create_titles(admin_client)
+        assert self.names(client, q='к') == [
+            ('category', 'Книги'),
+            ('genre', 'Комедия'),
+            ('title', 'Крепкий орешек')
+        ], (
+            'Проверьте, что автодополнение ищет по названиям произведений, '
+            'жанров и категорий без учёта регистра.'
+        )
+        assert self.names(client, q='ореш') == [
+            ('title', 'Крепкий орешек')
+        ], (
+            'Проверьте, что автодополнение находит произведение по началу '
+            'любого слова названия.'
+        )
+        assert self.names(client, q='к', type='category') == [
+            ('category', 'Книги')
+        ]
+        assert len(self.names(client, q='К', limit=2)) == 2
+        response = client.get(self.url, {'q': 'к', 'limit': 1000})
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что число подсказок ограничено.'
+        )
+
+    def test_02_incremental_updates(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        self.names(client, q='т')
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/', data={'name': 'Чужой'}
+        )
+        assert self.names(client, q='терм') == []
+        assert self.names(client, q='чуж') == [('title', 'Чужой')], (
+            'Проверьте, что индекс автодополнения обновляется при '
+            'изменении произведения.'
+        )
+        admin_client.delete('/api/v1/genres/comedy/')
+        assert self.names(client, q='комед') == []
+        check_query_budget(client, f'{self.url}?q=чуж', 0)
+
+    def test_03_lookup_complexity(self, admin_client):
+        from api.v1.autocomplete import PrefixIndex
+        from reviews.models import Title
+
+        class CountingList(list):
+            reads = 0
+
+            def __getitem__(self, index):
+                CountingList.reads += 1
+                return super().__getitem__(index)
+
+        titles = 5000
+        limit = 10
+        Title.objects.bulk_create(
+            Title(name=f'Название {idx} часть {idx % 97}', year=2000)
+            for idx in range(titles)
+        )
+        index = PrefixIndex()
+        index.rebuild()
+        index.keys = {
+            kind: CountingList(keys) for kind, keys in index.keys.items()
+        }
+        size = max(len(keys) for keys in index.keys.values())
+        with CaptureQueriesContext(connection) as context:
+            results = index.lookup('часть 5', limit)
+        assert len(results) == limit
+        assert len(context) == 0, (
+            'Проверьте, что автодополнение не обращается к БД.'
+        )
+        budget = len(index.keys) * (size.bit_length() + limit + 1)
+        assert CountingList.reads <= budget, (
+            f'Поиск прочитал {CountingList.reads} ключей, ожидается не '
+            f'больше {budget}: двоичный поиск и не более `limit` ключей '
+            'в каждом списке.'
+        )
@@ -0,0 +1,46 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import check_query_budget, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15TitleGenreFilter:
+
+    def names(self, client, query):
+        response = client.get(f'/api/v1/titles/?{query}')
+        assert response.status_code == HTTPStatus.OK
+        return sorted(title['name'] for title in response.json()['results'])
+
+    def test_01_any_genre(self, client, admin_client):
+        create_titles(admin_client)
+        assert self.names(client, 'genre=horror,comedy') == ['Терминатор'], (
+            'Проверьте, что фильтр `genre` не возвращает дубли произведений, '
+            'подходящих под несколько жанров.'
+        )
+        assert self.names(client, 'genre=comedy,drama') == [
+            'Крепкий орешек', 'Терминатор'
+        ]
+        assert self.names(client, 'genre=unknown') == []
+
+    def test_02_all_genres(self, client, admin_client):
+        create_titles(admin_client)
+        assert self.names(client, 'genre_all=horror,comedy') == [
+            'Терминатор'
+        ], (
+            'Проверьте, что фильтр `genre_all` возвращает произведения со '
+            'всеми перечисленными жанрами.'
+        )
+        assert self.names(client, 'genre_all=horror,drama') == []
+        assert self.names(client, 'genre_all=horror,unknown') == []
+        assert self.names(client, 'genre=drama&genre_all=drama') == [
+            'Крепкий орешек'
+        ]
+
+    def test_03_genre_ids_resolved_once(self, client, admin_client):
+        create_titles(admin_client)
+        # Жанры, COUNT, страница, жанры страницы.
+        check_query_budget(
+            client, '/api/v1/titles/?genre=horror,drama&genre_all=comedy', 4
+        )
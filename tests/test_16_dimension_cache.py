@@ -0,0 +1,49 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16DimensionCache:
+
+    def test_01_write_resolves_slugs_from_cache(self, admin_client):
+        create_titles(admin_client)
+        data = {
+            'name': 'Чужой',
+            'year': 1979,
+            'genre': ['horror', 'drama'],
+            'category': 'films'
+        }
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == HTTPStatus.CREATED
+        assert sorted(
+            genre['slug'] for genre in response.json()['genre']
+        ) == ['drama', 'horror']
+        lookups = [
+            query['sql'] for query in context.captured_queries
+            if '"slug"' in query['sql']
+        ]
+        assert lookups == [], (
+            'Проверьте, что жанры и категории при записи произведения '
+            'берутся из кеша, а не запрашиваются по slug.'
+        )
+
+    def test_02_cache_invalidated_on_write(self, client, admin_client):
+        from reviews.models import Genre
+
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[1]["id"]}/'
+        assert client.get(url).json()['genre'][0]['name'] == 'Драма'
+        genre = Genre.objects.get(slug='drama')
+        genre.name = 'Трагедия'
+        genre.save()
+        assert client.get(url).json()['genre'][0]['name'] == 'Трагедия', (
+            'Проверьте, что кеш жанров сбрасывается при их изменении.'
+        )
+        response = admin_client.patch(url, data={'genre': ['unknown']})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
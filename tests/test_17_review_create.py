@@ -0,0 +1,74 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import check_query_budget, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17ReviewCreate:
+
+    def test_01_duplicate_review_by_constraint(self, admin_client,
+                                               user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        data = {'text': 'text', 'score': 5}
+        # Пользователь из токена, проверка произведения, BEGIN, INSERT,
+        # запись в полнотекстовый индекс, обновление рейтинга и рейтинги
+        # лучших произведений, в которые оно попадает, — без
+        # предварительного exists() по отзывам.
+        response = check_query_budget(
+            user_client, url, 7, method='post', data=data
+        )
+        assert response.status_code == HTTPStatus.CREATED
+
+        response = user_client.post(url, data=data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.json() == {'non_field_errors': [
+            'Пользователь может добавить лишь один отзыв на произведение.'
+        ]}, (
+            'Проверьте, что повторный отзыв пользователя на произведение '
+            'возвращает прежнее сообщение об ошибке.'
+        )
+        from reviews.models import Title
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (5, 1), (
+            'Проверьте, что отклонённый отзыв не меняет рейтинг.'
+        )
+
+    def test_02_idempotency_key(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        data = {'text': 'text', 'score': 5}
+        first = user_client.post(url, data=data, HTTP_IDEMPOTENCY_KEY='abc')
+        assert first.status_code == HTTPStatus.CREATED
+
+        # Остаётся только запрос пользователя из токена.
+        retry = check_query_budget(
+            user_client, url, 1, method='post', data=data,
+            HTTP_IDEMPOTENCY_KEY='abc'
+        )
+        assert retry.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что повторный POST-запрос с тем же '
+            '`Idempotency-Key` возвращает исходный ответ.'
+        )
+        assert retry.json() == first.json()
+        assert retry['Idempotent-Replayed'] == 'true'
+
+        response = user_client.post(
+            url, data={'text': 'other', 'score': 1},
+            HTTP_IDEMPOTENCY_KEY='abc'
+        )
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+        response = user_client.post(
+            url, data=data, HTTP_IDEMPOTENCY_KEY='other-key'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        response = admin_client.post(
+            url, data=data, HTTP_IDEMPOTENCY_KEY='abc'
+        )
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что ключи идемпотентности разных пользователей '
+            'не пересекаются.'
+        )
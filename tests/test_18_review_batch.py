@@ -0,0 +1,119 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import check_query_budget, create_titles
+
+URL = '/api/v1/reviews/batch/'
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18ReviewBatch:
+
+    def test_01_not_auth(self, client):
+        response = client.post(URL, data={'reviews': []}, format='json')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            f'Проверьте, что POST-запрос неавторизованного пользователя к '
+            f'`{URL}` возвращает ответ со статусом 401.'
+        )
+
+    def test_02_batch_results(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        first, second = titles[0]['id'], titles[1]['id']
+        response = user_client.post(
+            f'/api/v1/titles/{second}/reviews/',
+            data={'text': 'old', 'score': 2}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        data = {'reviews': [
+            {'title_id': first, 'text': 'one', 'score': 10},
+            {'title_id': first, 'text': 'again', 'score': 1},
+            {'title_id': second, 'text': 'two', 'score': 5},
+            {'title_id': 9999, 'text': 'none', 'score': 5},
+            {'title_id': first, 'text': 'bad', 'score': 11},
+        ]}
+        response = user_client.post(URL, data=data, format='json')
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что POST-запрос к `{URL}` возвращает ответ со '
+            'статусом 200 и результатом для каждого отзыва.'
+        )
+        results = response.json()['results']
+        statuses = [result['status'] for result in results]
+        assert statuses == [
+            HTTPStatus.CREATED,
+            HTTPStatus.BAD_REQUEST,
+            HTTPStatus.BAD_REQUEST,
+            HTTPStatus.NOT_FOUND,
+            HTTPStatus.BAD_REQUEST
+        ], (
+            'Проверьте, что результаты пакета возвращаются в порядке '
+            'запроса: созданный отзыв, повторы, неизвестное произведение '
+            'и невалидная оценка.'
+        )
+        created = results[0]['review']
+        assert created['text'] == 'one'
+        assert created['score'] == 10
+        assert created['author'] == 'TestUser'
+        assert 'score' in results[4]['errors']
+
+        from reviews.models import Review, Title
+        assert Review.objects.filter(title_id=first).count() == 1
+        title = Title.objects.get(pk=first)
+        assert (title.rating_sum, title.rating_count) == (10, 1), (
+            'Проверьте, что пакет обновляет рейтинг произведения.'
+        )
+
+    def test_03_query_budget(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        data = {'reviews': [
+            {'title_id': title['id'], 'text': 'text', 'score': 4}
+            for title in titles
+        ]}
+        # Пользователь из токена, проверка произведений и отзывов, BEGIN,
+        # INSERT, обновление рейтинга каждого произведения, запись в
+        # полнотекстовый индекс, чтение созданных отзывов и рейтинги
+        # лучших произведений, в которые попадают произведения.
+        budget = 8 + len(titles)
+        response = check_query_budget(
+            user_client, URL, budget, method='post', data=data,
+            format='json'
+        )
+        assert response.status_code == HTTPStatus.OK
+        statuses = {result['status'] for result in response.json()['results']}
+        assert statuses == {HTTPStatus.CREATED}
+
+    def test_04_invalidates_lists(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        reviews_url = f'/api/v1/titles/{title_id}/reviews/'
+        title_url = f'/api/v1/titles/{title_id}/'
+        assert admin_client.get(reviews_url).json()['count'] == 0
+        assert admin_client.get(title_url).json()['rating'] is None
+
+        data = {'reviews': [{'title_id': title_id, 'text': 't', 'score': 7}]}
+        response = user_client.post(URL, data=data, format='json')
+        assert response.status_code == HTTPStatus.OK
+
+        assert admin_client.get(reviews_url).json()['count'] == 1, (
+            'Проверьте, что после пакетного создания отзывов сбрасывается '
+            'закэшированное число отзывов.'
+        )
+        assert admin_client.get(title_url).json()['rating'] == 7, (
+            'Проверьте, что после пакетного создания отзывов сбрасывается '
+            'кэш произведения.'
+        )
+
+    def test_05_batch_limits(self, user_client, settings):
+        response = user_client.post(
+            URL, data={'reviews': []}, format='json'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что пустой пакет отклоняется.'
+        )
+        data = {'reviews': [
+            {'title_id': 1, 'text': 't', 'score': 1}
+        ] * (settings.REVIEW_BATCH_MAX_SIZE + 1)}
+        response = user_client.post(URL, data=data, format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что слишком большой пакет отклоняется.'
+        )
@@ -0,0 +1,158 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import check_query_budget, create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19ScoreHistogram:
+
+    def get_histogram(self, title_id):
+        from reviews.models import Title
+        return Title.objects.get(pk=title_id).score_histogram
+
+    def test_01_histogram_follows_review_writes(self, admin_client,
+                                                user_client,
+                                                moderator_client, user):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/reviews/'
+
+        create_single_review(admin_client, title_id, 'first', 3)
+        response = create_single_review(user_client, title_id, 'second', 8)
+        review_id = response.json()['id']
+        histogram = self.get_histogram(title_id)
+        assert (histogram[3], histogram[8]) == (1, 1), (
+            'Проверьте, что при создании отзыва его оценка попадает в '
+            'гистограмму произведения.'
+        )
+        assert sum(histogram.values()) == 2
+
+        user_client.patch(f'{url}{review_id}/', data={'score': 10})
+        histogram = self.get_histogram(title_id)
+        assert (histogram[8], histogram[10]) == (0, 1), (
+            'Проверьте, что при изменении оценки отзыв переносится в '
+            'другой столбец гистограммы.'
+        )
+
+        moderator_client.delete(f'{url}{review_id}/')
+        assert self.get_histogram(title_id)[10] == 0, (
+            'Проверьте, что при удалении отзыва его оценка вычитается из '
+            'гистограммы.'
+        )
+
+        create_single_review(user_client, title_id, 'again', 1)
+        user.delete()
+        histogram = self.get_histogram(title_id)
+        assert histogram[1] == 0
+        assert sum(histogram.values()) == 1
+
+    def test_02_scores_endpoint(self, client, admin_client, user_client,
+                                moderator_client, user_superuser_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/scores/'
+
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` доступен без токена.'
+        )
+        assert response.json()['count'] == 0
+        assert response.json()['mean'] is None
+        assert response.json()['median'] is None
+
+        create_single_review(admin_client, title_id, 'text', 2)
+        create_single_review(user_client, title_id, 'text', 9)
+        create_single_review(moderator_client, title_id, 'text', 9)
+        # Произведение читается одним запросом, без агрегации отзывов.
+        response = check_query_budget(client, url, 1)
+        data = response.json()
+        assert data['count'] == 3
+        assert data['mean'] == pytest.approx(20 / 3)
+        assert data['median'] == 9, (
+            'Проверьте, что медиана нечётного числа оценок — средняя '
+            'оценка.'
+        )
+        expected = {str(score): 0 for score in range(1, 11)}
+        expected.update({'2': 1, '9': 2})
+        assert data['histogram'] == expected
+
+        create_single_review(user_superuser_client, title_id, 'text', 4)
+        data = client.get(url).json()
+        assert data['median'] == 6.5, (
+            'Проверьте, что медиана чётного числа оценок — среднее двух '
+            'средних оценок.'
+        )
+
+        response = client.get('/api/v1/titles/9999/scores/')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_03_recompute_fixes_histogram(self, admin_client):
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(admin_client, title_id, 'text', 7)
+        Title.objects.filter(pk=title_id).update(
+            score_7_count=0, score_1_count=3
+        )
+
+        out = StringIO()
+        call_command('recompute_ratings', '--dry-run', stdout=out)
+        assert f'Title {title_id}' in out.getvalue(), (
+            'Проверьте, что команда `recompute_ratings` находит '
+            'расхождения гистограммы.'
+        )
+
+        call_command('recompute_ratings', stdout=StringIO())
+        histogram = self.get_histogram(title_id)
+        assert (histogram[1], histogram[7]) == (0, 1), (
+            'Проверьте, что команда `recompute_ratings` исправляет '
+            'гистограмму.'
+        )
+
+    def test_04_zero_score_rejected(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/reviews/'
+
+        response = user_client.post(url, data={'text': 'text', 'score': 0})
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что отзыв с оценкой 0 отклоняется со статусом 400: '
+            'в гистограмме есть только оценки от 1 до 10.'
+        )
+        response = create_single_review(user_client, title_id, 'text', 5)
+        response = user_client.patch(
+            f'{url}{response.json()["id"]}/', data={'score': 0}
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert sum(self.get_histogram(title_id).values()) == 1
+
+    def test_05_migration_clamps_zero_scores(self, admin_client):
+        from importlib import import_module
+
+        from django.apps import apps
+        from reviews.models import Review, Title
+
+        migration = import_module(
+            'reviews.migrations.0014_title_score_histogram'
+        )
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(admin_client, title_id, 'text', 4)
+        Review.objects.update(score=0)
+        Title.objects.filter(pk=title_id).update(
+            rating_sum=0, score_4_count=0
+        )
+
+        migration.clamp_scores(apps, None)
+        migration.fill_histograms(apps, None)
+        title = Title.objects.get(pk=title_id)
+        assert (title.rating_sum, title.rating_count) == (1, 1), (
+            'Проверьте, что миграция 0014 приводит оценку 0 к 1 и '
+            'пересчитывает рейтинг произведения.'
+        )
+        assert title.score_histogram[1] == 1
@@ -0,0 +1,199 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import check_query_budget, create_single_review, create_titles
+
+URL = '/api/v1/leaderboards/'
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20Leaderboards:
+
+    @pytest.fixture
+    def rated_titles(self, admin_client, user_client, moderator_client,
+                     user_superuser_client, settings):
+        """ Одна десятка у первого произведения, четыре девятки у второго
+        и четыре единицы у третьего: средняя по каталогу 50 / 9."""
+        settings.LEADERBOARD_MIN_VOTES = 5
+        titles, _, _ = create_titles(admin_client)
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Фильм 3',
+            'year': 2000,
+            'genre': ['drama'],
+            'category': 'books'
+        })
+        assert response.status_code == HTTPStatus.CREATED
+        titles.append(response.json())
+        clients = (
+            admin_client, user_client, moderator_client,
+            user_superuser_client
+        )
+        create_single_review(admin_client, titles[0]['id'], 'text', 10)
+        reviews = [
+            create_single_review(client, titles[1]['id'], 'text', 9).json()
+            for client in clients
+        ]
+        for client in clients:
+            create_single_review(client, titles[2]['id'], 'text', 1)
+        return [title['id'] for title in titles], reviews
+
+    def get_ids(self, client, url):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+            'статусом 200.'
+        )
+        return [title['id'] for title in response.json()['results']]
+
+    def test_01_bayesian_order(self, client, rated_titles):
+        title_ids, _ = rated_titles
+        response = client.get(URL)
+        assert response.status_code == HTTPStatus.OK
+        results = response.json()['results']
+        assert [title['id'] for title in results] == [
+            title_ids[1], title_ids[0], title_ids[2]
+        ], (
+            'Проверьте, что произведения упорядочены по байесовскому '
+            'рейтингу: одна десятка не обгоняет четыре девятки.'
+        )
+        prior = 50 / 9
+        assert results[0]['weighted_rating'] == pytest.approx(
+            (36 + 5 * prior) / 9
+        )
+        assert results[0]['name'] == 'Крепкий орешек'
+        assert results[0]['genre'] == [{'name': 'Драма', 'slug': 'drama'}]
+
+        assert self.get_ids(client, f'{URL}?limit=1') == [title_ids[1]]
+        assert client.get(f'{URL}?limit=0').status_code == (
+            HTTPStatus.BAD_REQUEST
+        )
+
+    def test_02_genre_and_category(self, client, rated_titles):
+        title_ids, _ = rated_titles
+        assert self.get_ids(client, f'{URL}genres/drama/') == [
+            title_ids[1], title_ids[2]
+        ], 'Проверьте рейтинг произведений жанра.'
+        assert self.get_ids(client, f'{URL}categories/films/') == [
+            title_ids[0]
+        ], 'Проверьте рейтинг произведений категории.'
+        assert self.get_ids(client, f'{URL}genres/comedy/') == [
+            title_ids[0]
+        ]
+        response = client.get(f'{URL}genres/unknown/')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_03_incremental_update(self, admin_client, client, user_client,
+                                   rated_titles):
+        title_ids, reviews = rated_titles
+        assert self.get_ids(client, URL)[0] == title_ids[1]
+        review_id = reviews[1]['id']
+        response = user_client.patch(
+            f'/api/v1/titles/{title_ids[1]}/reviews/{review_id}/',
+            data={'score': 1}
+        )
+        assert response.status_code == HTTPStatus.OK
+
+        # Изменённые произведения (два запроса) и страница рейтинга
+        # (произведения с жанрами) — без пересчёта всего рейтинга.
+        response = check_query_budget(client, URL, 4)
+        assert [title['id'] for title in response.json()['results']] == [
+            title_ids[0], title_ids[1], title_ids[2]
+        ], (
+            'Проверьте, что рейтинг обновляется после изменения отзыва.'
+        )
+
+        etag = response['ETag']
+        response = client.get(URL, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+        response = admin_client.delete(f'/api/v1/titles/{title_ids[0]}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert title_ids[0] not in self.get_ids(client, URL), (
+            'Проверьте, что удалённое произведение пропадает из рейтинга.'
+        )
+
+    def test_04_bounded_size(self, client, user_client, rated_titles,
+                             settings):
+        title_ids, reviews = rated_titles
+        settings.LEADERBOARD_SIZE = 1
+        assert self.get_ids(client, URL) == [title_ids[1]]
+        user_client.patch(
+            f'/api/v1/titles/{title_ids[1]}/reviews/{reviews[1]["id"]}/',
+            data={'score': 1}
+        )
+        assert self.get_ids(client, URL) == [title_ids[0]], (
+            'Проверьте, что рейтинг, из которого выбыло произведение, '
+            'достраивается до нужного размера.'
+        )
+
+    def test_05_genre_change(self, admin_client, client, rated_titles):
+        title_ids, _ = rated_titles
+        assert self.get_ids(client, f'{URL}genres/drama/') == [
+            title_ids[1], title_ids[2]
+        ]
+        response = admin_client.patch(
+            f'/api/v1/titles/{title_ids[2]}/', data={'genre': ['horror']}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert self.get_ids(client, f'{URL}genres/drama/') == [
+            title_ids[1]
+        ], (
+            'Проверьте, что рейтинг жанра обновляется при изменении '
+            'жанров произведения.'
+        )
+        assert self.get_ids(client, f'{URL}genres/horror/') == [
+            title_ids[0], title_ids[2]
+        ]
+
+    def test_06_boards_versioned_by_scope(self, client, user_client,
+                                          rated_titles):
+        title_ids, reviews = rated_titles
+        etags = {
+            url: client.get(url)['ETag'] for url in (
+                URL, f'{URL}genres/drama/', f'{URL}genres/comedy/',
+                f'{URL}categories/films/'
+            )
+        }
+        user_client.patch(
+            f'/api/v1/titles/{title_ids[1]}/reviews/{reviews[1]["id"]}/',
+            data={'score': 1}
+        )
+        statuses = {
+            url: client.get(url, HTTP_IF_NONE_MATCH=etag).status_code
+            for url, etag in etags.items()
+        }
+        assert statuses == {
+            URL: HTTPStatus.OK,
+            f'{URL}genres/drama/': HTTPStatus.OK,
+            f'{URL}genres/comedy/': HTTPStatus.NOT_MODIFIED,
+            f'{URL}categories/films/': HTTPStatus.NOT_MODIFIED,
+        }, (
+            'Проверьте, что отзыв меняет версии только тех рейтингов, в '
+            'которые попадает произведение.'
+        )
+
+    def test_07_prior_refresh_changes_etag(self, client, rated_titles):
+        from api.v1.leaderboards import PRIOR_KEY
+        from django.core.cache import cache
+        from reviews.models import Title
+
+        title_ids, _ = rated_titles
+        url = f'{URL}categories/films/'
+        response = client.get(url)
+        etag = response['ETag']
+        rating = response.json()['results'][0]['weighted_rating']
+        # Средняя по каталогу меняется, но рейтинг категории — нет.
+        Title.objects.filter(pk=title_ids[2]).update(rating_sum=40)
+        assert client.get(
+            url, HTTP_IF_NONE_MATCH=etag
+        ).status_code == HTTPStatus.NOT_MODIFIED
+
+        # Таймаут средней по каталогу истёк.
+        cache.delete(PRIOR_KEY)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что пересчёт средней по каталогу меняет ETag '
+            'рейтингов.'
+        )
+        assert response.json()['results'][0]['weighted_rating'] != rating
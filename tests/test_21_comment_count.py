@@ -0,0 +1,153 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import (create_single_comment, create_single_review,
+                         create_titles)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21CommentCount:
+
+    def get_count(self, review_id):
+        from reviews.models import Review
+        return Review.objects.get(pk=review_id).comment_count
+
+    def test_01_count_follows_comment_writes(self, admin_client,
+                                             user_client, user):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review = create_single_review(admin_client, title_id, 'text', 5)
+        review_id = review.json()['id']
+        assert review.json()['comment_count'] == 0, (
+            'Проверьте, что в ответе на создание отзыва есть поле '
+            '`comment_count`.'
+        )
+        url = f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+
+        first = create_single_comment(admin_client, title_id, review_id,
+                                      'first').json()
+        create_single_comment(user_client, title_id, review_id, 'second')
+        assert self.get_count(review_id) == 2, (
+            'Проверьте, что при создании комментария увеличивается '
+            'счётчик комментариев отзыва.'
+        )
+
+        response = admin_client.patch(f'{url}{first["id"]}/',
+                                      data={'text': 'edited'})
+        assert response.status_code == HTTPStatus.OK
+        assert self.get_count(review_id) == 2
+
+        admin_client.delete(f'{url}{first["id"]}/')
+        assert self.get_count(review_id) == 1, (
+            'Проверьте, что при удалении комментария счётчик уменьшается.'
+        )
+
+        user.delete()
+        assert self.get_count(review_id) == 0, (
+            'Проверьте, что при каскадном удалении комментариев счётчик '
+            'уменьшается.'
+        )
+
+    def test_02_count_in_review_list(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review_id = create_single_review(
+            admin_client, title_id, 'text', 5
+        ).json()['id']
+        url = f'/api/v1/titles/{title_id}/reviews/'
+
+        response = user_client.get(url)
+        assert response.json()['results'][0]['comment_count'] == 0
+        etag = response['ETag']
+
+        create_single_comment(user_client, title_id, review_id, 'comment')
+        response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после добавления комментария список отзывов '
+            'произведения не отдаётся из кеша клиента (304).'
+        )
+        assert response.json()['results'][0]['comment_count'] == 1, (
+            'Проверьте, что в списке отзывов выводится число комментариев.'
+        )
+        response = user_client.get(f'{url}{review_id}/')
+        assert response.json()['comment_count'] == 1
+
+    def test_03_recompute_comment_counts(self, admin_client):
+        from reviews.models import Review
+
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review_id = create_single_review(
+            admin_client, title_id, 'text', 5
+        ).json()['id']
+        create_single_comment(admin_client, title_id, review_id, 'comment')
+        Review.objects.filter(pk=review_id).update(comment_count=7)
+
+        out = StringIO()
+        call_command('recompute_comment_counts', '--dry-run', stdout=out)
+        assert f'Review {review_id}' in out.getvalue()
+        assert self.get_count(review_id) == 7
+
+        call_command('recompute_comment_counts', stdout=StringIO())
+        assert self.get_count(review_id) == 1, (
+            'Проверьте, что команда `recompute_comment_counts` исправляет '
+            'счётчики комментариев.'
+        )
+
+    def test_04_cascade_delete_updates_counts_in_bulk(
+        self, admin_client, user_client, user, admin
+    ):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from reviews.models import Review
+        from reviews.signals import cascade_deleting
+
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review_id = create_single_review(
+            admin_client, title_id, 'text', 5
+        ).json()['id']
+        own_review_id = create_single_review(
+            user_client, title_id, 'text', 5
+        ).json()['id']
+        for idx in range(3):
+            create_single_comment(user_client, title_id, review_id, f'{idx}')
+            create_single_comment(
+                admin_client, title_id, own_review_id, f'{idx}'
+            )
+
+        def counter_queries(context):
+            """ Обновления счётчиков и чтения произведения по отзыву."""
+            return [
+                query['sql'] for query in context.captured_queries
+                if query['sql'].startswith('UPDATE "reviews_review"')
+                or query['sql'].startswith(
+                    'SELECT "reviews_review"."title_id"'
+                )
+            ]
+
+        with CaptureQueriesContext(connection) as context:
+            user.delete()
+        assert self.get_count(review_id) == 0
+        assert not Review.objects.filter(pk=own_review_id).exists()
+        assert len(counter_queries(context)) == 1, (
+            'Проверьте, что при удалении пользователя счётчики '
+            'комментариев обновляются одним запросом на отзыв, а не на '
+            'каждый комментарий.'
+        )
+
+        for idx in range(3):
+            create_single_comment(admin_client, title_id, review_id, f'{idx}')
+        with CaptureQueriesContext(connection) as context:
+            admin_client.delete(
+                f'/api/v1/titles/{title_id}/reviews/{review_id}/'
+            )
+        assert not counter_queries(context), (
+            'Проверьте, что при удалении отзыва его счётчик комментариев '
+            'не обновляется для каждого удаляемого комментария.'
+        )
+        assert not cascade_deleting('review')
+        assert not cascade_deleting('author')
@@ -0,0 +1,147 @@
+import csv
+import json
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+def read_lines(response):
+    assert response.streaming, (
+        'Проверьте, что выгрузка отдаётся потоком (StreamingHttpResponse).'
+    )
+    content = b''.join(response.streaming_content).decode()
+    return content.splitlines()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22Export:
+
+    def test_01_admin_only(self, client, user_client, moderator_client):
+        url = '/api/v1/export/titles/'
+        assert client.get(url).status_code == HTTPStatus.UNAUTHORIZED
+        for role_client in (user_client, moderator_client):
+            assert role_client.get(url).status_code == HTTPStatus.FORBIDDEN, (
+                f'Проверьте, что `{url}` доступен только администратору.'
+            )
+
+    def test_02_titles_ndjson_and_csv(self, admin_client, settings):
+        settings.EXPORT_CHUNK_SIZE = 1
+        titles, _, _ = create_titles(admin_client)
+        response = admin_client.get('/api/v1/export/titles/')
+        assert response.status_code == HTTPStatus.OK
+        assert response['Content-Type'].startswith('application/x-ndjson')
+        rows = [json.loads(line) for line in read_lines(response)]
+        assert [row['id'] for row in rows] == [
+            title['id'] for title in titles
+        ], (
+            'Проверьте, что выгрузка содержит все произведения по '
+            'возрастанию id, сколько бы пачек ни потребовалось.'
+        )
+        assert sorted(rows[0]['genre']) == ['comedy', 'horror']
+        assert rows[0]['category'] == 'films'
+        assert rows[0]['rating'] is None
+
+        response = admin_client.get('/api/v1/export/titles/?format=csv')
+        assert response['Content-Type'].startswith('text/csv')
+        assert 'titles.csv' in response['Content-Disposition']
+        rows = list(csv.DictReader(read_lines(response)))
+        assert len(rows) == 2
+        assert sorted(rows[0]['genre'].split(',')) == ['comedy', 'horror']
+        assert rows[1]['name'] == 'Крепкий орешек'
+
+    def test_03_incremental_reviews(self, admin_client, admin, user,
+                                    moderator, settings):
+        settings.EXPORT_CHUNK_SIZE = 2
+        from reviews.models import Review, Title
+
+        titles, _, _ = create_titles(admin_client)
+        title = Title.objects.get(pk=titles[0]['id'])
+        created = [
+            Review.objects.create(
+                title=title, author=author, text='text', score=score
+            )
+            for author, score in ((admin, 5), (user, 7), (moderator, 9))
+        ]
+        url = '/api/v1/export/reviews/'
+        rows = [
+            json.loads(line) for line in read_lines(admin_client.get(url))
+        ]
+        assert [row['id'] for row in rows] == [r.id for r in created]
+        assert rows[1]['author'] == user.username
+        assert rows[1]['score'] == 7
+        assert rows[1]['title_id'] == title.pk
+
+        rows = read_lines(admin_client.get(f'{url}?after={created[0].id}'))
+        assert [json.loads(line)['id'] for line in rows] == [
+            created[1].id, created[2].id
+        ], 'Проверьте фильтрацию выгрузки по `after`.'
+
+        since = created[1].pub_date.isoformat()
+        response = admin_client.get(url, {'since': since})
+        rows = read_lines(response)
+        assert [json.loads(line)['id'] for line in rows] == [
+            created[2].id
+        ], 'Проверьте фильтрацию выгрузки по `since`.'
+
+        response = admin_client.get('/api/v1/export/titles/',
+                                    {'since': since})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_04_comments_and_unknown(self, admin_client, admin):
+        from reviews.models import Comment, Review, Title
+
+        titles, _, _ = create_titles(admin_client)
+        review = Review.objects.create(
+            title=Title.objects.get(pk=titles[1]['id']), author=admin,
+            text='text', score=5
+        )
+        comment = Comment.objects.create(
+            review=review, author=admin, text='Комментарий'
+        )
+        lines = read_lines(admin_client.get('/api/v1/export/comments/'))
+        assert json.loads(lines[0]) == {
+            'id': comment.id,
+            'review_id': review.id,
+            'title_id': titles[1]['id'],
+            'author': 'TestAdmin',
+            'text': 'Комментарий',
+            'pub_date': json.loads(lines[0])['pub_date']
+        }
+        response = admin_client.get('/api/v1/export/users/')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_05_genre_missing_from_cache(self, admin_client, settings):
+        from api.v1.conditional import GENRES_VERSION
+        from api.v1.versions import bump_version
+        from reviews.models import Genre, GenreTitle
+
+        settings.EXPORT_CHUNK_SIZE = 1
+        titles, _, _ = create_titles(admin_client)
+        response = admin_client.get('/api/v1/export/titles/')
+        content = iter(response.streaming_content)
+        first = json.loads(next(content).decode())
+        assert first['id'] == titles[0]['id']
+
+        # bulk_create не отправляет сигналов: кеш жанров о нём не знает.
+        Genre.objects.bulk_create([Genre(name='Вестерн', slug='western')])
+        western = Genre.objects.get(slug='western')
+        GenreTitle.objects.create(genre=western, title_id=titles[1]['id'])
+        rest = [
+            json.loads(line)
+            for line in b''.join(content).decode().splitlines()
+        ]
+        assert [row['id'] for row in rest] == [titles[1]['id']], (
+            'Проверьте, что жанр, которого нет в кеше, не обрывает '
+            'выгрузку.'
+        )
+        assert 'western' not in rest[0]['genre']
+
+        bump_version(GENRES_VERSION)
+        rows = [
+            json.loads(line) for line in read_lines(
+                admin_client.get('/api/v1/export/titles/')
+            )
+        ]
+        assert 'western' in rows[1]['genre']
@@ -0,0 +1,135 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import (create_comments, create_reviews,
+                         create_single_review, create_titles)
+
+
+def get_with_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK, (
+        f'Проверьте, что GET-запрос к `{url}` возвращает ответ со статусом '
+        '200.'
+    )
+    return response.json(), [query['sql'] for query in context]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23SparseFields:
+
+    def test_01_title_fields(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        data, queries = get_with_queries(
+            client, '/api/v1/titles/?fields=id,name,rating'
+        )
+        assert data['results'][0] == {
+            'id': titles[0]['id'], 'name': titles[0]['name'], 'rating': None
+        }, (
+            'Проверьте, что `?fields=` оставляет в ответе только '
+            'перечисленные поля.'
+        )
+        assert len(queries) == 2, (
+            'Проверьте, что без поля `genre` связи с жанрами не '
+            'загружаются.'
+        )
+        assert all('description' not in sql for sql in queries), (
+            'Проверьте, что незапрошенное описание не читается из БД.'
+        )
+
+        data, _ = get_with_queries(
+            client, f'/api/v1/titles/{titles[1]["id"]}/?fields=name,genre'
+        )
+        assert data == {
+            'name': titles[1]['name'],
+            'genre': [{'name': 'Драма', 'slug': 'drama'}]
+        }
+
+        response = client.get('/api/v1/titles/?fields=id,secret')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что неизвестное поле в `?fields=` возвращает 400.'
+        )
+
+    def test_02_title_expand_scores(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(admin_client, titles[0]['id'], 'text', 8)
+        data, _ = get_with_queries(client, '/api/v1/titles/')
+        assert 'scores' not in data['results'][0], (
+            'Проверьте, что распределение оценок не выводится без '
+            '`?expand=scores`.'
+        )
+        data, _ = get_with_queries(
+            client, f'/api/v1/titles/{titles[0]["id"]}/?expand=scores'
+        )
+        assert data['scores']['count'] == 1
+        assert data['scores']['histogram']['8'] == 1
+        assert data['description'] == titles[0]['description']
+        response = client.get('/api/v1/titles/?expand=reviews')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_03_review_fields(self, client, admin_client, admin, user,
+                              user_client):
+        reviews, titles = create_reviews(admin_client, {
+            admin: admin_client, user: user_client
+        })
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        data, queries = get_with_queries(client, f'{url}?fields=id,score')
+        assert set(data['results'][0]) == {'id', 'score'}
+        assert all('users_user' not in sql for sql in queries), (
+            'Проверьте, что без поля `author` отзывы читаются без JOIN с '
+            'пользователями.'
+        )
+        assert all('"text"' not in sql for sql in queries), (
+            'Проверьте, что незапрошенный текст отзыва не читается из БД.'
+        )
+
+        data, queries = get_with_queries(
+            client, f'{url}?fields=id,author&expand=title'
+        )
+        assert data['results'][0]['title'] == {
+            'id': titles[0]['id'],
+            'name': titles[0]['name'],
+            'year': titles[0]['year']
+        }
+        assert len(queries) == 2, (
+            'Проверьте, что произведение из `?expand=title` загружается '
+            'в том же запросе, что и отзывы.'
+        )
+
+        data, queries = get_with_queries(
+            client, f'{url}?fields=id&pagination=cursor'
+        )
+        assert len(queries) == 1, (
+            'Проверьте, что курсорная пагинация не дочитывает отложенные '
+            'поля.'
+        )
+
+    def test_04_comment_expand(self, client, admin_client, admin, user,
+                               user_client):
+        comments, reviews, titles = create_comments(admin_client, {
+            admin: admin_client, user: user_client
+        })
+        url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+            f'{reviews[0]["id"]}/comments/'
+        )
+        data, queries = get_with_queries(
+            client, f'{url}?fields=id,text&expand=review'
+        )
+        result = data['results'][0]
+        assert set(result) == {'id', 'text', 'review'}
+        assert result['review']['id'] == reviews[0]['id']
+        assert result['review']['score'] == reviews[0]['score']
+        assert len(queries) == 2
+
+    def test_05_writes_ignore_fields(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        response = user_client.post(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/?fields=id',
+            data={'text': 'text', 'score': 5}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert {'id', 'text', 'author', 'score'} <= set(response.json())
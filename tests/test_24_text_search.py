@@ -0,0 +1,160 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import (create_single_comment, create_single_review,
+                         create_titles)
+
+
+def search(client, url, query):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, {'search': query})
+    assert response.status_code == HTTPStatus.OK, (
+        f'Проверьте, что GET-запрос к `{url}?search=` возвращает ответ со '
+        'статусом 200.'
+    )
+    data = response.json()
+    return (
+        [item['text'] for item in data['results']],
+        data['count'],
+        [query['sql'] for query in context]
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24TextSearch:
+
+    def test_01_review_search_scoped_and_ranked(
+        self, client, admin_client, user_client, moderator_client
+    ):
+        titles, _, _ = create_titles(admin_client)
+        first, second = titles[0]['id'], titles[1]['id']
+        create_single_review(
+            admin_client, first, 'Скучный сюжет, но отличная музыка', 4
+        )
+        create_single_review(
+            user_client, first, 'Музыка, музыка и ещё раз музыка', 9
+        )
+        create_single_review(moderator_client, first, 'Про погоню', 7)
+        create_single_review(admin_client, second, 'Музыка так себе', 3)
+        url = f'/api/v1/titles/{first}/reviews/'
+
+        texts, count, queries = search(client, url, 'МУЗЫКА')
+        assert texts == [
+            'Музыка, музыка и ещё раз музыка',
+            'Скучный сюжет, но отличная музыка'
+        ], (
+            'Проверьте, что `?search=` ищет только среди отзывов '
+            'произведения из URL без учёта регистра, а результаты '
+            'отсортированы по релевантности.'
+        )
+        assert count == 2
+        assert any('reviews_review_fts' in sql for sql in queries), (
+            'Проверьте, что поиск по отзывам идёт по полнотекстовому '
+            'индексу.'
+        )
+        assert not any('LIKE' in sql for sql in queries), (
+            'Проверьте, что поиск по отзывам не перебирает тексты через '
+            'LIKE.'
+        )
+        assert search(client, url, 'отличн')[0] == [
+            'Скучный сюжет, но отличная музыка'
+        ], 'Проверьте, что последнее слово запроса ищется по префиксу.'
+        assert search(client, url, 'музыка погоню')[0] == []
+        assert search(client, url, '***')[0] == []
+
+    def test_02_review_index_follows_writes(
+        self, client, admin_client, user_client
+    ):
+        titles, _, _ = create_titles(admin_client)
+        first, second = titles[0]['id'], titles[1]['id']
+        response = create_single_review(
+            user_client, first, 'Отличная музыка', 9
+        )
+        review_url = f'/api/v1/titles/{first}/reviews/{response.json()["id"]}/'
+        url = f'/api/v1/titles/{first}/reviews/'
+        assert search(client, url, 'музыка')[1] == 1
+
+        user_client.patch(review_url, data={'text': 'Отличные актёры'})
+        texts, count, _ = search(client, url, 'музыка')
+        assert (texts, count) == ([], 0), (
+            'Проверьте, что после редактирования отзыва старый текст '
+            'не находится, а счётчик результатов сброшен.'
+        )
+        assert search(client, url, 'актёры')[0] == ['Отличные актёры']
+
+        user_client.delete(review_url)
+        assert search(client, url, 'актёры')[1] == 0, (
+            'Проверьте, что удалённые отзывы исчезают из поиска.'
+        )
+
+        response = user_client.post('/api/v1/reviews/batch/', data={
+            'reviews': [
+                {'title_id': first, 'text': 'Пакетный отзыв', 'score': 5},
+                {'title_id': second, 'text': 'Пакетный тоже', 'score': 6},
+            ]
+        }, format='json')
+        assert response.status_code == HTTPStatus.OK
+        assert search(client, url, 'пакетный')[0] == ['Пакетный отзыв'], (
+            'Проверьте, что отзывы, созданные пакетом, попадают в индекс.'
+        )
+
+    def test_03_comment_search(self, client, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        first = create_single_review(
+            admin_client, title_id, 'Отзыв', 5
+        ).json()['id']
+        second = create_single_review(
+            user_client, title_id, 'Ещё отзыв', 6
+        ).json()['id']
+        create_single_comment(user_client, title_id, first, 'Согласен')
+        create_single_comment(admin_client, title_id, first, 'Не согласен')
+        create_single_comment(admin_client, title_id, second, 'Согласен')
+        url = f'/api/v1/titles/{title_id}/reviews/{first}/comments/'
+
+        texts, count, queries = search(client, url, 'согласен')
+        assert sorted(texts) == ['Не согласен', 'Согласен'] and count == 2, (
+            'Проверьте, что `?search=` ищет только среди комментариев '
+            'отзыва из URL.'
+        )
+        assert any('reviews_comment_fts' in sql for sql in queries)
+        assert search(client, url, 'не')[0] == ['Не согласен']
+
+        comment_id = create_single_comment(
+            user_client, title_id, first, 'Спорно'
+        ).json()['id']
+        assert search(client, url, 'спорно')[0] == ['Спорно']
+        user_client.delete(f'{url}{comment_id}/')
+        assert search(client, url, 'спорно')[0] == [], (
+            'Проверьте, что удалённые комментарии исчезают из поиска.'
+        )
+
+    def test_04_review_delete_cascades(
+        self, client, admin_client, user_client
+    ):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review_id = create_single_review(
+            admin_client, title_id, 'Отзыв', 5
+        ).json()['id']
+        comment_id = create_single_comment(
+            user_client, title_id, review_id, 'Согласен'
+        ).json()['id']
+        admin_client.delete(f'/api/v1/titles/{title_id}/')
+
+        from reviews.search import COMMENT_INDEX_TABLE, REVIEW_INDEX_TABLE
+        with connection.cursor() as cursor:
+            for table, pk in (
+                (REVIEW_INDEX_TABLE, review_id),
+                (COMMENT_INDEX_TABLE, comment_id)
+            ):
+                cursor.execute(
+                    f'SELECT COUNT(*) FROM {table} WHERE rowid = %s', [pk]
+                )
+                assert cursor.fetchone()[0] == 0, (
+                    'Проверьте, что при каскадном удалении отзывы и '
+                    'комментарии удаляются из индекса.'
+                )
@@ -0,0 +1,132 @@
+from http import HTTPStatus
+from types import SimpleNamespace
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import obtain_token_client
+
+
+def user_queries(client, url, method='get', **kwargs):
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(client, method)(url, **kwargs)
+    queries = [
+        query['sql'] for query in context
+        if 'FROM "users_user"' in query['sql']
+    ]
+    return response, queries
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25TokenAuth:
+
+    def test_01_claims_without_user_query(self, admin, shared_cache):
+        client = obtain_token_client(admin)
+        response, queries = user_queries(client, '/api/v1/titles/')
+        assert response.status_code == HTTPStatus.OK
+        assert queries == [], (
+            'Проверьте, что пользователь запроса собирается из утверждений '
+            'токена без запроса к таблице пользователей.'
+        )
+        response, queries = user_queries(
+            client, '/api/v1/categories/', method='post',
+            data={'name': 'Фильм', 'slug': 'films'}
+        )
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что роль администратора берётся из токена.'
+        )
+        assert queries == []
+
+    def test_02_old_tokens_use_user_cache(self, admin_client):
+        url = '/api/v1/titles/'
+        response, queries = user_queries(admin_client, url)
+        assert response.status_code == HTTPStatus.OK
+        assert len(queries) == 1
+        response, queries = user_queries(admin_client, url)
+        assert queries == [], (
+            'Проверьте, что для токена без утверждений о роли пользователь '
+            'берётся из кеша в памяти со второго запроса.'
+        )
+
+    def test_03_role_change_invalidates_claims(self, admin,
+                                               user_superuser_client,
+                                               shared_cache):
+        client = obtain_token_client(admin)
+        url = '/api/v1/categories/'
+        response = client.post(url, data={'name': 'Фильм', 'slug': 'films'})
+        assert response.status_code == HTTPStatus.CREATED
+        response = user_superuser_client.patch(
+            f'/api/v1/users/{admin.username}/', data={'role': 'user'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        response = client.post(url, data={'name': 'Книги', 'slug': 'books'})
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что после смены роли утверждения выданного ранее '
+            'токена не используются.'
+        )
+
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['role'] == 'user'
+
+        admin.delete()
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что токен удалённого пользователя не принимается.'
+        )
+
+    def test_04_user_cache_is_bounded(self, settings, admin, user):
+        from api.v1.authentication import user_cache
+
+        settings.USER_CACHE_SIZE = 1
+        user_cache.clear()
+        assert user_cache.get(admin.pk) == admin
+        assert user_cache.get(user.pk) == user
+        assert list(user_cache.users) == [user.pk], (
+            'Проверьте, что кеш пользователей вытесняет давно '
+            'использованные записи.'
+        )
+        cached = user_cache.get(user.pk)
+        cached.bio = 'changed'
+        assert user_cache.get(user.pk).bio == user.bio, (
+            'Проверьте, что кеш отдаёт копии пользователей.'
+        )
+        user.bio = 'saved'
+        user.save()
+        assert user.pk not in user_cache.users
+        assert user_cache.get(user.pk).bio == 'saved'
+
+    def test_05_claims_ignored_with_local_cache(self, admin):
+        client = obtain_token_client(admin)
+        response, queries = user_queries(client, '/api/v1/titles/')
+        assert response.status_code == HTTPStatus.OK
+        assert len(queries) == 1, (
+            'Проверьте, что с кешем в памяти процесса утверждения токена '
+            'не используются: версии пользователей не видны другим '
+            'процессам.'
+        )
+        response, queries = user_queries(client, '/api/v1/titles/')
+        assert queries == []
+
+    def test_06_user_cache_entries_expire(self, settings, monkeypatch,
+                                          user):
+        from django.contrib.auth import get_user_model
+
+        from api.v1 import authentication
+
+        clock = SimpleNamespace(now=0.0)
+        clock.monotonic = lambda: clock.now
+        monkeypatch.setattr(authentication, 'time', clock)
+        settings.USER_CACHE_TIMEOUT = 60
+        authentication.user_cache.clear()
+        assert authentication.user_cache.get(user.pk).bio == user.bio
+        # Изменение в другом процессе: версия в этом процессе прежняя.
+        get_user_model().objects.filter(pk=user.pk).update(bio='changed')
+        clock.now += 30
+        assert authentication.user_cache.get(user.pk).bio == user.bio
+        clock.now += 31
+        assert authentication.user_cache.get(user.pk).bio == 'changed', (
+            'Проверьте, что запись кеша пользователей перечитывается из БД '
+            'по истечении USER_CACHE_TIMEOUT.'
+        )
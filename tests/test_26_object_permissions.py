@@ -0,0 +1,110 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import (create_single_comment, create_single_review,
+                         create_titles, obtain_token_client)
+
+
+def user_queries(client, method, url, **kwargs):
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(client, method)(url, **kwargs)
+    return response, [
+        query['sql'] for query in context
+        if 'FROM "users_user"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26ObjectPermissions:
+
+    def test_01_permission_without_queries(self, admin_client, user_client,
+                                           user, moderator,
+                                           django_user_model):
+        from api.v1.authentication import RoleTokenUser
+        from api.v1.permissions import IsAuthorAdminModerOrReadOnly
+        from reviews.models import Review
+
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'text', 5)
+        review = Review.objects.only('pk', 'author_id').get()
+
+        class View:
+            action = 'partial_update'
+
+        class Request:
+            def __init__(self, user):
+                self.user = RoleTokenUser.for_user(user)
+
+        other = django_user_model.objects.create_user(
+            username='OtherUser', email='other@yamdb.fake'
+        )
+        permission = IsAuthorAdminModerOrReadOnly()
+        for request_user, expected in (
+            (user, True), (moderator, True), (other, False)
+        ):
+            with CaptureQueriesContext(connection) as context:
+                allowed = permission.has_object_permission(
+                    Request(request_user), View(), review
+                )
+            assert allowed is expected
+            assert len(context) == 0, (
+                'Проверьте, что проверка прав на объект сравнивает '
+                '`author_id` и не загружает автора записи.'
+            )
+
+    def test_02_moderation_without_user_queries(self, admin_client,
+                                                user_client, moderator,
+                                                shared_cache):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review_id = create_single_review(
+            user_client, title_id, 'text', 5
+        ).json()['id']
+        comment_id = create_single_comment(
+            user_client, title_id, review_id, 'comment'
+        ).json()['id']
+        client = obtain_token_client(moderator)
+        review_url = f'/api/v1/titles/{title_id}/reviews/{review_id}/'
+        comment_url = f'{review_url}comments/{comment_id}/'
+
+        response, queries = user_queries(
+            client, 'patch', comment_url, data={'text': 'moderated'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert queries == [], (
+            'Проверьте, что модерация комментария не читает из БД ни '
+            'модератора, ни автора отдельным запросом.'
+        )
+        response, queries = user_queries(client, 'delete', comment_url)
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert queries == []
+        response, queries = user_queries(
+            client, 'patch', review_url, data={'text': 'moderated'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert queries == []
+        response, queries = user_queries(client, 'delete', review_url)
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert queries == [], (
+            'Проверьте, что удаление отзыва модератором не читает из БД '
+            'ни модератора, ни автора отдельным запросом.'
+        )
+
+    def test_03_foreign_author_forbidden(self, admin_client, user_client,
+                                         user, moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review_id = create_single_review(
+            moderator_client, title_id, 'text', 5
+        ).json()['id']
+        url = f'/api/v1/titles/{title_id}/reviews/{review_id}/'
+        client = obtain_token_client(user)
+        response = client.patch(url, data={'text': 'changed'})
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что пользователь не может изменить чужой отзыв.'
+        )
+        response = client.delete(url)
+        assert response.status_code == HTTPStatus.FORBIDDEN
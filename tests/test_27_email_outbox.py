@@ -0,0 +1,182 @@
+import time
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+from smtplib import SMTPException
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+
+URL = '/api/v1/auth/signup/'
+LOCMEM_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+
+class FailingBackend(BaseEmailBackend):
+    """ Почтовый сервер, который не принимает письма."""
+
+    def send_messages(self, email_messages):
+        raise SMTPException('Сервер недоступен')
+
+
+def signup(client, username='outbox_user'):
+    response = client.post(URL, data={
+        'username': username, 'email': f'{username}@yamdb.fake'
+    })
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27EmailOutbox:
+
+    def test_01_signup_enqueues(self, client, settings):
+        from users.models import OutboxEmail
+
+        settings.EMAIL_OUTBOX_WORKER = 'command'
+        outbox_before = len(mail.outbox)
+        signup(client)
+        assert len(mail.outbox) == outbox_before, (
+            'Проверьте, что регистрация не отправляет письмо сама, а '
+            'ставит его в очередь.'
+        )
+        email = OutboxEmail.objects.get()
+        assert email.recipient == 'outbox_user@yamdb.fake'
+        assert email.sent_at is None
+
+        call_command('send_outbox', '--once', stdout=StringIO())
+        assert len(mail.outbox) == outbox_before + 1, (
+            'Проверьте, что `send_outbox` отправляет письма из очереди.'
+        )
+        assert mail.outbox[-1].to == ['outbox_user@yamdb.fake']
+        email.refresh_from_db()
+        assert email.sent_at is not None and email.next_attempt_at is None
+        call_command('send_outbox', '--once', stdout=StringIO())
+        assert len(mail.outbox) == outbox_before + 1, (
+            'Проверьте, что отправленные письма не отправляются повторно.'
+        )
+
+    def test_02_retries_with_backoff(self, client, settings):
+        from django.utils import timezone
+        from users.models import OutboxEmail
+        from users.outbox import deliver_pending
+
+        settings.EMAIL_OUTBOX_WORKER = 'command'
+        settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 3
+        settings.EMAIL_BACKEND = f'{__name__}.FailingBackend'
+        signup(client)
+        assert deliver_pending() == 0
+        email = OutboxEmail.objects.get()
+        delay = email.next_attempt_at - timezone.now()
+        assert email.attempts == 1 and email.last_error, (
+            'Проверьте, что неудачная попытка записывается в очередь.'
+        )
+        assert timedelta(seconds=20) < delay <= timedelta(
+            seconds=settings.EMAIL_OUTBOX_RETRY_DELAY
+        ), 'Проверьте, что повторная попытка откладывается.'
+        assert deliver_pending() == 0
+        assert OutboxEmail.objects.get().attempts == 1, (
+            'Проверьте, что письмо не отправляется до времени повторной '
+            'попытки.'
+        )
+
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        deliver_pending()
+        email.refresh_from_db()
+        assert email.attempts == 2
+        assert email.next_attempt_at - timezone.now() > timedelta(
+            seconds=settings.EMAIL_OUTBOX_RETRY_DELAY
+        ), 'Проверьте, что пауза между попытками растёт.'
+
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        deliver_pending()
+        email.refresh_from_db()
+        assert (email.attempts, email.next_attempt_at) == (3, None), (
+            'Проверьте, что после EMAIL_OUTBOX_MAX_ATTEMPTS попыток письмо '
+            'больше не отправляется.'
+        )
+
+        signup(client, 'second_user')
+        settings.EMAIL_BACKEND = LOCMEM_BACKEND
+        assert deliver_pending() == 1
+
+    def test_03_background_thread(self, client, settings):
+        from users.outbox import outbox_worker
+
+        settings.EMAIL_OUTBOX_WORKER = 'thread'
+        outbox_before = len(mail.outbox)
+        try:
+            signup(client)
+            deadline = time.monotonic() + 5
+            while len(mail.outbox) == outbox_before:
+                assert time.monotonic() < deadline, (
+                    'Проверьте, что фоновый поток отправляет письма из '
+                    'очереди.'
+                )
+                time.sleep(0.01)
+        finally:
+            outbox_worker.stop()
+        assert mail.outbox[-1].to == ['outbox_user@yamdb.fake']
+
+    def test_04_thread_resumes_on_first_request(self, client, settings):
+        from users.models import OutboxEmail
+        from users.outbox import outbox_worker
+
+        settings.EMAIL_OUTBOX_WORKER = 'thread'
+        outbox_before = len(mail.outbox)
+        # Письмо осталось в очереди с прошлого запуска процесса.
+        OutboxEmail.objects.create(
+            subject='Код', body='code', recipient='waiting@yamdb.fake',
+            from_email='admin@yamdb.fake'
+        )
+        try:
+            assert client.get('/api/v1/titles/').status_code == HTTPStatus.OK
+            deadline = time.monotonic() + 5
+            while len(mail.outbox) == outbox_before:
+                assert time.monotonic() < deadline, (
+                    'Проверьте, что фоновый поток запускается с первым '
+                    'запросом и отправляет письма, оставшиеся в очереди.'
+                )
+                time.sleep(0.01)
+        finally:
+            outbox_worker.stop()
+        assert mail.outbox[-1].to == ['waiting@yamdb.fake']
+
+    def test_05_finished_emails_blanked_and_purged(self, client, settings):
+        from django.utils import timezone
+        from users.models import OutboxEmail
+        from users.outbox import deliver_pending
+
+        settings.EMAIL_OUTBOX_WORKER = 'command'
+        settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 1
+        signup(client)
+        deliver_pending()
+        email = OutboxEmail.objects.get()
+        assert email.sent_at is not None and email.body == '', (
+            'Проверьте, что после отправки текст письма с кодом '
+            'подтверждения стирается из очереди.'
+        )
+
+        settings.EMAIL_BACKEND = f'{__name__}.FailingBackend'
+        signup(client, 'failing_user')
+        deliver_pending()
+        failed = OutboxEmail.objects.get(recipient='failing_user@yamdb.fake')
+        assert (failed.next_attempt_at, failed.body) == (None, ''), (
+            'Проверьте, что после последней попытки текст письма '
+            'стирается из очереди.'
+        )
+
+        signup(client, 'pending_user')
+        OutboxEmail.objects.update(created=timezone.now() - timedelta(
+            seconds=settings.EMAIL_OUTBOX_RETENTION + 1
+        ))
+        OutboxEmail.objects.filter(
+            recipient='pending_user@yamdb.fake'
+        ).update(next_attempt_at=timezone.now() + timedelta(hours=1))
+        deliver_pending()
+        assert list(OutboxEmail.objects.values_list(
+            'recipient', flat=True
+        )) == ['pending_user@yamdb.fake'], (
+            'Проверьте, что завершённые письма старше '
+            'EMAIL_OUTBOX_RETENTION удаляются, а ожидающие отправки — нет.'
+        )
@@ -0,0 +1,117 @@
+import socketserver
+import threading
+from http import HTTPStatus
+
+import pytest
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """ Минимальный SMTP-сервер: принимает любые письма и запоминает,
+    сколько писем пришло в каждом соединении."""
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        messages = []
+        self.server.connections.append(messages)
+        self.reply('220 localhost')
+        while True:
+            line = self.rfile.readline().decode().strip()
+            command = line[:4].upper()
+            if not line or command == 'QUIT':
+                self.reply('221 bye')
+                return
+            if command == 'EHLO':
+                self.reply('250 localhost')
+            elif command == 'DATA':
+                self.reply('354 go ahead')
+                data = []
+                while True:
+                    data_line = self.rfile.readline().decode()
+                    if data_line in ('.\r\n', ''):
+                        break
+                    data.append(data_line)
+                messages.append(''.join(data))
+                self.reply('250 queued')
+            else:
+                self.reply('250 ok')
+
+
+class SMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.connections = []
+
+
+@pytest.fixture
+def smtp_server(settings):
+    server = SMTPServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+    settings.EMAIL_HOST = '127.0.0.1'
+    settings.EMAIL_PORT = server.server_address[1]
+    settings.EMAIL_USE_TLS = False
+    settings.EMAIL_OUTBOX_WORKER = 'command'
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def signup_many(client, count):
+    for index in range(count):
+        response = client.post('/api/v1/auth/signup/', data={
+            'username': f'burst_{index}', 'email': f'burst_{index}@yamdb.fake'
+        })
+        assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28BatchedMail:
+
+    def test_01_one_connection_per_batch(self, client, settings,
+                                         smtp_server):
+        from users.models import OutboxEmail
+        from users.outbox import deliver_pending
+
+        settings.EMAIL_OUTBOX_BATCH_SIZE = 3
+        signup_many(client, 7)
+        assert deliver_pending() == 7
+        assert [len(messages) for messages in smtp_server.connections] == [
+            3, 3, 1
+        ], (
+            'Проверьте, что письма из очереди отправляются пачками по '
+            'EMAIL_OUTBOX_BATCH_SIZE, одно соединение на пачку.'
+        )
+        assert 'burst_6@yamdb.fake' in smtp_server.connections[-1][0]
+        assert not OutboxEmail.objects.filter(sent_at__isnull=True).exists()
+
+    def test_02_bad_message_does_not_block_batch(self, client, settings,
+                                                 smtp_server):
+        from users.models import OutboxEmail
+        from users.outbox import deliver_pending
+
+        signup_many(client, 3)
+        OutboxEmail.objects.filter(recipient='burst_1@yamdb.fake').update(
+            from_email='broken\nheader@yamdb.fake'
+        )
+        assert deliver_pending() == 2, (
+            'Проверьте, что письмо, которое не удалось отправить, не '
+            'мешает отправке остальных писем пачки.'
+        )
+        failed = OutboxEmail.objects.get(recipient='burst_1@yamdb.fake')
+        assert failed.attempts == 1 and failed.next_attempt_at is not None
+        delivered = [
+            message for messages in smtp_server.connections
+            for message in messages
+        ]
+        for recipient in ('burst_0@yamdb.fake', 'burst_2@yamdb.fake'):
+            assert sum(recipient in message for message in delivered) == 1, (
+                'Проверьте, что каждое письмо пачки доставляется ровно '
+                'один раз, даже если другое письмо отправить не удалось.'
+            )
+        assert len(smtp_server.connections) == 1
@@ -0,0 +1,74 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+URL = '/api/v1/auth/signup/'
+
+
+def signup_queries(client, username, email):
+    with CaptureQueriesContext(connection) as context:
+        response = client.post(
+            URL, data={'username': username, 'email': email}
+        )
+    return response, [query['sql'] for query in context]
+
+
+def user_lookups(queries):
+    return [sql for sql in queries if 'FROM "users_user"' in sql]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test29Signup:
+
+    def test_01_single_lookup(self, client, settings, user):
+        from users.models import OutboxEmail
+
+        settings.EMAIL_OUTBOX_WORKER = 'command'
+        response, queries = signup_queries(
+            client, 'new_user', 'new_user@yamdb.fake'
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert len(user_lookups(queries)) == 1, (
+            'Проверьте, что регистрация нового пользователя проверяет '
+            'username и email одним запросом.'
+        )
+        # Поиск пользователей, BEGIN, создание пользователя и письма.
+        assert len(queries) <= 4, '\n'.join(queries)
+
+        response, queries = signup_queries(client, user.username, user.email)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что повторная регистрация существующего '
+            'пользователя возвращает ответ со статусом 200.'
+        )
+        assert len(user_lookups(queries)) == 1
+        # Поиск пользователя и создание письма.
+        assert len(queries) <= 2, '\n'.join(queries)
+        assert OutboxEmail.objects.filter(recipient=user.email).exists()
+
+    @pytest.mark.parametrize('username,email,message', [
+        ('TestUser', 'other@yamdb.fake', 'username'),
+        ('other', 'testuser@yamdb.fake', 'email'),
+    ])
+    def test_02_conflicts(self, client, user, username, email, message):
+        response, queries = signup_queries(client, username, email)
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что регистрация с занятым username или email '
+            'возвращает ответ со статусом 400.'
+        )
+        assert message in str(response.json())
+        assert len(queries) == 1, (
+            'Проверьте, что конфликт username или email определяется '
+            'одним запросом.'
+        )
+
+    def test_03_username_and_email_of_different_users(
+        self, client, user, admin
+    ):
+        response, _ = signup_queries(client, user.username, admin.email)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'username' in str(response.json()), (
+            'Проверьте, что при совпадении username и email разных '
+            'пользователей сообщается о занятом username.'
+        )
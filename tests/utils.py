@@ -1,5 +1,10 @@
 from http import HTTPStatus
 
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
 
 check_name_and_slug_patterns = (
     (
@@ -305,3 +310,31 @@ def check_fields(obj_type, url_pattern, obj, expected_data, detail=False):
         f'данные {obj_types[obj_type]}{results_in_msg}. Поле `id` не '
         'найдено или не является целым числом.'
     )
+
+
+def check_query_budget(client, url, budget, method='get', data=None,
+                       **extra):
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(client, method)(url, data=data, **extra)
+    queries = '\n'.join(query['sql'] for query in context.captured_queries)
+    assert len(context.captured_queries) <= budget, (
+        f'Проверьте, что {method.upper()}-запрос к `{url}` укладывается в '
+        f'бюджет из {budget} запросов к БД. Выполнено '
+        f'{len(context.captured_queries)}:\n{queries}'
+    )
+    return response
+
+
+def obtain_token_client(user):
+    """ Клиент с токеном, полученным через `/api/v1/auth/token/`:
+    в отличие от фикстур, токен содержит роль пользователя."""
+    response = APIClient().post('/api/v1/auth/token/', data={
+        'username': user.username,
+        'confirmation_code': default_token_generator.make_token(user)
+    })
+    assert response.status_code == HTTPStatus.OK
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {response.json()["token"]}'
+    )
+    return client